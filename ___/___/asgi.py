@@ -5,6 +5,14 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
+
+The census Server-Sent Events stream (/eventos/) and the HTMX polling
+endpoints (/censo/, /referidos/pending/, /referido/<id>/) are async views
+and should be served through this module with an ASGI server, e.g.:
+    CENSUS_EVENTS=1 LONG_POLL_SECONDS=25 uvicorn ___.asgi:application
+
+Compare against the WSGI deployment with:
+    python manage.py benchmark_polling --help
 """
 
 import os
@@ -41,6 +41,22 @@ ALLOWED_HOSTS = config('ALLOWED_HOSTS', default='', cast=Csv()) + ['192.168.0.23
 # 2captcha API key for reCAPTCHA solving in Registraduria scraper
 TWOCAPTCHA_API_KEY = config('TWOCAPTCHA_API_KEY', default='')
 
+# Profile directory of a persistent scraper browser, so the Registraduria
+# page's assets come from disk cache (see accounts/scraper.py). Empty: a fresh
+# incognito context per lookup. Only one process may use the directory.
+SCRAPER_PROFILE_DIR = config('SCRAPER_PROFILE_DIR', default='')
+
+# Unix socket of the scraper service (manage.py run_scraper_service, see
+# accounts/scraper_service.py). Set: tasks send lookups to that process, which
+# owns the browser. Empty: each django-q worker runs its own browser.
+SCRAPER_SOCKET = config('SCRAPER_SOCKET', default='')
+
+# Milliseconds each scraper action on the loaded page (fill, click, waiting
+# for the results) may take; page load has its own 60 s. Four of them count
+# towards scraper.MAX_SCRAPE_SECONDS, which must stay below Q_CLUSTER's
+# timeout: above ~17000 raise the timeout (and retry) with it.
+SCRAPER_ACTION_TIMEOUT_MS = config('SCRAPER_ACTION_TIMEOUT_MS', default=10000, cast=int)
+
 
 # Application definition
 
@@ -69,14 +85,14 @@ INSTALLED_APPS = [
 #        'db': 0,
 #    }
 # 3. Increase 'workers' to match CPU cores
-# 4. Remove WAL mode signal (PostgreSQL handles concurrency natively)
+# 4. Remove the SQLite connection profile (accounts/sqlite.py) and read-only alias
 # 5. Consider separate broker database for high-throughput scenarios
 
 Q_CLUSTER = {
     'name': 'pagina-madre',
     'workers': 1,  # CRITICAL: SQLite cannot handle concurrent writes
-    'timeout': 120,  # 2 minutes max per task (INFRA-04)
-    'retry': 180,  # Must exceed timeout - 3 minutes (INFRA-04)
+    'timeout': 300,  # Max per task; above scraper.MAX_SCRAPE_SECONDS (INFRA-04)
+    'retry': 360,  # Must exceed timeout (INFRA-04)
     'queue_limit': 50,
     'save_limit': 250,
     'orm': 'default',  # Use Django's default database as broker (INFRA-01)
@@ -87,7 +103,10 @@ Q_CLUSTER = {
 }
 
 MIDDLEWARE = [
+    'middleware.StaticAssetMiddleware',  # Answers /static/ before sessions/auth
+    'middleware.ServerTimingMiddleware',  # Only with SERVER_TIMING
     'django.middleware.security.SecurityMiddleware',
+    'middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -95,13 +114,15 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'middleware.LoginRequiredMiddleware',
+    'middleware.ViewStartMiddleware',  # Only with SERVER_TIMING; keep last
 ]
 
 ROOT_URLCONF = '___.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates that reports render time to ServerTimingMiddleware
+        'BACKEND': 'accounts.timing.TimedDjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -121,14 +142,102 @@ WSGI_APPLICATION = '___.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
+# Connections are kept for CONN_MAX_AGE seconds, so the SQLite pragmas
+# (accounts/sqlite.py) are applied once per long-lived connection.
+DB_CONN_MAX_AGE = config('DB_CONN_MAX_AGE', default=600, cast=int)
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
-    }
+        'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': True,
+    },
+    # Same file opened read-only; used by @read_only_db views (accounts/routers.py)
+    'readonly': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': f"file:{BASE_DIR / 'db.sqlite3'}?mode=ro",
+        'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': True,
+        'TEST': {'MIRROR': 'default'},
+    },
+}
+
+DATABASE_ROUTERS = ['accounts.routers.ReadOnlyRouter']
+READ_ONLY_DATABASE = 'readonly'
+
+# Pragma profile applied to every SQLite connection: 'tuned' or 'safe'
+# (see accounts/sqlite.py)
+SQLITE_PROFILE = config('SQLITE_PROFILE', default='tuned')
+
+
+# Caches
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+#
+# template_fragments is used by {% cache %} for referral rows and census
+# sections. Keys include CustomUser.version / CedulaInfo.version, so entries
+# are invalidated by changing the key and never need explicit deletes.
+#
+# stats holds per-user dashboard aggregates (accounts/stats.py), deleted by
+# signal handlers when a user or cedula in the network changes. File based
+# so deletes from the qcluster worker reach the web processes.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'template_fragments': {
+        'BACKEND': 'accounts.cache.CountingLocMemCache',
+        'LOCATION': 'template-fragments',
+        'OPTIONS': {
+            'MAX_ENTRIES': 20000,
+        },
+    },
+    'stats': {
+        'BACKEND': 'accounts.cache.CountingFileBasedCache',
+        'LOCATION': config('STATS_CACHE_DIR', default='/var/tmp/pagina-madre/stats'),
+        'TIMEOUT': 3600,  # Safety net; entries are deleted on change
+        'OPTIONS': {
+            'MAX_ENTRIES': 50000,
+        },
+    },
 }
 
 
+# Long-polling of the HTMX polling endpoints (see accounts/longpoll.py)
+# Seconds a poll is held open while nothing changed. Only enable when served
+# through ASGI (___/asgi.py); under WSGI each held poll blocks a worker thread.
+LONG_POLL_SECONDS = config('LONG_POLL_SECONDS', default=0, cast=int)
+
+# Server-Sent Events push of census changes (see accounts/events.py). Only
+# enable when served through ASGI: under WSGI the stream is buffered and
+# holds a worker thread for up to STREAM_MAX_SECONDS. Off, pages keep polling.
+CENSUS_EVENTS = config('CENSUS_EVENTS', default=False, cast=bool)
+
+
+# Request timing (see accounts/timing.py): Server-Timing headers, per-URL
+# aggregates and a warning for requests slower than SLOW_REQUEST_MS
+SERVER_TIMING = config('SERVER_TIMING', default=False, cast=bool)
+SLOW_REQUEST_MS = config('SLOW_REQUEST_MS', default=1000, cast=int)
+
+# /metrics/ (accounts/metrics.py) is open to staff users, to scrapers sending
+# "Authorization: Bearer <METRICS_TOKEN>" when a token is set and, when
+# METRICS_ALLOW_LOCALHOST is on, to unauthenticated scrapers connecting
+# directly from 127.0.0.1/::1. Leave it off when a proxy on this host
+# forwards requests without an X-Forwarded-For header.
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+METRICS_ALLOW_LOCALHOST = config('METRICS_ALLOW_LOCALHOST', default=False, cast=bool)
+
+# Periodic re-verification (see accounts/reverify.py): ACTIVE/NOT_FOUND rows
+# fetched more than REVERIFY_AFTER_DAYS ago are scraped again, spread over
+# REVERIFY_WINDOW_HOURS, by a task every REVERIFY_TICK_MINUTES using at most
+# REVERIFY_SHARE of the worker's time
+REVERIFY_AFTER_DAYS = config('REVERIFY_AFTER_DAYS', default=30, cast=int)
+REVERIFY_WINDOW_HOURS = config('REVERIFY_WINDOW_HOURS', default=24, cast=int)
+REVERIFY_TICK_MINUTES = config('REVERIFY_TICK_MINUTES', default=10, cast=int)
+REVERIFY_SHARE = config('REVERIFY_SHARE', default=0.5, cast=float)
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -164,6 +273,19 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/4.2/howto/static-files/
 
 STATIC_URL = 'static/'
+STATICFILES_DIRS = [BASE_DIR / 'static']
+# Built by `manage.py collectstatic` (minified, hashed, precompressed; see
+# accounts/assets.py) and served from there by middleware.StaticAssetMiddleware
+STATIC_ROOT = config('STATIC_ROOT', default=str(BASE_DIR / 'staticfiles'))
+
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'accounts.assets.AssetStorage',
+    },
+}
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
@@ -210,18 +332,3 @@ LOGGING = {
         },
     },
 }
-
-# SQLite WAL Mode (INFRA-02)
-# Prevents "database is locked" errors when qcluster and web server run concurrently
-from django.db.backends.signals import connection_created
-from django.dispatch import receiver
-
-
-@receiver(connection_created)
-def enable_sqlite_wal(sender, connection, **kwargs):
-    """Enable WAL mode for SQLite to prevent database locking."""
-    if connection.vendor == 'sqlite':
-        cursor = connection.cursor()
-        cursor.execute('PRAGMA journal_mode=WAL;')
-        cursor.execute('PRAGMA busy_timeout=5000;')
-        cursor.close()
@@ -1,10 +1,136 @@
+"""
+Admin for the user and census tables, tuned for hundreds of thousands of
+rows:
+
+- list_select_related joins the user/referrer shown on every row
+- EstimatedCountPaginator reads the row count of an unfiltered list from
+  the planner statistics (refreshed by tasks.analyze_database) instead of
+  COUNT(*), except near the end of the list, and show_full_result_count
+  skips the second count of filtered lists
+- PrefixSearchMixin searches index ranges: digits match cedulas (or
+  usernames) starting with them, other text full names (or usernames)
+  starting with it, instead of LIKE '%term%' over every column
+- DepartamentoFilter caches its choices instead of a DISTINCT scan per page
+"""
 from django.contrib import admin
+from django.contrib.admin.views.main import PAGE_VAR
 from django.contrib.auth.admin import UserAdmin
+from django.core.cache import cache
+from django.core.paginator import EmptyPage, Paginator
+from django.db.models.functions import Upper
+from django.utils.functional import cached_property
+
+from . import sqlite
+from .search import SELECTIVE_PREFIX_CHARS, Selective, prefix_range, upper_name
 from .models import CustomUser, CedulaInfo
 
 
+# Unfiltered lists of tables with fewer rows than this are counted exactly
+ESTIMATE_MIN_ROWS = 50000
+
+# Pages in this last fraction of the estimated rows (or past them) are
+# counted exactly: rows added or deleted since the last ANALYZE
+ESTIMATE_TAIL_FRACTION = 0.05
+
+DEPARTAMENTOS_CACHE_SECONDS = 600
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator using estimated_rows() for large unfiltered querysets.
+
+    The estimate is as old as the last ANALYZE, so it is only used for
+    pages well before its end: when page_number (the page being shown) is
+    within ESTIMATE_TAIL_FRACTION of the estimated end or past it, the rows
+    are counted. The last page therefore always has rows, and rows added
+    since the ANALYZE stay reachable. A page number past the counted end
+    (a link built from the estimate) shows the last page.
+    """
+
+    def __init__(self, *args, page_number=1, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.page_number = page_number
+
+    @cached_property
+    def count(self):
+        query = self.object_list.query
+        if not query.where and not query.distinct:
+            estimate = sqlite.estimated_rows(self.object_list.model, self.object_list.db)
+            if (estimate is not None and estimate >= ESTIMATE_MIN_ROWS
+                    and self.page_number * self.per_page < estimate * (1 - ESTIMATE_TAIL_FRACTION)):
+                return estimate
+        return super().count
+
+    def validate_number(self, number):
+        try:
+            return super().validate_number(number)
+        except EmptyPage:
+            if int(number) > 1 and self.count:
+                return self.num_pages
+            raise
+
+
+class PrefixSearchMixin:
+    """
+    Index-range search instead of search_fields.
+
+    user_path is the lookup path from the model to CustomUser ('' for the
+    user admin itself).
+    """
+
+    user_path = ''
+    search_help_text = 'Cedula, o nombre completo desde el comienzo'
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
+
+    def get_paginator(self, request, queryset, per_page, orphans=0, allow_empty_first_page=True):
+        try:
+            page_number = int(request.GET.get(PAGE_VAR, 1))
+        except ValueError:
+            page_number = 1
+        return self.paginator(queryset, per_page, orphans, allow_empty_first_page,
+                              page_number=page_number)
+
+    def get_search_results(self, request, queryset, search_term):
+        term = ' '.join(search_term.split())
+        if not term:
+            return queryset, False
+        if term.isdigit():
+            condition = (prefix_range(f'{self.user_path}cedula', term)
+                         | prefix_range(f'{self.user_path}username', term))
+        else:
+            condition = (prefix_range(Upper(f'{self.user_path}nombre_completo'), upper_name(term))
+                         | prefix_range(f'{self.user_path}username', term))
+        if len(term) >= SELECTIVE_PREFIX_CHARS:
+            condition = Selective(condition)
+        return queryset.filter(condition), False
+
+
+class DepartamentoFilter(admin.SimpleListFilter):
+    """list_filter on departamento without a DISTINCT scan per page load."""
+
+    title = 'departamento'
+    parameter_name = 'departamento'
+
+    def lookups(self, request, model_admin):
+        departamentos = cache.get_or_set(
+            'admin:departamentos',
+            lambda: list(
+                CedulaInfo.objects.exclude(departamento='')
+                .values_list('departamento', flat=True).distinct().order_by('departamento')
+            ),
+            DEPARTAMENTOS_CACHE_SECONDS,
+        )
+        return [(departamento, departamento) for departamento in departamentos]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(departamento=self.value())
+        return queryset
+
+
 @admin.register(CedulaInfo)
-class CedulaInfoAdmin(admin.ModelAdmin):
+class CedulaInfoAdmin(PrefixSearchMixin, admin.ModelAdmin):
     """Read-only admin for CedulaInfo - data comes from scraping only."""
 
     list_display = (
@@ -19,17 +145,20 @@ class CedulaInfoAdmin(admin.ModelAdmin):
         'resolucion',
         'fecha_novedad',
         'fetched_at',
+        'status_changed_at',
+        'last_result_at',
         'error_message',
     )
-    list_filter = ('status', 'departamento')
-    search_fields = (
-        'user__cedula',
-        'user__nombre_completo',
-        'municipio',
-        'puesto',
-    )
+    list_filter = ('status', DepartamentoFilter)
+    list_select_related = ('user',)
+    search_fields = ('user__cedula', 'user__nombre_completo')  # See PrefixSearchMixin
+    user_path = 'user__'
     ordering = ('-fetched_at',)
 
+    def get_queryset(self, request):
+        # Debug HTML, only needed on the detail page (loaded there on access)
+        return super().get_queryset(request).defer('raw_response')
+
     def get_readonly_fields(self, request, obj=None):
         """Make all fields read-only."""
         return [f.name for f in self.model._meta.fields]
@@ -44,14 +173,18 @@ class CedulaInfoAdmin(admin.ModelAdmin):
         return False
 
 
-class CustomUserAdmin(UserAdmin):
+class CustomUserAdmin(PrefixSearchMixin, UserAdmin):
     # Display custom fields in admin list view
     list_display = UserAdmin.list_display + (
         'cedula', 'phone', 'referral_code', 'referred_by', 'referral_goal', 'role'
     )
+    list_select_related = ('referred_by',)
+    search_fields = ('cedula', 'nombre_completo', 'username')  # See PrefixSearchMixin
 
     # Make referral_code read-only (auto-generated)
     readonly_fields = ('referral_code',)
+    # An id input with a lookup popup instead of a <select> of every user
+    raw_id_fields = ('referred_by',)
 
     # Add custom fields to admin detail view
     fieldsets = UserAdmin.fieldsets + (
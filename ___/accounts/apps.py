@@ -26,3 +26,9 @@ class AccountsConfig(AppConfig):
 
         # Import signals to register handlers
         from . import signals  # noqa: F401
+        # SQLite pragmas (WAL, busy timeout, profile) for new connections
+        from . import sqlite  # noqa: F401
+        # SQL timer for ServerTimingMiddleware (when SERVER_TIMING is on)
+        from . import timing  # noqa: F401
+        # Task wait/duration metrics (django-q pre_execute, Task post_save)
+        from . import metrics  # noqa: F401
@@ -0,0 +1,185 @@
+"""
+Static asset pipeline: minified, content-hashed, precompressed files served
+by the app process.
+
+Build step (run on every deploy):
+
+    python manage.py collectstatic --noinput
+
+AssetStorage (settings.STORAGES['staticfiles']) then:
+
+1. minifies the project's own CSS/JS (static/css, static/js) as it copies
+   them to STATIC_ROOT
+2. writes a content-hashed copy of every file plus staticfiles.json
+   (ManifestStaticFilesStorage), which {% static %} uses for its URLs
+3. writes .gz (and .br when the brotli package is installed) next to each
+   hashed text file
+
+serve() answers /static/ requests from STATIC_ROOT (see
+middleware.StaticAssetMiddleware, off under DEBUG): the precompressed
+variant the browser accepts, and a one-year immutable Cache-Control for
+hashed names, since a changed file gets a new name.
+
+With DEBUG off, {% static %} raises ValueError for a file missing from the
+manifest (collectstatic not run, or run before the file was added); under
+DEBUG, and in tests, URLs are unhashed and need no manifest.
+"""
+import gzip
+import logging
+import mimetypes
+import re
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.base import ContentFile
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+try:
+    import brotli
+except ImportError:  # Optional: gzip only
+    brotli = None
+
+
+logger = logging.getLogger('django-q')
+
+# Own assets (STATICFILES_DIRS); third-party files (admin) are left as shipped
+MINIFY_PREFIXES = ('css/', 'js/')
+COMPRESS_EXTENSIONS = {'.css', '.js', '.svg', '.json', '.map', '.txt', '.html', '.xml'}
+COMPRESS_MIN_SIZE = 256  # Bytes; smaller files gain nothing
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+MUTABLE_MAX_AGE = 300  # Unhashed names (files not referenced via {% static %})
+
+# ManifestStaticFilesStorage names: name.<12 hex chars>.ext
+HASHED_NAME = re.compile(r'\.[0-9a-f]{12}\.[^/.]+$')
+
+# Precompressed variants, preferred first: (suffix, Content-Encoding)
+ENCODINGS = (('.br', 'br'), ('.gz', 'gzip'))
+
+
+def minify_css(text):
+    """Drop comments, indentation and blank lines."""
+    text = re.sub(r'/\*.*?\*/', '', text, flags=re.S)
+    return '\n'.join(line.strip() for line in text.splitlines() if line.strip()) + '\n'
+
+
+def minify_js(text):
+    """
+    Drop indentation, blank lines and whole-line // comments.
+
+    Deliberately conservative: line breaks stay (automatic semicolon
+    insertion) and nothing inside a line is touched.
+    """
+    lines = (line.strip() for line in text.splitlines())
+    return '\n'.join(line for line in lines if line and not line.startswith('//')) + '\n'
+
+
+MINIFIERS = {'.css': minify_css, '.js': minify_js}
+
+
+def _minifier(name):
+    path = Path(name)
+    if not name.startswith(MINIFY_PREFIXES) or '.min.' in path.name:
+        return None
+    return MINIFIERS.get(path.suffix)
+
+
+def precompress(path):
+    """
+    Write path.gz (and path.br) next to a static file, when worth it.
+
+    Returns:
+        list of the written paths
+    """
+    path = Path(path)
+    data = path.read_bytes()
+    if len(data) < COMPRESS_MIN_SIZE:
+        return []
+    variants = [('.gz', gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variants.append(('.br', brotli.compress(data, quality=11)))
+    written = []
+    for suffix, compressed in variants:
+        if len(compressed) < len(data) * 0.95:
+            target = path.with_name(path.name + suffix)
+            target.write_bytes(compressed)
+            written.append(target)
+    return written
+
+
+class AssetStorage(ManifestStaticFilesStorage):
+    """ManifestStaticFilesStorage that also minifies and precompresses."""
+
+    def _save(self, name, content):
+        minify = _minifier(name)
+        if minify is not None:
+            content.seek(0)
+            text = content.read()
+            if isinstance(text, bytes):
+                text = text.decode('utf-8')
+            content = ContentFile(minify(text).encode('utf-8'))
+        return super()._save(name, content)
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        compressed = 0
+        for hashed_name in set(self.hashed_files.values()):
+            if Path(hashed_name).suffix in COMPRESS_EXTENSIONS and self.exists(hashed_name):
+                compressed += len(precompress(self.path(hashed_name)))
+        logger.info("Precompressed %d static files (%s)", compressed,
+                    'gzip, brotli' if brotli is not None else 'gzip')
+
+
+def serve(request, path):
+    """
+    Answer a static file request from STATIC_ROOT.
+
+    Args:
+        request: HttpRequest (GET or HEAD)
+        path: path below STATIC_URL
+
+    Returns:
+        FileResponse or 304, or None when the file isn't in STATIC_ROOT
+    """
+    if not settings.STATIC_ROOT:
+        return None
+    try:
+        fullpath = Path(safe_join(settings.STATIC_ROOT, path))
+    except SuspiciousFileOperation:
+        return None
+    if not fullpath.is_file():
+        return None
+
+    content_type, encoding = mimetypes.guess_type(fullpath.name)
+    if encoding:
+        # Requested a .gz/.br file itself: serve it as is
+        content_type = 'application/octet-stream'
+    accepted = request.headers.get('Accept-Encoding', '')
+    served, content_encoding = fullpath, None
+    for suffix, name in ENCODINGS:
+        variant = fullpath.with_name(fullpath.name + suffix)
+        if re.search(rf'\b{name}\b', accepted) and variant.is_file():
+            served, content_encoding = variant, name
+            break
+
+    mtime = served.stat().st_mtime
+    if not was_modified_since(request.headers.get('If-Modified-Since'), mtime):
+        response = HttpResponseNotModified()
+    else:
+        response = FileResponse(served.open('rb'), content_type=content_type or 'application/octet-stream')
+        response['Last-Modified'] = http_date(mtime)
+        if content_encoding:
+            response['Content-Encoding'] = content_encoding
+    patch_vary_headers(response, ('Accept-Encoding',))
+    if HASHED_NAME.search(fullpath.name):
+        patch_cache_control(response, public=True, max_age=IMMUTABLE_MAX_AGE, immutable=True)
+    else:
+        patch_cache_control(response, public=True, max_age=MUTABLE_MAX_AGE)
+    return response
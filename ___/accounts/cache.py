@@ -0,0 +1,83 @@
+"""
+Cache backends with hit/miss instrumentation.
+
+Counters are per process (like LocMemCache itself). The hit rate is logged
+every LOG_EVERY lookups and available from stats() for reporting.
+
+Configure in settings.CACHES, e.g.:
+    'template_fragments': {
+        'BACKEND': 'accounts.cache.CountingLocMemCache',
+        'LOCATION': 'template-fragments',
+    }
+
+Use CountingFileBasedCache for entries that are invalidated by deleting
+keys: the files are shared by all processes (web server and qcluster
+worker), so a delete in one process is seen by the others.
+"""
+import logging
+import threading
+
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.cache.backends.locmem import LocMemCache
+
+
+logger = logging.getLogger('django-q')
+
+LOG_EVERY = 1000  # Log hit rate every N lookups
+
+
+class CountingCacheMixin:
+    """Count get() hits and misses on any Django cache backend."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+
+    def get(self, key, default=None, version=None):
+        # Sentinel distinguishes a cached None from a miss
+        sentinel = object()
+        value = super().get(key, sentinel, version=version)
+        self._record(value is not sentinel)
+        return default if value is sentinel else value
+
+    def _record(self, hit):
+        with self._stats_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+            lookups = self.hits + self.misses
+        if lookups % LOG_EVERY == 0:
+            stats = self.stats()
+            logger.info("Cache %s: hit rate %.1f%% (%d hits, %d misses)",
+                        getattr(self, '_cache_name', type(self).__name__),
+                        stats['hit_rate'] * 100, stats['hits'], stats['misses'])
+
+    def stats(self):
+        """Return hits, misses and hit_rate (0.0-1.0) for this process."""
+        with self._stats_lock:
+            hits, misses = self.hits, self.misses
+        lookups = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hits / lookups if lookups else 0.0,
+        }
+
+
+class CountingLocMemCache(CountingCacheMixin, LocMemCache):
+    """LocMemCache that records hit/miss counters."""
+
+    def __init__(self, name, params):
+        super().__init__(name, params)
+        self._cache_name = name
+
+
+class CountingFileBasedCache(CountingCacheMixin, FileBasedCache):
+    """FileBasedCache that records hit/miss counters."""
+
+    def __init__(self, dir, params):
+        super().__init__(dir, params)
+        self._cache_name = str(dir)
@@ -7,22 +7,23 @@ def leader_or_self_required(view_func):
     Decorator that allows access if:
     - user_id is None (viewing own data)
     - user_id matches request.user.id (viewing own data)
-    - request.user is LEADER and target user was referred by them
+    - request.user is LEADER and target user is in their downline
+      (direct or indirect referral, see accounts/downline.py)
 
     Returns 403 Forbidden for unauthorized access attempts.
     """
     @wraps(view_func)
     def _wrapped_view(request, user_id=None, *args, **kwargs):
+        from .downline import is_in_downline
         from .models import CustomUser
 
         # Self-access always allowed
         if user_id is None or user_id == request.user.id:
             return view_func(request, user_id, *args, **kwargs)
 
-        # Leader accessing referral
+        # Leader accessing a referral anywhere in their network
         if request.user.role == CustomUser.Role.LEADER:
-            target_user = CustomUser.objects.filter(id=user_id).first()
-            if target_user and target_user.referred_by_id == request.user.id:
+            if is_in_downline(request.user.id, user_id):
                 return view_func(request, user_id, *args, **kwargs)
 
         return HttpResponseForbidden("No tienes permiso para esta accion.")
@@ -0,0 +1,200 @@
+"""
+Multi-level referral network (downline) queries on the ReferralPath closure table.
+
+referred_by only links a user to their direct referrer. ReferralPath stores
+every (ancestor, descendant, depth) pair of the tree, so a leader's whole
+network is one indexed range scan:
+
+- downline_count(): descendants of a user, optionally up to a depth
+- downline(): depth-limited subtree listing (CustomUser queryset)
+- is_in_downline(): permission checks for multi-level leaders
+- level_summary(): per-level census status aggregates
+
+Write helpers (add_user, move_subtree, detach_subtree) are called from the
+referral tree signal handlers and touch only the rows of the affected subtree.
+"""
+import logging
+
+from django.db import transaction
+from django.db.models import Count, F, Q
+
+from .models import CedulaInfo, CustomUser, ReferralPath
+from .referrals import PENDING_STATUSES
+
+
+logger = logging.getLogger('django-q')
+
+BATCH_SIZE = 1000
+
+# Retriable failures (a refresh may still verify them)
+ERROR_STATUSES = [
+    CedulaInfo.Status.ERROR,
+    CedulaInfo.Status.TIMEOUT,
+    CedulaInfo.Status.BLOCKED,
+]
+
+
+def iter_paths(parents):
+    """
+    Yield every (ancestor_id, descendant_id, depth) of a tree.
+
+    Args:
+        parents: dict of user_id -> referred_by_id (None for roots)
+
+    Walks up from each user; a referral cycle (only possible through bad
+    data) stops the walk instead of looping forever.
+    """
+    for user_id in parents:
+        yield user_id, user_id, 0
+        seen = {user_id}
+        ancestor_id = parents.get(user_id)
+        depth = 1
+        while ancestor_id is not None and ancestor_id not in seen:
+            yield ancestor_id, user_id, depth
+            seen.add(ancestor_id)
+            ancestor_id = parents.get(ancestor_id)
+            depth += 1
+
+
+def rebuild_paths():
+    """
+    Recreate the whole closure table from referred_by.
+
+    Returns:
+        Number of ReferralPath rows written
+    """
+    parents = dict(CustomUser.objects.values_list('id', 'referred_by_id'))
+    with transaction.atomic():
+        ReferralPath.objects.all().delete()
+        paths = ReferralPath.objects.bulk_create(
+            (ReferralPath(ancestor_id=a, descendant_id=d, depth=depth)
+             for a, d, depth in iter_paths(parents)),
+            batch_size=BATCH_SIZE,
+        )
+    return len(paths)
+
+
+def add_user(user_id, parent_id):
+    """Insert the paths of a newly registered user (self row plus upline)."""
+    paths = [ReferralPath(ancestor_id=user_id, descendant_id=user_id, depth=0)]
+    if parent_id is not None:
+        upline = ReferralPath.objects.filter(descendant_id=parent_id).values_list('ancestor_id', 'depth')
+        paths.extend(
+            ReferralPath(ancestor_id=ancestor_id, descendant_id=user_id, depth=depth + 1)
+            for ancestor_id, depth in upline
+        )
+    ReferralPath.objects.bulk_create(paths, ignore_conflicts=True)
+
+
+def detach_subtree(user_id, include_self=False):
+    """
+    Cut the subtree rooted at user_id from its upline.
+
+    Deletes the paths from the user's ancestors to every member of the
+    subtree; paths inside the subtree are kept.
+
+    Args:
+        user_id: Root of the subtree
+        include_self: Also cut the user's own paths to their subtree (used when
+            the user is deleted and their referrals become roots)
+    """
+    upline = ReferralPath.objects.filter(descendant_id=user_id)
+    if not include_self:
+        upline = upline.filter(depth__gt=0)
+    subtree = ReferralPath.objects.filter(ancestor_id=user_id)
+
+    ReferralPath.objects.filter(
+        ancestor_id__in=upline.values('ancestor_id'),
+        descendant_id__in=subtree.values('descendant_id'),
+    ).delete()
+
+
+def move_subtree(user_id, new_parent_id):
+    """
+    Re-link the subtree rooted at user_id under new_parent_id.
+
+    Raises:
+        ValueError: if new_parent_id is inside the subtree (would create a cycle)
+    """
+    subtree = list(
+        ReferralPath.objects.filter(ancestor_id=user_id).values_list('descendant_id', 'depth')
+    )
+    if new_parent_id is not None and new_parent_id in {d for d, _ in subtree}:
+        raise ValueError(f"User {new_parent_id} is in the downline of user {user_id}")
+
+    with transaction.atomic():
+        detach_subtree(user_id)
+        if new_parent_id is None:
+            return
+        upline = ReferralPath.objects.filter(descendant_id=new_parent_id).values_list('ancestor_id', 'depth')
+        ReferralPath.objects.bulk_create(
+            (ReferralPath(ancestor_id=ancestor_id, descendant_id=descendant_id,
+                          depth=up_depth + down_depth + 1)
+             for ancestor_id, up_depth in upline
+             for descendant_id, down_depth in subtree),
+            batch_size=BATCH_SIZE,
+        )
+    logger.info("Moved downline of user %s (%d users) under %s",
+                user_id, len(subtree), new_parent_id)
+
+
+def _downline_paths(user_id, max_depth=None):
+    paths = ReferralPath.objects.filter(ancestor_id=user_id, depth__gt=0)
+    if max_depth is not None:
+        paths = paths.filter(depth__lte=max_depth)
+    return paths
+
+
+def downline_count(user_id, max_depth=None):
+    """Number of users in the downline of user_id (single COUNT on the index)."""
+    return _downline_paths(user_id, max_depth).count()
+
+
+def is_in_downline(ancestor_id, user_id):
+    """Return True if user_id is a direct or indirect referral of ancestor_id."""
+    return _downline_paths(ancestor_id).filter(descendant_id=user_id).exists()
+
+
+def downline(user_id, max_depth=None):
+    """
+    CustomUser queryset of the downline, annotated with its depth.
+
+    Args:
+        user_id: Network root
+        max_depth: Only include levels 1..max_depth (None = whole network)
+
+    Returns:
+        Queryset ordered by depth, then registration date
+    """
+    filters = {'upline_paths__ancestor_id': user_id, 'upline_paths__depth__gt': 0}
+    if max_depth is not None:
+        filters['upline_paths__depth__lte'] = max_depth
+    return (
+        CustomUser.objects.filter(**filters)
+        .annotate(depth=F('upline_paths__depth'))
+        .order_by('depth', 'date_joined', 'id')
+    )
+
+
+def level_summary(user_id, max_depth=None):
+    """
+    Census status counts per network level in one GROUP BY query.
+
+    Returns:
+        List of dicts with depth, total, verified, pending and errors keys,
+        ordered by depth. Referrals without CedulaInfo count as pending.
+    """
+    status = 'effective_status'  # Re-verifications count as their previous status
+    return list(
+        _downline_paths(user_id, max_depth)
+        .alias(effective_status=CedulaInfo.effective_status_expression('descendant__cedula_info__'))
+        .values('depth')
+        .annotate(
+            total=Count('id'),
+            verified=Count('id', filter=Q(**{status: CedulaInfo.Status.ACTIVE})),
+            pending=Count('id', filter=Q(**{f'{status}__in': PENDING_STATUSES})
+                          | Q(**{f'{status}__isnull': True})),
+            errors=Count('id', filter=Q(**{f'{status}__in': ERROR_STATUSES})),
+        )
+        .order_by('depth')
+    )
@@ -0,0 +1,167 @@
+"""
+Server-Sent Events push for census status changes.
+
+Status transitions (from the web process or the qcluster worker) are
+appended to the CensusEvent table by a cedula_status_changed receiver.
+Each open page keeps one /eventos/ connection that tails the table with an
+indexed query and pushes rendered HTML:
+
+- event "census": the viewer's own census section (profile page)
+- event "row": a referral row for the viewer as leader (referidos page)
+
+SQLite is the notification channel because it is already shared by all
+processes. Streams end after STREAM_MAX_SECONDS and the browser reconnects
+with Last-Event-ID, so no event is lost between connections. Pages keep
+HTMX polling as a fallback while the stream is down.
+
+Off unless settings.CENSUS_EVENTS is set: it requires an ASGI server (see
+___/asgi.py), since under WSGI the stream is buffered and holds a worker
+thread for its whole lifetime. While off, no events are recorded, pages
+don't load the client script and /eventos/ answers 204 (EventSource stops
+reconnecting).
+"""
+import asyncio
+import logging
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.db.models import Q
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from .models import CedulaInfo, CensusEvent, CustomUser
+
+
+logger = logging.getLogger('django-q')
+
+POLL_INTERVAL = 1.0  # Seconds between event table checks per stream
+KEEPALIVE_SECONDS = 15  # Comment line to keep proxies from closing idle streams
+STREAM_MAX_SECONDS = 300  # Browser reconnects automatically afterwards
+RECONNECT_MS = 3000  # EventSource retry delay
+EVENT_RETENTION = timedelta(minutes=10)
+PRUNE_EVERY = 100  # Prune old events every N inserted events
+BATCH_SIZE = 50
+
+
+def record_census_events(transitions):
+    """
+    Append one CensusEvent per real status change.
+
+    Args:
+        transitions: list of (user_id, old_status, new_status) tuples
+    """
+    changed = {user_id: new for user_id, old, new in transitions if old != new}
+    if not changed:
+        return
+
+    leaders = dict(
+        CustomUser.objects.filter(id__in=changed).values_list('id', 'referred_by_id')
+    )
+    events = CensusEvent.objects.bulk_create([
+        CensusEvent(user_id=user_id, leader_id=leaders.get(user_id), status=status)
+        for user_id, status in changed.items()
+    ])
+
+    last_id = events[-1].pk if events and events[-1].pk else 0
+    if last_id and last_id % PRUNE_EVERY < len(events):
+        prune_census_events()
+
+
+def prune_census_events():
+    """Delete events older than EVENT_RETENTION."""
+    deleted, _ = CensusEvent.objects.filter(
+        created_at__lt=timezone.now() - EVENT_RETENTION
+    ).delete()
+    if deleted:
+        logger.debug("Pruned %d census events", deleted)
+
+
+def latest_event_id():
+    """Return the newest event id (stream starting point for new connections)."""
+    return CensusEvent.objects.order_by('-id').values_list('id', flat=True).first() or 0
+
+
+def format_sse(event_id, event, data):
+    """Format one SSE message; every data line needs its own prefix.
+
+    Blank lines would end the message early, so they are dropped.
+    """
+    lines = [f'id: {event_id}', f'event: {event}']
+    lines.extend(f'data: {line}' for line in data.splitlines() if line.strip())
+    return '\n'.join(lines) + '\n\n'
+
+
+def _render_event(request, event):
+    """
+    Render the HTML pushed for one event, or None if the viewer can't see it.
+
+    Runs in a thread (template rendering and related lookups are sync).
+    """
+    viewer = request.user
+    if event.user_id == viewer.pk:
+        cedula_info = CedulaInfo.objects.filter(user_id=viewer.pk).first()
+        html = render_to_string('partials/_census_section.html', {
+            'cedula_info': cedula_info,
+            'is_polling': bool(cedula_info) and cedula_info.status in [
+                CedulaInfo.Status.PENDING,
+                CedulaInfo.Status.PROCESSING,
+            ],
+            'user': viewer,
+            'is_leader': viewer.role == CustomUser.Role.LEADER,
+            'show_refresh': True,
+        }, request=request)
+        return 'census', html
+
+    if event.leader_id == viewer.pk:
+        referral = (
+            CustomUser.objects.select_related('cedula_info')
+            .filter(pk=event.user_id, referred_by=viewer).first()
+        )
+        if referral is None:
+            return None
+        html = render_to_string('partials/_referral_row.html', {
+            'referral': referral,
+            'is_leader': viewer.role == CustomUser.Role.LEADER,
+        }, request=request)
+        return 'row', html
+
+    return None
+
+
+async def census_event_stream(request, last_event_id):
+    """
+    Yield SSE messages for status changes visible to request.user.
+
+    Args:
+        request: HttpRequest with an already-resolved authenticated user
+        last_event_id: Resume after this CensusEvent id
+    """
+    user_id = request.user.pk
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + STREAM_MAX_SECONDS
+    last_sent = loop.time()
+
+    yield f'retry: {RECONNECT_MS}\n\n'
+
+    while loop.time() < deadline:
+        events = [
+            event async for event in CensusEvent.objects.filter(
+                Q(user_id=user_id) | Q(leader_id=user_id),
+                id__gt=last_event_id,
+            ).order_by('id')[:BATCH_SIZE]
+        ]
+
+        for event in events:
+            last_event_id = event.pk
+            rendered = await sync_to_async(_render_event)(request, event)
+            if rendered:
+                name, html = rendered
+                last_sent = loop.time()
+                yield format_sse(event.pk, name, html)
+
+        if loop.time() - last_sent >= KEEPALIVE_SECONDS:
+            last_sent = loop.time()
+            yield ': keepalive\n\n'
+
+        if len(events) < BATCH_SIZE:
+            await asyncio.sleep(POLL_INTERVAL)
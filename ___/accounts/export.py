@@ -0,0 +1,212 @@
+"""
+Streaming export of a user's referrals with their census data.
+
+Rows are read with .iterator() in chunks of CHUNK_SIZE (only the exported
+columns are loaded) and encoded on the fly, so memory use stays flat no
+matter how many referrals are exported:
+
+- CSV: csv.writer over a pseudo-buffer, UTF-8 with BOM so Excel keeps accents
+- XLSX: a minimal SpreadsheetML workbook (inline strings, one sheet) written
+  through zipfile to a non-seekable buffer that is drained after each chunk
+
+Both formats use the same COLUMNS and the referidos page filters.
+
+The encoders are sync generators, which only stream under WSGI: Django's
+ASGI handler consumes a sync iterator whole before sending anything. Under
+ASGI the view wraps them with async_stream(), which pulls CHUNK_SIZE pieces
+per sync_to_async() call (the database cursor stays on the same thread).
+"""
+import csv
+import itertools
+import re
+import zipfile
+from xml.sax.saxutils import escape
+
+from asgiref.sync import sync_to_async
+from django.utils import timezone
+
+
+CHUNK_SIZE = 2000
+
+# (header, value getter) per exported column
+COLUMNS = [
+    ('Nombre', lambda u, c: u.nombre_completo),
+    ('Cedula', lambda u, c: u.cedula),
+    ('Telefono', lambda u, c: u.phone),
+    ('Fecha de registro', lambda u, c: timezone.localtime(u.date_joined).strftime('%d/%m/%Y %H:%M')),
+    ('Estado', lambda u, c: c.get_status_display() if c else 'Sin verificar'),
+    ('Departamento', lambda u, c: c.departamento if c else ''),
+    ('Municipio', lambda u, c: c.municipio if c else ''),
+    ('Puesto', lambda u, c: c.puesto if c else ''),
+    ('Mesa', lambda u, c: c.mesa if c else ''),
+]
+
+# Columns loaded from the database (everything else is deferred).
+# referred_by is read by the related manager for every row, so it must be
+# loaded to avoid one query per row.
+ONLY_FIELDS = [
+    'id', 'nombre_completo', 'cedula', 'phone', 'date_joined', 'referred_by',
+    'cedula_info__id', 'cedula_info__status', 'cedula_info__departamento',
+    'cedula_info__municipio', 'cedula_info__puesto', 'cedula_info__mesa',
+]
+
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+
+def export_rows(queryset):
+    """
+    Yield one list of cell values per referral.
+
+    Args:
+        queryset: CustomUser queryset, already filtered and ordered
+    """
+    queryset = queryset.select_related('cedula_info').only(*ONLY_FIELDS)
+    for user in queryset.iterator(chunk_size=CHUNK_SIZE):
+        cedula_info = getattr(user, 'cedula_info', None)
+        yield [getter(user, cedula_info) for _, getter in COLUMNS]
+
+
+class _Echo:
+    """Pseudo-buffer for csv.writer: write() returns the line instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+# Cells spreadsheet apps would evaluate as formulas (numbers like +57... are fine)
+_FORMULA = re.compile(r'^(?:[=@\t\r]|[+-](?![\d\s]*$))')
+
+
+def _csv_safe(value):
+    """Prefix formula-like text with a quote so Excel shows it literally."""
+    value = str(value or '')
+    return "'" + value if _FORMULA.match(value) else value
+
+
+def stream_csv(rows):
+    """Yield CSV text for a header line plus rows."""
+    writer = csv.writer(_Echo())
+    yield '\ufeff' + writer.writerow([header for header, _ in COLUMNS])
+    for row in rows:
+        yield writer.writerow([_csv_safe(value) for value in row])
+
+
+class _StreamBuffer:
+    """Write-only, non-seekable buffer; zipfile falls back to data descriptors."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+# Characters not allowed in XML 1.0 (control chars other than tab/newline/CR)
+_INVALID_XML = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+_XLSX_PARTS = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    'xl/workbook.xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Referidos" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    ),
+    'xl/_rels/workbook.xml.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        'Target="worksheets/sheet1.xml"/>'
+        '</Relationships>'
+    ),
+}
+
+
+def _xlsx_row(values):
+    cells = ''.join(
+        '<c t="inlineStr"><is><t xml:space="preserve">%s</t></is></c>'
+        % escape(_INVALID_XML.sub('', str(value or '')))
+        for value in values
+    )
+    return f'<row>{cells}</row>'
+
+
+def stream_xlsx(rows):
+    """Yield the bytes of a single-sheet XLSX workbook for a header plus rows."""
+    buffer = _StreamBuffer()
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, content in _XLSX_PARTS.items():
+            archive.writestr(name, content)
+        yield buffer.drain()
+
+        with archive.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+            sheet.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                b'<sheetData>'
+            )
+            sheet.write(_xlsx_row([header for header, _ in COLUMNS]).encode())
+
+            pending = []
+            for row in rows:
+                pending.append(_xlsx_row(row))
+                if len(pending) >= CHUNK_SIZE:
+                    sheet.write(''.join(pending).encode())
+                    pending = []
+                    yield buffer.drain()
+            sheet.write(''.join(pending).encode())
+            sheet.write(b'</sheetData></worksheet>')
+    yield buffer.drain()
+
+
+async def async_stream(stream):
+    """
+    Async iterator over a sync stream_csv()/stream_xlsx() generator, for
+    StreamingHttpResponse under ASGI.
+
+    Each step joins up to CHUNK_SIZE pieces read in one sync_to_async() call.
+    The generator is closed when the client goes away, releasing its cursor.
+    """
+    def pull():
+        return list(itertools.islice(stream, CHUNK_SIZE))
+
+    try:
+        while True:
+            pieces = await sync_to_async(pull)()
+            if not pieces:
+                break
+            yield pieces[0][:0].join(pieces)  # str for CSV, bytes for XLSX
+    finally:
+        await sync_to_async(stream.close)()
@@ -2,7 +2,7 @@ import re
 from django import forms
 from django.contrib.auth.forms import UserCreationForm, AuthenticationForm, PasswordChangeForm
 from django.core.exceptions import ValidationError
-from .models import CustomUser
+from .models import CustomUser, validate_cedula
 
 
 class ProfileForm(forms.ModelForm):
@@ -182,3 +182,18 @@ class CustomPasswordChangeForm(PasswordChangeForm):
             'placeholder': 'Confirmar nueva contrasena'
         })
         self.fields['new_password2'].label = 'Confirmar Nueva Contrasena'
+
+
+class ReferralImportForm(forms.Form):
+    """Validates one row of a bulk referral import (see importer.py).
+
+    Uniqueness of the cedula is checked per chunk by the importer, not here.
+    """
+
+    cedula = forms.CharField(max_length=10, validators=[validate_cedula])
+    nombre_completo = forms.CharField(max_length=200)
+    phone = forms.CharField(max_length=20)
+
+    # Same rules as the profile form
+    clean_nombre_completo = ProfileForm.clean_nombre_completo
+    clean_phone = ProfileForm.clean_phone
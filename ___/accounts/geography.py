@@ -0,0 +1,78 @@
+"""
+Voting location aggregates for a leader's network.
+
+Counts verified referrals (CedulaInfo ACTIVE) in the leader's whole downline
+grouped by one location level at a time, drilling down
+departamento -> municipio -> puesto -> mesa.
+
+Each level is one GROUP BY query: the leader's ReferralPath rows are read
+from the (ancestor, depth) index and joined to CedulaInfo through
+cedula_user_location_idx, which holds user, status and every location
+column, so the census table itself is never read.
+"""
+from django.db.models import Count
+
+from .models import CedulaInfo, ReferralPath
+
+
+LEVELS = ['departamento', 'municipio', 'puesto', 'mesa']
+
+LEVEL_LABELS = {
+    'departamento': 'Departamento',
+    'municipio': 'Municipio',
+    'puesto': 'Puesto de votacion',
+    'mesa': 'Mesa',
+}
+
+
+def clean_path(params):
+    """
+    Read the selected location path from request parameters.
+
+    Args:
+        params: QueryDict or dict (request.GET)
+
+    Returns:
+        List of (level, value) pairs, stopping at the first missing level.
+        The deepest level (mesa) can't be selected.
+    """
+    path = []
+    for level in LEVELS[:-1]:
+        value = params.get(level, '').strip()
+        if not value:
+            break
+        path.append((level, value))
+    return path
+
+
+def location_summary(user_id, path=()):
+    """
+    Count verified referrals per location at the level below path.
+
+    Args:
+        user_id: Network root (leader)
+        path: (level, value) pairs already selected, from clean_path()
+
+    Returns:
+        (level, rows) - the grouped level name and a list of dicts with
+        name and total keys, largest first.
+    """
+    level = LEVELS[len(path)]
+    column = f'descendant__cedula_info__{level}'
+    filters = {
+        'ancestor_id': user_id,
+        'depth__gt': 0,
+        'descendant__cedula_info__status': CedulaInfo.Status.ACTIVE,
+    }
+    for selected_level, value in path:
+        filters[f'descendant__cedula_info__{selected_level}'] = value
+
+    rows = (
+        ReferralPath.objects
+        .filter(**filters)
+        .exclude(**{column: ''})
+        .values(column)
+        .annotate(total=Count('id'))
+        .order_by('-total', column)
+    )
+    return level, [{'name': row[column], 'total': row['total']} for row in rows]
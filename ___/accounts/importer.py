@@ -0,0 +1,235 @@
+"""
+Bulk import of referrals a leader has already collected.
+
+Registration creates one user at a time: user.save() fires
+queue_cedula_validation (one CedulaInfo INSERT and one enqueued task) and
+update_referral_tree (counter UPDATE and closure table rows). For a list of
+thousands of people the import does the same work per chunk of CHUNK_SIZE
+rows instead:
+
+- rows are validated with ReferralImportForm
+- cedulas already registered, or repeated in the file, are reported as
+  conflicts and skipped; the rest of the chunk is still imported
+- users, their PENDING CedulaInfo rows and ReferralPath rows are inserted
+  with bulk_create, and the referrer's referral_count gets one UPDATE,
+  all in one transaction per chunk
+- the upline's cached network stats are dropped (stats.py)
+- after the chunk commits, one validate_cedula_batch task validates it;
+  the rows are created in the chunk's ValidationBatch, so they wait in
+  the queue behind earlier chunks without being reset as stale (a batch
+  that stopped running leaves them as ERROR after
+  CedulaInfo.BATCH_TIMEOUT_MINUTES, like a bulk refresh, and they can be
+  retried from the referidos page)
+
+bulk_create() sends no post_save signals, so nothing else runs per user.
+Imported users get an unusable password; they can't log in until a
+password is set for them.
+"""
+import csv
+import logging
+from functools import partial
+
+from django.contrib.auth.hashers import make_password
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django_q.tasks import async_task
+
+from . import stats
+from .downline import BATCH_SIZE
+from .forms import ReferralImportForm
+from .models import CedulaInfo, CustomUser, ReferralPath, ValidationBatch
+
+
+logger = logging.getLogger('django-q')
+
+CHUNK_SIZE = 500
+
+# Accepted CSV header names (lowercased) per form field; includes the
+# headers of the referidos export so an export can be imported elsewhere
+HEADER_ALIASES = {
+    'cedula': 'cedula',
+    'cédula': 'cedula',
+    'nombre': 'nombre_completo',
+    'nombre completo': 'nombre_completo',
+    'nombre_completo': 'nombre_completo',
+    'telefono': 'phone',
+    'teléfono': 'phone',
+    'phone': 'phone',
+}
+
+
+class ImportReport:
+    """Outcome of an import run.
+
+    Attributes:
+        created: Number of users created
+        invalid: List of (line, errors dict) for rows that failed validation
+        conflicts: List of (line, cedula, reason) for skipped duplicates
+        task_ids: Validation tasks queued (one per imported chunk)
+    """
+
+    def __init__(self):
+        self.created = 0
+        self.invalid = []
+        self.conflicts = []
+        self.task_ids = []
+
+
+def read_csv(file):
+    """
+    Yield (line number, row dict) from a CSV file with a header row.
+
+    Args:
+        file: Text file object (open with encoding='utf-8-sig' for Excel files)
+
+    The delimiter (comma or semicolon) is detected from the header. Columns
+    are mapped through HEADER_ALIASES; unknown columns are ignored.
+    """
+    header = file.readline()
+    try:
+        dialect = csv.Sniffer().sniff(header, delimiters=',;')
+    except csv.Error:
+        dialect = csv.excel
+    columns = [
+        HEADER_ALIASES.get(name.strip().lower())
+        for name in next(csv.reader([header], dialect))
+    ]
+    for line, values in enumerate(csv.reader(file, dialect), start=2):
+        if not any(value.strip() for value in values):
+            continue
+        yield line, {
+            column: value.strip()
+            for column, value in zip(columns, values) if column
+        }
+
+
+def import_referrals(rows, referrer, chunk_size=CHUNK_SIZE, dry_run=False):
+    """
+    Import rows as referrals of referrer.
+
+    Args:
+        rows: Iterable of (line, dict with cedula, nombre_completo, phone)
+        referrer: CustomUser the imported users are referred by
+        chunk_size: Rows per transaction and validation task
+        dry_run: Validate and report conflicts without writing anything
+
+    Returns:
+        ImportReport
+    """
+    report = ImportReport()
+    seen = set()
+    # Paths from referrer's upline to each new user (depth + 1); the upline
+    # doesn't change during the import
+    upline = list(
+        ReferralPath.objects.filter(descendant=referrer).values_list('ancestor_id', 'depth')
+    )
+
+    chunk = []
+    for line, data in rows:
+        form = ReferralImportForm(data)
+        if not form.is_valid():
+            report.invalid.append((line, {f: list(e) for f, e in form.errors.items()}))
+            continue
+        cedula = form.cleaned_data['cedula']
+        if cedula in seen:
+            report.conflicts.append((line, cedula, 'Repetida en el archivo'))
+            continue
+        seen.add(cedula)
+        chunk.append((line, form.cleaned_data))
+        if len(chunk) >= chunk_size:
+            _import_chunk(chunk, referrer, upline, report, dry_run)
+            chunk = []
+    if chunk:
+        _import_chunk(chunk, referrer, upline, report, dry_run)
+
+    logger.info("import_referrals: %d created, %d invalid, %d conflicts for referrer %s",
+                report.created, len(report.invalid), len(report.conflicts), referrer.pk)
+    return report
+
+
+def _registered_cedulas(cedulas):
+    """Return the cedulas already used as a cedula or username."""
+    existing = CustomUser.objects.filter(
+        Q(cedula__in=cedulas) | Q(username__in=cedulas)
+    ).values_list('cedula', 'username')
+    return {value for pair in existing for value in pair} & set(cedulas)
+
+
+def _import_chunk(chunk, referrer, upline, report, dry_run):
+    """Insert one chunk, skipping cedulas that are already registered."""
+    # A cedula registered concurrently makes the INSERT fail; the second
+    # attempt sees it as a conflict
+    for attempt in (1, 2):
+        existing = _registered_cedulas([data['cedula'] for _, data in chunk])
+        conflicts = [(line, data['cedula'], 'Ya registrada')
+                     for line, data in chunk if data['cedula'] in existing]
+        rows = [data for _, data in chunk if data['cedula'] not in existing]
+        if dry_run or not rows:
+            break
+        try:
+            with transaction.atomic():
+                batch = _create_users(rows, referrer, upline)
+                transaction.on_commit(partial(_queue_batch, batch.pk, len(rows), report))
+            break
+        except IntegrityError as e:
+            if attempt == 2:
+                logger.error("import_referrals: chunk at line %d failed: %s", chunk[0][0], e)
+                conflicts = [(line, data['cedula'], 'Error al guardar') for line, data in chunk]
+                rows = []
+            else:
+                logger.warning("import_referrals: conflict while saving chunk at line %d, "
+                               "retrying", chunk[0][0])
+
+    report.conflicts.extend(conflicts)
+    report.created += len(rows)
+
+
+def _create_users(rows, referrer, upline):
+    """Bulk insert users, CedulaInfo and ReferralPath rows; return their ValidationBatch."""
+    password = make_password(None)  # Unusable; avoids hashing per row
+    users = CustomUser.objects.bulk_create([
+        CustomUser(
+            username=data['cedula'],
+            cedula=data['cedula'],
+            nombre_completo=data['nombre_completo'],
+            phone=data['phone'],
+            referred_by=referrer,
+            password=password,
+        )
+        for data in rows
+    ])
+    user_ids = [user.pk for user in users]
+
+    batch = ValidationBatch.objects.create()
+    CedulaInfo.objects.bulk_create([
+        CedulaInfo(user_id=user_id, status=CedulaInfo.Status.PENDING, batch=batch)
+        for user_id in user_ids
+    ])
+    paths = []
+    for user_id in user_ids:
+        paths.append(ReferralPath(ancestor_id=user_id, descendant_id=user_id, depth=0))
+        paths.extend(
+            ReferralPath(ancestor_id=ancestor_id, descendant_id=user_id, depth=depth + 1)
+            for ancestor_id, depth in upline
+        )
+    ReferralPath.objects.bulk_create(paths, batch_size=BATCH_SIZE)
+    # New users start PENDING, so only the total changes
+    CustomUser.objects.filter(pk=referrer.pk).update(
+        referral_count=F('referral_count') + len(user_ids)
+    )
+    stats.invalidate([referrer.pk])
+    return batch
+
+
+def _queue_batch(batch_id, count, report):
+    """Queue one validation task for a committed chunk of count users."""
+    try:
+        task_id = async_task(
+            'accounts.tasks.validate_cedula_batch',
+            batch_id,
+            task_name=f'import_referrals_{batch_id}_{count}',
+        )
+        report.task_ids.append(task_id)
+    except Exception as e:
+        logger.error("Failed to queue validate_cedula_batch for %d imported users: %s",
+                     count, e, exc_info=True)
@@ -0,0 +1,88 @@
+"""
+Referral leaderboard read API.
+
+Rankings are read from the denormalized counters on CustomUser
+(referral_count, verified_referral_count), which the signal handlers already
+update incrementally on registration, referrer changes, deletions and
+CedulaInfo status transitions. Each board is served by a composite index
+(primary counter, secondary counter), so:
+
+- top(): walks the index from the highest value and stops after N rows
+- rank(): 1 + number of users strictly ahead, a range count on the same index
+
+Neither query joins accounts_cedulainfo or groups rows. Users tied on both
+counters share a rank. Rebuild the counters with
+`python manage.py rebuild_referral_counts`.
+"""
+from django.db.models import Q
+
+from .models import CustomUser
+
+
+# Board name -> (primary, secondary) ranking columns
+BOARDS = {
+    'verified': ('verified_referral_count', 'referral_count'),
+    'total': ('referral_count', 'verified_referral_count'),
+}
+
+DEFAULT_BOARD = 'verified'
+TOP_SIZE = 20
+
+
+def clean_board(board):
+    """Return board if known, otherwise the default board."""
+    return board if board in BOARDS else DEFAULT_BOARD
+
+
+def top(board=DEFAULT_BOARD, limit=TOP_SIZE):
+    """
+    Return the top users of a board.
+
+    Args:
+        board: Key of BOARDS
+        limit: Number of users
+
+    Returns:
+        List of CustomUser (only name and counters loaded), best first, each
+        with a rank attribute consistent with rank(). Users with nothing on
+        the primary counter are not ranked.
+    """
+    primary, secondary = BOARDS[board]
+    users = list(
+        CustomUser.objects
+        .filter(**{f'{primary}__gt': 0})
+        .order_by(f'-{primary}', f'-{secondary}', 'id')
+        .only('id', 'username', 'nombre_completo', primary, secondary)[:limit]
+    )
+    previous = None
+    for position, user in enumerate(users, start=1):
+        key = (getattr(user, primary), getattr(user, secondary))
+        if key != previous:
+            user.rank = position
+            previous = key
+        else:
+            user.rank = users[position - 2].rank
+    return users
+
+
+def rank(user, board=DEFAULT_BOARD):
+    """
+    Return the 1-based rank of user on a board, or None if unranked.
+
+    Uses the counters already loaded on user (e.g. request.user).
+    """
+    primary, secondary = BOARDS[board]
+    primary_value = getattr(user, primary)
+    if not primary_value:
+        return None
+    ahead = CustomUser.objects.filter(
+        Q(**{f'{primary}__gt': primary_value})
+        | Q(**{primary: primary_value, f'{secondary}__gt': getattr(user, secondary)})
+    ).count()
+    return ahead + 1
+
+
+def participant_count(board=DEFAULT_BOARD):
+    """Number of ranked users on a board."""
+    primary, _ = BOARDS[board]
+    return CustomUser.objects.filter(**{f'{primary}__gt': 0}).count()
@@ -0,0 +1,79 @@
+"""
+Long-poll support for the async HTMX polling views (census section, pending
+referrals, referral row).
+
+The browser revalidates a cached poll response with If-None-Match. When
+that ETag is still current, the request is held open until the ETag
+changes or LONG_POLL_SECONDS pass, and only then answered (fresh render or
+304 Not Modified). While waiting, the ETag inputs are re-read every
+POLL_INTERVAL with the async ORM, so a held request occupies no thread:
+under ASGI (see ___/asgi.py) one process keeps many open pages waiting.
+
+Under WSGI every held request would block a worker thread, so long-polling
+is off unless settings.LONG_POLL_SECONDS is set (then requests are answered
+right away, as before).
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.views import redirect_to_login
+from django.http import HttpResponseNotModified
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags, quote_etag
+
+
+POLL_INTERVAL = 1.0  # Seconds between ETag checks of a held request
+
+
+async def is_authenticated(request):
+    """Resolve request.user in a thread (session + user lookups are sync)."""
+    return await sync_to_async(lambda: request.user.is_authenticated)()
+
+
+def login_redirect(request):
+    """Response for an anonymous request, as login_required would answer."""
+    return redirect_to_login(request.get_full_path())
+
+
+def _etag_matches(request, etag):
+    # Weak comparison: CompressionMiddleware turns the ETag of a gzipped
+    # response into W/"..."
+    etags = [e.removeprefix('W/') for e in parse_etags(request.headers.get('If-None-Match', ''))]
+    return '*' in etags or quote_etag(etag) in etags
+
+
+async def long_poll(request, etag_func, render):
+    """
+    Answer a polling request, holding it while the client's copy is current.
+
+    Args:
+        request: HttpRequest with an already resolved user
+        etag_func: async callable(request, fresh) returning the ETag (unquoted)
+            or None for 404; fresh=True must re-read its inputs from the DB
+        render: sync callable(request) returning the full HttpResponse
+
+    Returns:
+        HttpResponse: 304 while unchanged, otherwise render(request), both
+        with the ETag and private, no-cache headers
+    """
+    etag = await etag_func(request, fresh=False)
+    timeout = getattr(settings, 'LONG_POLL_SECONDS', 0)
+
+    if etag is not None and timeout > 0 and _etag_matches(request, etag):
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while loop.time() < deadline:
+            await asyncio.sleep(min(POLL_INTERVAL, deadline - loop.time()))
+            etag = await etag_func(request, fresh=True)
+            if etag is None or not _etag_matches(request, etag):
+                break
+
+    if etag is not None and _etag_matches(request, etag):
+        response = HttpResponseNotModified()
+    else:
+        response = await sync_to_async(render)(request)
+    if etag is not None and response.status_code in (200, 304):
+        response['ETag'] = quote_etag(etag)
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
@@ -0,0 +1,84 @@
+"""
+Generate a synthetic production-scale dataset for load testing.
+
+Bulk-inserts users in deep referral trees with CedulaInfo rows in mixed
+statuses and their closure table rows (see accounts/synthetic.py), then
+rebuilds the referral counters, promotes users with many referrals to
+leaders and runs ANALYZE.
+
+Use a scratch copy of the database and keep the qcluster stopped while it
+holds synthetic users. Example:
+
+    python manage.py generate_dataset --users 300000 --leaders 30 --seed 1
+    python manage.py loadtest --url http://127.0.0.1:8000 --clients 50
+"""
+import io
+import time
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts import stats, synthetic
+from accounts.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = 'Bulk-create synthetic users, referral trees and census rows for load testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100000,
+                            help='Users to create, leaders included (default 100000)')
+        parser.add_argument('--leaders', type=int, default=20,
+                            help='Root leaders the networks grow from (default 20)')
+        parser.add_argument('--max-depth', type=int, default=10,
+                            help='Deepest referral level below a root (default 10)')
+        parser.add_argument('--start', type=int, default=synthetic.DEFAULT_START,
+                            help=f'First cedula (default {synthetic.DEFAULT_START})')
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help='Users per insert transaction (default 5000)')
+        parser.add_argument('--password', default=synthetic.DEFAULT_PASSWORD,
+                            help=f'Password of every synthetic user (default {synthetic.DEFAULT_PASSWORD})')
+        parser.add_argument('--seed', type=int, help='Random seed for a reproducible dataset')
+
+    def handle(self, *args, **options):
+        users, leaders = options['users'], options['leaders']
+        if users < 1 or not 1 <= leaders <= users:
+            raise CommandError('--users must be positive and --leaders between 1 and --users')
+        if not 1 <= options['max_depth'] <= 100:
+            raise CommandError('--max-depth must be between 1 and 100')
+        first, last = options['start'], options['start'] + users - 1
+        if first < 10 ** 5 or last >= 10 ** 10 or len(str(first)) != len(str(last)):
+            raise CommandError('All cedulas must have the same number of digits (6 to 10); '
+                               'pass another --start')
+        # Same length, so string order is numeric order
+        if CustomUser.objects.filter(cedula__gte=str(first), cedula__lte=str(last)).exists():
+            raise CommandError(f'Cedulas {first}-{last} are already in use; pass another --start')
+
+        started = time.monotonic()
+
+        def progress(created):
+            self.stdout.write(f'  {created}/{users} users ({time.monotonic() - started:.0f}s)')
+
+        self.stdout.write(f'Generating {users} users under {leaders} leaders...')
+        try:
+            result = synthetic.generate(
+                users, leaders=leaders, max_depth=options['max_depth'], start=first,
+                batch_size=options['batch_size'], password=options['password'],
+                seed=options['seed'], progress=progress,
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write('Rebuilding referral counters...')
+        call_command('rebuild_referral_counts', stdout=io.StringIO())
+        promoted = synthetic.promote_leaders()
+        self.stdout.write('Analyzing tables...')
+        synthetic.analyze()
+        stats.clear()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {result['users']} users (cedulas {result['first_cedula']}-"
+            f"{result['last_cedula']}, password {options['password']!r}), "
+            f"{result['paths']} referral paths, {promoted} promoted leaders "
+            f"in {time.monotonic() - started:.0f}s"
+        ))
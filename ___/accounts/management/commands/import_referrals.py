@@ -0,0 +1,64 @@
+"""
+Import a CSV of referrals for a referrer in chunks (see accounts/importer.py).
+
+The CSV needs a header row with cedula, nombre (or nombre_completo) and
+telefono columns, comma or semicolon separated. Invalid rows and cedulas
+that are already registered are listed and skipped; everything else is
+imported and queued for validation, one task per chunk.
+
+Usage:
+    python manage.py import_referrals referidos.csv --referrer 1234567890
+    python manage.py import_referrals referidos.csv --referrer 1234567890 --dry-run
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.importer import CHUNK_SIZE, import_referrals, read_csv
+from accounts.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = 'Bulk import referrals from a CSV file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV file')
+        parser.add_argument('--referrer', required=True,
+                            help='Cedula of the user the referrals belong to')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE,
+                            help=f'Rows per transaction and validation task (default {CHUNK_SIZE})')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Only validate rows and report conflicts')
+
+    def handle(self, *args, **options):
+        try:
+            referrer = CustomUser.objects.get(cedula=options['referrer'])
+        except CustomUser.DoesNotExist:
+            raise CommandError(f"No user with cedula {options['referrer']}")
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be at least 1')
+
+        try:
+            with open(options['path'], encoding='utf-8-sig', newline='') as file:
+                report = import_referrals(
+                    read_csv(file), referrer,
+                    chunk_size=options['chunk_size'], dry_run=options['dry_run'],
+                )
+        except OSError as e:
+            raise CommandError(f"Can't read {options['path']}: {e}")
+
+        for line, errors in report.invalid:
+            details = '; '.join(f"{field}: {' '.join(messages)}" for field, messages in errors.items())
+            self.stderr.write(f'Line {line}: invalid - {details}')
+        for line, cedula, reason in sorted(report.conflicts):
+            self.stderr.write(f'Line {line}: cedula {cedula} skipped - {reason}')
+
+        if options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(
+                f'Dry run: {report.created} rows would be imported, '
+                f'{len(report.invalid)} invalid, {len(report.conflicts)} conflicts'
+            ))
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {report.created} referrals for {referrer.cedula} '
+            f'({len(report.invalid)} invalid, {len(report.conflicts)} conflicts, '
+            f'{len(report.task_ids)} validation tasks queued)'
+        ))
@@ -0,0 +1,322 @@
+"""
+Replay realistic traffic against a running server and report per-endpoint
+throughput and latency.
+
+Each simulated client logs in as a synthetic user (generate_dataset) and
+loops through a session until --duration runs out:
+
+- leaders: login, home, referidos, next page of rows (the load-more
+  cursor URL of the referidos page), --polls polls of the pending rows, a
+  refresh of one referral and a bulk refresh, logout
+- users: login, home, perfil, --polls polls of the census section, a
+  refresh of their own cedula, logout
+
+with a random pause around --think-time between steps, as a person would.
+Refreshes move rows to PROCESSING and queue scraping tasks: keep the
+qcluster stopped (the tasks stay queued), or pass --no-refresh.
+
+Polls send the last ETag as If-None-Match like the browser, so 304s count
+as answered polls. Run it from the deployment whose database the server
+uses, e.g.:
+
+    python manage.py generate_dataset --users 300000
+    uvicorn ___.asgi:application --port 8000
+    python manage.py loadtest --url http://127.0.0.1:8000 --clients 50 --duration 120
+
+Uses only the standard library (asyncio streams, HTTP/1.1 without
+keep-alive), like benchmark_polling.
+"""
+import asyncio
+import gzip
+import html
+import random
+import re
+import statistics
+from collections import Counter, defaultdict
+from http.cookies import SimpleCookie
+from urllib.parse import urlencode, urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+
+from accounts import synthetic
+from accounts.models import CedulaInfo, CustomUser
+
+
+LEADER_SHARE = 0.3  # Share of clients logged in as leaders
+SAMPLE_REFERRALS = 40  # Referrals per leader to poll and refresh
+
+# Infinite scroll sentinel of partials/_referral_rows.html (keyset cursor URL)
+LOAD_MORE = re.compile(r'id="load-more-row"\s+hx-get="([^"]+)"')
+
+
+class EndpointStats:
+    """Latencies, status codes and errors per endpoint label."""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+        self.errors = defaultdict(Counter)
+
+
+class Client:
+    """One simulated browser: cookie jar plus minimal HTTP/1.1 requests."""
+
+    def __init__(self, host, port, timeout, stats):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.stats = stats
+        self.cookies = {}
+        self.etags = {}
+
+    async def request(self, label, method, path, data=None, headers=None):
+        """
+        Send one request, record it under label and return (status, headers,
+        body) or None on a connection error or timeout.
+        """
+        headers = {
+            'Host': f'{self.host}:{self.port}',
+            'Connection': 'close',
+            'Accept-Encoding': 'gzip',
+            **(headers or {}),
+        }
+        if self.cookies:
+            headers['Cookie'] = '; '.join(f'{name}={value}' for name, value in self.cookies.items())
+        body = b''
+        if data is not None:
+            body = urlencode(data, doseq=True).encode()
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+            headers['X-CSRFToken'] = self.cookies.get('csrftoken', '')
+        if body or method == 'POST':
+            headers['Content-Length'] = str(len(body))
+
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        try:
+            status, response_headers, response_body = await asyncio.wait_for(
+                self._send(method, path, headers, body), self.timeout)
+        except (OSError, asyncio.TimeoutError, ValueError, IndexError) as e:
+            self.stats.errors[label][type(e).__name__] += 1
+            return None
+        self.stats.latencies[label].append(loop.time() - started)
+        self.stats.statuses[label][status] += 1
+        for value in response_headers.get('set-cookie', []):
+            cookie = SimpleCookie(value)
+            for name, morsel in cookie.items():
+                self.cookies[name] = morsel.value
+        return status, response_headers, response_body
+
+    async def _send(self, method, path, headers, body):
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            lines = [f'{method} {path} HTTP/1.1'] + [f'{name}: {value}' for name, value in headers.items()]
+            writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body)
+            await writer.drain()
+            status = int((await reader.readline()).split()[1])
+            response_headers = defaultdict(list)
+            while True:
+                line = (await reader.readline()).decode('latin-1').strip()
+                if not line:
+                    break
+                name, _, value = line.partition(':')
+                response_headers[name.strip().lower()].append(value.strip())
+            body = await reader.read()  # Connection: close ends the body
+            if 'chunked' in response_headers.get('transfer-encoding', []):
+                body = _dechunk(body)
+            if 'gzip' in response_headers.get('content-encoding', []):
+                body = gzip.decompress(body)
+            return status, response_headers, body
+        finally:
+            writer.close()
+
+    async def poll(self, label, path):
+        """Conditional GET as the HTMX polling elements send it."""
+        headers = {'HX-Request': 'true'}
+        if path in self.etags:
+            headers['If-None-Match'] = self.etags[path]
+        result = await self.request(label, 'GET', path, headers=headers)
+        if result and result[1].get('etag'):
+            self.etags[path] = result[1]['etag'][0]
+
+
+def _dechunk(body):
+    """Body of a Transfer-Encoding: chunked response."""
+    chunks = []
+    while body:
+        size, _, body = body.partition(b'\r\n')
+        size = int(size.split(b';')[0], 16)
+        if not size:
+            break
+        chunks.append(body[:size])
+        body = body[size + 2:]
+    return b''.join(chunks)
+
+
+class Scenario:
+    """Session script of one simulated person."""
+
+    def __init__(self, account, options, rng):
+        self.account = account
+        self.options = options
+        self.rng = rng
+
+    async def think(self):
+        await asyncio.sleep(self.options['think_time'] * self.rng.uniform(0.5, 1.5))
+
+    async def login(self, client):
+        client.cookies.clear()
+        client.etags.clear()
+        await client.request('login', 'GET', reverse('login'))
+        result = await client.request('login POST', 'POST', reverse('login'), data={
+            'username': self.account['cedula'],
+            'password': self.options['password'],
+            'csrfmiddlewaretoken': client.cookies.get('csrftoken', ''),
+        })
+        return bool(result) and result[0] == 302 and 'sessionid' in client.cookies
+
+    async def run(self, client, stop_at):
+        loop = asyncio.get_running_loop()
+        while loop.time() < stop_at:
+            if not await self.login(client):
+                await self.think()
+                continue
+            await self.think()
+            await client.request('home', 'GET', reverse('home'))
+            await self.think()
+            if self.account['leader']:
+                await self.leader_session(client, stop_at)
+            else:
+                await self.user_session(client, stop_at)
+            await client.request('logout', 'POST', reverse('logout'), data={})
+            await self.think()
+
+    async def user_session(self, client, stop_at):
+        loop = asyncio.get_running_loop()
+        await client.request('perfil', 'GET', reverse('perfil'))
+        for _ in range(self.options['polls']):
+            if loop.time() >= stop_at:
+                return
+            await self.think()
+            await client.poll('census poll', reverse('census_section'))
+        if self.options['refresh']:
+            await client.request('refresh', 'POST', reverse('refresh_cedula'), data={},
+                                 headers={'HX-Request': 'true'})
+
+    async def leader_session(self, client, stop_at):
+        loop = asyncio.get_running_loop()
+        referrals = self.account['referrals']
+        result = await client.request('referidos', 'GET', reverse('referidos'))
+        await self.think()
+        # The keyset page after the first, as infinite scroll requests it
+        match = LOAD_MORE.search(result[2].decode()) if result else None
+        if match:
+            await client.request('referral rows', 'GET', html.unescape(match.group(1)),
+                                 headers={'HX-Request': 'true'})
+        pending = ','.join(str(user_id) for user_id, status in referrals
+                           if status in (CedulaInfo.Status.PENDING, CedulaInfo.Status.PROCESSING))
+        for _ in range(self.options['polls']):
+            if loop.time() >= stop_at:
+                return
+            await self.think()
+            await client.poll('pending poll', reverse('pending_referrals') + '?' + urlencode({'ids': pending}))
+        if self.options['refresh'] and referrals:
+            user_id = self.rng.choice(referrals)[0]
+            await client.request('refresh referral', 'POST', reverse('refresh_cedula_user', args=[user_id]),
+                                 data={}, headers={'HX-Request': 'true'})
+            await self.think()
+            selected = [user_id for user_id, _ in self.rng.sample(referrals, min(10, len(referrals)))]
+            await client.request('bulk refresh', 'POST', reverse('bulk_refresh'),
+                                 data={'ids': selected}, headers={'HX-Request': 'true'})
+
+
+def _accounts(clients, rng):
+    """Pick synthetic leaders and users to log in as, with sample referrals of the leaders."""
+    synthetic_users = CustomUser.objects.filter(email__endswith=f'@{synthetic.SYNTHETIC_DOMAIN}')
+    leaders = list(synthetic_users.filter(role=CustomUser.Role.LEADER, referral_count__gt=0)
+                   .values_list('id', 'cedula'))
+    users = list(synthetic_users.filter(role=CustomUser.Role.USER)
+                 .order_by('id').values_list('id', 'cedula')[:clients * 20])
+    if not leaders or not users:
+        raise CommandError('No synthetic users found; run generate_dataset first')
+
+    accounts = []
+    for n in range(clients):
+        if n < round(clients * LEADER_SHARE):
+            user_id, cedula = rng.choice(leaders)
+            referrals = list(
+                CedulaInfo.objects.filter(user__referred_by_id=user_id)
+                .values_list('user_id', 'status')[:SAMPLE_REFERRALS]
+            )
+            accounts.append({'cedula': cedula, 'leader': True, 'referrals': referrals})
+        else:
+            user_id, cedula = rng.choice(users)
+            accounts.append({'cedula': cedula, 'leader': False, 'referrals': []})
+    return accounts
+
+
+class Command(BaseCommand):
+    help = 'Replay login/home/referidos/polling/refresh traffic against a running server'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', required=True, help='Base URL of the running server, e.g. http://127.0.0.1:8000')
+        parser.add_argument('--clients', type=int, default=20, help='Simultaneous people (default 20)')
+        parser.add_argument('--duration', type=int, default=60, help='Seconds (default 60)')
+        parser.add_argument('--think-time', type=float, default=2.0,
+                            help='Mean pause between steps in seconds (default 2)')
+        parser.add_argument('--polls', type=int, default=6, help='Polls per page visit (default 6)')
+        parser.add_argument('--timeout', type=float, default=60.0,
+                            help='Seconds before a request counts as failed (default 60)')
+        parser.add_argument('--password', default=synthetic.DEFAULT_PASSWORD,
+                            help='Password of the synthetic users')
+        parser.add_argument('--no-refresh', dest='refresh', action='store_false',
+                            help='Skip refresh and bulk refresh (no rows change, no tasks queued)')
+        parser.add_argument('--seed', type=int, help='Random seed for account choice and pauses')
+
+    def handle(self, *args, **options):
+        url = urlsplit(options['url'])
+        if url.scheme != 'http' or not url.hostname:
+            raise CommandError('--url must be an http:// URL')
+        if options['clients'] < 1:
+            raise CommandError('--clients must be positive')
+
+        rng = random.Random(options['seed'])
+        accounts = _accounts(options['clients'], rng)
+        stats = EndpointStats()
+
+        async def run():
+            loop = asyncio.get_running_loop()
+            stop_at = loop.time() + options['duration']
+            await asyncio.gather(*(
+                Scenario(account, options, random.Random(rng.random())).run(
+                    Client(url.hostname, url.port or 80, options['timeout'], stats), stop_at)
+                for account in accounts
+            ))
+
+        self.stdout.write(f"Load testing {options['url']} with {options['clients']} clients "
+                          f"for {options['duration']}s...")
+        asyncio.run(run())
+        self._report(stats, options['duration'])
+
+    def _report(self, stats, duration):
+        labels = sorted(set(stats.latencies) | set(stats.errors))
+        self.stdout.write(f"{'endpoint':<18}{'requests':>9}{'req/s':>8}{'p50 ms':>9}{'p95 ms':>9}"
+                          f"{'p99 ms':>9}{'max ms':>9}  statuses / errors")
+        all_latencies = []
+        for label in labels:
+            latencies = sorted(stats.latencies[label])
+            all_latencies += latencies
+            count = len(latencies)
+            line = f'{label:<18}{count:>9}{count / duration:>8.1f}'
+            if count:
+                percentile = lambda p: latencies[min(count - 1, int(count * p))] * 1000
+                line += (f'{statistics.median(latencies) * 1000:>9.0f}{percentile(0.95):>9.0f}'
+                         f'{percentile(0.99):>9.0f}{latencies[-1] * 1000:>9.0f}')
+            else:
+                line += f"{'-':>9}{'-':>9}{'-':>9}{'-':>9}"
+            outcomes = [f'{status}: {n}' for status, n in sorted(stats.statuses[label].items())]
+            outcomes += [f'{name}: {n}' for name, n in stats.errors[label].most_common()]
+            self.stdout.write(f"{line}  {', '.join(outcomes)}")
+        answered = len(all_latencies)
+        errors = sum(sum(counter.values()) for counter in stats.errors.values())
+        self.stdout.write(f'Total: {answered} requests ({answered / duration:.1f}/s), {errors} errors')
@@ -0,0 +1,46 @@
+"""
+Rebuild the denormalized referral counters on CustomUser.
+
+Recomputes referral_count and verified_referral_count for every user with
+two set-based UPDATE statements (correlated subqueries), so it runs in
+constant round trips regardless of table size.
+
+Usage:
+    python manage.py rebuild_referral_counts
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from accounts import stats
+from accounts.models import CedulaInfo, CustomUser
+
+
+class Command(BaseCommand):
+    help = 'Recompute referral_count and verified_referral_count for all users'
+
+    def handle(self, *args, **options):
+        def count_referrals(*conditions):
+            subquery = (
+                CustomUser.objects
+                .filter(*conditions, referred_by=OuterRef('pk'))
+                .order_by()
+                .values('referred_by')
+                .annotate(total=Count('id'))
+                .values('total')
+            )
+            return Coalesce(Subquery(subquery, output_field=IntegerField()), Value(0))
+
+        with transaction.atomic():
+            updated = CustomUser.objects.update(
+                referral_count=count_referrals(),
+                # Rows being re-verified from ACTIVE still count (effective_status)
+                verified_referral_count=count_referrals(
+                    Q(cedula_info__status=CedulaInfo.Status.ACTIVE)
+                    | Q(cedula_info__reverify_from=CedulaInfo.Status.ACTIVE)
+                ),
+            )
+
+        stats.clear()  # Counts changed without signals
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt referral counts for {updated} users'))
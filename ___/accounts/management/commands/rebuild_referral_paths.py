@@ -0,0 +1,23 @@
+"""
+Rebuild the ReferralPath closure table from CustomUser.referred_by.
+
+Needed after bulk changes that bypass signals (raw SQL, fixtures loaded
+with loaddata). Reads the parent map once and bulk-inserts all paths in a
+single transaction.
+
+Usage:
+    python manage.py rebuild_referral_paths
+"""
+from django.core.management.base import BaseCommand
+
+from accounts import stats
+from accounts.downline import rebuild_paths
+
+
+class Command(BaseCommand):
+    help = 'Recompute the referral closure table (multi-level downlines)'
+
+    def handle(self, *args, **options):
+        written = rebuild_paths()
+        stats.clear()  # Cached network totals may describe the old tree
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {written} referral paths'))
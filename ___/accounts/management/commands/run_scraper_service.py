@@ -0,0 +1,48 @@
+"""
+Run the scraper service (accounts/scraper_service.py): the process that owns
+the Playwright browser when SCRAPER_SOCKET is set. Run it next to the
+qcluster, under the same user, e.g. as its own systemd unit:
+
+    python manage.py run_scraper_service
+    python manage.py qcluster
+
+Stops cleanly on SIGTERM/SIGINT: queued lookups are answered with a
+retriable error and the browser is closed.
+"""
+import os
+import signal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.scraper_service import ScraperServer
+
+# Playwright's sync API runs an event loop; the service only makes short
+# ORM writes (metrics) from its single scraping thread, as tasks.py does
+os.environ.setdefault('DJANGO_ALLOW_ASYNC_UNSAFE', 'true')
+
+
+class Command(BaseCommand):
+    help = 'Own the scraper browser and answer lookups from tasks over a Unix socket'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--socket', default=settings.SCRAPER_SOCKET,
+                            help='Socket path (default SCRAPER_SOCKET)')
+        parser.add_argument('--queue-size', type=int, default=10,
+                            help='Waiting lookups before new ones are refused (default 10)')
+        parser.add_argument('--recycle', type=int, default=500,
+                            help='Restart the browser after this many lookups, 0 for never (default 500)')
+
+    def handle(self, *args, **options):
+        if not options['socket']:
+            raise CommandError('Set SCRAPER_SOCKET or pass --socket')
+        try:
+            server = ScraperServer(options['socket'], queue_size=options['queue_size'],
+                                   recycle=options['recycle'])
+        except OSError as e:
+            raise CommandError(str(e))
+
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, lambda *_: server.stop())
+        self.stdout.write(f"Scraper service listening on {options['socket']}")
+        server.run()
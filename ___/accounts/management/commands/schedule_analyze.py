@@ -0,0 +1,33 @@
+"""
+Install (or remove) the django-q schedule running tasks.analyze_database
+every hour, so the planner statistics (sqlite_stat1) follow the tables.
+"""
+from django.core.management.base import BaseCommand
+from django_q.models import Schedule
+
+
+SCHEDULE_NAME = 'analyze_database'
+
+
+class Command(BaseCommand):
+    help = 'Schedule an hourly ANALYZE of the SQLite database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--disable', action='store_true', help='Remove the schedule')
+
+    def handle(self, *args, **options):
+        if options['disable']:
+            deleted, _ = Schedule.objects.filter(name=SCHEDULE_NAME).delete()
+            self.stdout.write(self.style.SUCCESS(
+                'ANALYZE disabled' if deleted else 'ANALYZE was not scheduled'))
+            return
+
+        Schedule.objects.update_or_create(
+            name=SCHEDULE_NAME,
+            defaults={
+                'func': 'accounts.tasks.analyze_database',
+                'schedule_type': Schedule.HOURLY,
+                'repeats': -1,
+            },
+        )
+        self.stdout.write(self.style.SUCCESS('ANALYZE scheduled every hour'))
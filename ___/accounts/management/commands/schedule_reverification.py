@@ -0,0 +1,48 @@
+"""
+Install (or remove) the django-q schedule running tasks.reverify_tick every
+REVERIFY_TICK_MINUTES minutes. See accounts/reverify.py for the pacing.
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django_q.models import Schedule
+
+from accounts import reverify
+
+
+SCHEDULE_NAME = 'reverify_cedulas'
+
+
+class Command(BaseCommand):
+    help = 'Schedule periodic re-verification of ACTIVE/NOT_FOUND cedulas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--disable', action='store_true', help='Remove the schedule')
+
+    def handle(self, *args, **options):
+        if options['disable']:
+            deleted, _ = Schedule.objects.filter(name=SCHEDULE_NAME).delete()
+            self.stdout.write(self.style.SUCCESS(
+                'Re-verification disabled' if deleted else 'Re-verification was not scheduled'))
+            return
+
+        Schedule.objects.update_or_create(
+            name=SCHEDULE_NAME,
+            defaults={
+                'func': 'accounts.tasks.reverify_tick',
+                'schedule_type': Schedule.MINUTES,
+                'minutes': settings.REVERIFY_TICK_MINUTES,
+                'repeats': -1,
+            },
+        )
+        due = reverify.due_rows().count()
+        plan = reverify.quota(due)
+        self.stdout.write(self.style.SUCCESS(
+            f"Re-verification every {settings.REVERIFY_TICK_MINUTES} min: {due} rows due, "
+            f"{plan['quota']} per tick (capacity {plan['capacity']} at "
+            f"{plan['scrape_seconds']:.0f}s per scrape)"
+        ))
+        if plan['pace'] > plan['capacity']:
+            self.stdout.write(self.style.WARNING(
+                f"The worker can't re-verify the {due} due rows within "
+                f"{settings.REVERIFY_WINDOW_HOURS}h; they will take longer"
+            ))
@@ -0,0 +1,227 @@
+"""
+Pipeline health metrics in the Prometheus text exposition format.
+
+Served by metrics_view (/metrics/) to staff users, to scrapers sending the
+METRICS_TOKEN bearer token and, when METRICS_ALLOW_LOCALHOST is on, to
+unauthenticated scrapers on the same host. Two kinds of series:
+
+- cumulative counters and histograms recorded by the processes doing the
+  work and stored in MetricCounter rows, so the web process can report what
+  the qcluster worker/monitor did: scrape results, scrape and captcha
+  durations, browser launches/restarts, task wait (enqueue -> start) and
+  total (enqueue -> finish) times, page-ready time and bytes transferred
+  per scrape
+- gauges read when scraped: django-q queue depth and age of the oldest
+  queued task, pending schedules (retries), CedulaInfo status distribution,
+  plus per-process SQLite lock failure and cache counters of the serving
+  process
+
+Recording never raises: a failed write is logged and the work goes on.
+"""
+import logging
+import math
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DatabaseError, transaction
+from django.db.models import Count, F, Q
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from django.utils import timezone
+from django_q.models import OrmQ, Schedule, Task
+from django_q.signals import pre_execute
+
+from . import sqlite
+from .models import CedulaInfo, MetricCounter
+
+
+logger = logging.getLogger('django-q')
+
+PREFIX = 'paginamadre_'
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+COUNTERS = {
+    'scraper_results_total': 'Registraduria scrapes by result status',
+    'scraper_browser_launches_total': 'Chromium launches by the scraper',
+    'scraper_browser_restarts_total': 'Chromium launches replacing a closed browser in the same worker',
+    'tasks_total': 'Finished django-q tasks by function and result',
+}
+
+HISTOGRAMS = {
+    'scraper_duration_seconds': ('Duration of one Registraduria scrape',
+                                 (5, 10, 20, 30, 45, 60, 90, 120)),
+    'scraper_captcha_seconds': ('Time 2captcha took to solve (or fail) a reCAPTCHA',
+                                (5, 10, 15, 20, 30, 45, 60, 90, 120)),
+    'scraper_page_ready_seconds': ('Time from navigation until the Registraduria form is usable',
+                                   (1, 2, 5, 10, 20, 30, 60)),
+    'scraper_transfer_bytes': ('Bytes received over the network by one scrape (cache hits excluded)',
+                               (50_000, 100_000, 250_000, 500_000, 1_000_000, 2_000_000, 5_000_000)),
+    'task_wait_seconds': ('Time from enqueue to a worker starting the task',
+                          (1, 5, 15, 60, 300, 900, 3600)),
+    'task_duration_seconds': ('Time from enqueue to the task finishing',
+                              (1, 5, 15, 60, 300, 900, 3600)),
+}
+
+
+def _labels(labels):
+    return ','.join(f'{key}="{_escape(value)}"' for key, value in sorted(labels.items()))
+
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def _number(value):
+    if value == math.inf:
+        return '+Inf'
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _increment(name, labels_list, amount, all_labels=()):
+    """
+    Add amount to the series name{labels} for each labels_list entry.
+
+    Missing series are created; all_labels names sibling series (the other
+    histogram buckets) to create at 0 alongside, so a histogram is complete
+    from its first observation.
+    """
+    rows = MetricCounter.objects.filter(name=name, labels__in=labels_list)
+    if rows.update(value=F('value') + amount) == len(labels_list):
+        return
+    present = set(rows.values_list('labels', flat=True))
+    MetricCounter.objects.bulk_create(
+        [MetricCounter(name=name, labels=labels, value=amount)
+         for labels in labels_list if labels not in present]
+        + [MetricCounter(name=name, labels=labels, value=0)
+           for labels in all_labels if labels not in present and labels not in labels_list],
+        ignore_conflicts=True,
+    )
+
+
+def increment(name, amount=1, **labels):
+    """Add amount to a COUNTERS series."""
+    try:
+        with transaction.atomic():
+            _increment(name, [_labels(labels)], amount)
+    except DatabaseError as e:
+        logger.warning("metrics: could not record %s: %s", name, e)
+
+
+def observe(name, value, **labels):
+    """Record one observation (seconds, bytes) in a HISTOGRAMS series."""
+    buckets = HISTOGRAMS[name][1] + (math.inf,)
+    bucket_labels = [_labels({**labels, 'le': _number(bound)}) for bound in buckets]
+    hit = [labels for labels, bound in zip(bucket_labels, buckets) if value <= bound]
+    try:
+        with transaction.atomic():
+            _increment(f'{name}_bucket', hit, 1, all_labels=bucket_labels)
+            _increment(f'{name}_count', [_labels(labels)], 1)
+            _increment(f'{name}_sum', [_labels(labels)], value)
+    except DatabaseError as e:
+        logger.warning("metrics: could not record %s: %s", name, e)
+
+
+def _func_name(func):
+    """Short task function name for labels: 'validate_cedula'."""
+    name = func if isinstance(func, str) else getattr(func, '__name__', repr(func))
+    return name.rsplit('.', 1)[-1]
+
+
+@receiver(pre_execute, dispatch_uid='metrics_task_wait')
+def record_task_wait(sender, func, task, **kwargs):
+    """Worker process: time the task spent queued."""
+    enqueued = task.get('started')
+    if enqueued:
+        observe('task_wait_seconds', (timezone.now() - enqueued).total_seconds(),
+                func=_func_name(task.get('func', func)))
+
+
+@receiver(post_save, sender=Task, dispatch_uid='metrics_task_finished')
+def record_task_finished(sender, instance, created, **kwargs):
+    """Monitor process: count a finished task and its enqueue -> finish time."""
+    if not created:
+        return  # Retried task updated in place; counted on its first result
+    func = _func_name(instance.func)
+    increment('tasks_total', func=func, result='success' if instance.success else 'failure')
+    if instance.started and instance.stopped:
+        observe('task_duration_seconds', (instance.stopped - instance.started).total_seconds(),
+                func=func)
+
+
+def _gauges():
+    """Yield (name, help, [(labels, value)]) for the gauges read now."""
+    now = timezone.now()
+    queued = OrmQ.objects.filter(Q(lock__isnull=True) | Q(lock__lte=now))
+    oldest = queued.order_by('id').first()
+    oldest_age = 0
+    if oldest is not None and isinstance(oldest.task.get('started'), datetime):
+        oldest_age = max(0.0, (now - oldest.task['started']).total_seconds())
+    yield 'queue_depth', 'Tasks waiting in the django-q ORM queue', [('', queued.count())]
+    yield ('queue_in_flight', 'Tasks pulled by a worker and not yet acknowledged',
+           [('', OrmQ.objects.filter(lock__gt=now).count())])
+    yield 'queue_oldest_age_seconds', 'Age of the oldest waiting task', [('', oldest_age)]
+    yield ('schedules_pending', 'django-q schedules still to run (cedula retries)',
+           [('', Schedule.objects.filter(schedule_type=Schedule.ONCE).exclude(repeats=0).count())])
+
+    # status IN (...) lets SQLite count from the status index (SEARCH) rather than scan
+    counts = dict(
+        CedulaInfo.objects.filter(status__in=CedulaInfo.Status.values)
+        .values_list('status').annotate(n=Count('pk')).order_by()
+    )
+    yield 'cedula_status', 'CedulaInfo rows by status', [
+        (_labels({'status': status}), counts.get(status, 0)) for status in CedulaInfo.Status.values
+    ]
+
+    failures = sorted(sqlite.lock_failure_stats().items())
+    yield ('sqlite_lock_failures_total', '"database is locked" failures in this process',
+           [(_labels({'alias': alias}), stats['failures']) for alias, stats in failures])
+    yield ('sqlite_lock_failure_seconds_total',
+           'Time spent in statements that failed with "database is locked"',
+           [(_labels({'alias': alias}), stats['seconds']) for alias, stats in failures])
+    cache_series = []
+    for alias in settings.CACHES:
+        stats = getattr(caches[alias], 'stats', None)
+        if stats is not None:
+            for kind in ('hits', 'misses'):
+                cache_series.append((_labels({'cache': alias, 'result': kind}), stats()[kind]))
+    yield 'cache_lookups_total', 'Cache lookups in this process', cache_series
+
+
+def render():
+    """Return the exposition text of all metrics."""
+    lines = []
+
+    def family(name, kind, help_text, series):
+        lines.append(f'# HELP {PREFIX}{name} {help_text}')
+        lines.append(f'# TYPE {PREFIX}{name} {kind}')
+        for series_name, labels, value in series:
+            lines.append(f'{PREFIX}{series_name}{{{labels}}} {_number(value)}'
+                         if labels else f'{PREFIX}{series_name} {_number(value)}')
+
+    for name, help_text, series in _gauges():
+        kind = 'counter' if name.endswith('_total') else 'gauge'
+        family(name, kind, help_text, [(name, labels, value) for labels, value in series])
+
+    stored = {}
+    for row in MetricCounter.objects.order_by('name', 'labels'):
+        stored.setdefault(row.name, []).append((row.labels, row.value))
+    for name, help_text in COUNTERS.items():
+        family(name, 'counter', help_text,
+               [(name, labels, value) for labels, value in stored.get(name, [])])
+    for name, (help_text, _) in HISTOGRAMS.items():
+        series = []
+        for suffix in ('_bucket', '_sum', '_count'):
+            rows = stored.get(name + suffix, [])
+            if suffix == '_bucket':
+                rows = sorted(rows, key=_bucket_order)
+            series += [(name + suffix, labels, value) for labels, value in rows]
+        family(name, 'histogram', help_text, series)
+    return '\n'.join(lines) + '\n'
+
+
+def _bucket_order(row):
+    """Sort buckets by their other labels, then numerically by le."""
+    pairs = dict(pair.split('=', 1) for pair in row[0].split(','))
+    le = pairs.pop('le').strip('"')
+    return sorted(pairs.items()), math.inf if le == '+Inf' else float(le)
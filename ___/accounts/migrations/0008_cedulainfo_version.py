@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-19 04:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0007_cedulainfo_retry_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cedulainfo',
+            name='version',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Incremented on every status transition (optimistic locking)', verbose_name='Version'),
+        ),
+    ]
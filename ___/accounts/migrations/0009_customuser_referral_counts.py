@@ -0,0 +1,47 @@
+# Generated by Django 4.2.30 on 2026-10-19 04:06
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def populate_referral_counts(apps, schema_editor):
+    """Backfill counters for existing users in a single UPDATE."""
+    CustomUser = apps.get_model('accounts', 'CustomUser')
+
+    def count_referrals(**filters):
+        subquery = (
+            CustomUser.objects
+            .filter(referred_by=OuterRef('pk'), **filters)
+            .order_by()
+            .values('referred_by')
+            .annotate(total=Count('id'))
+            .values('total')
+        )
+        return Coalesce(Subquery(subquery, output_field=IntegerField()), Value(0))
+
+    CustomUser.objects.update(
+        referral_count=count_referrals(),
+        verified_referral_count=count_referrals(cedula_info__status='ACTIVE'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0008_cedulainfo_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='referral_count',
+            field=models.PositiveIntegerField(db_index=True, default=0, editable=False, verbose_name='Referidos'),
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='verified_referral_count',
+            field=models.PositiveIntegerField(db_index=True, default=0, editable=False, help_text='Referidos con cedula ACTIVE en el censo', verbose_name='Referidos verificados'),
+        ),
+        migrations.RunPython(populate_referral_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.30 on 2026-10-19 04:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0009_customuser_referral_counts'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cedulainfo',
+            index=models.Index(fields=['user', 'status'], name='cedula_user_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(fields=['referred_by', 'date_joined'], name='referral_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(fields=['referred_by', 'nombre_completo'], name='referral_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(fields=['referred_by', 'cedula'], name='referral_cedula_idx'),
+        ),
+    ]
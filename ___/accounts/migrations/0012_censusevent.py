@@ -0,0 +1,30 @@
+# Generated by Django 4.2.30 on 2026-10-19 04:10
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0011_customuser_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CensusEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('PENDING', 'Pendiente'), ('PROCESSING', 'Procesando'), ('ACTIVE', 'Activo'), ('NOT_FOUND', 'No encontrado'), ('CANCELLED_DECEASED', 'Cancelada - Fallecido'), ('CANCELLED_OTHER', 'Cancelada - Otro'), ('ERROR', 'Error'), ('TIMEOUT', 'Timeout'), ('BLOCKED', 'Bloqueado')], max_length=20, verbose_name='Estado')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Fecha')),
+                ('leader', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Lider')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Usuario')),
+            ],
+            options={
+                'verbose_name': 'Evento de censo',
+                'verbose_name_plural': 'Eventos de censo',
+                'indexes': [models.Index(fields=['user', 'id'], name='census_event_user_idx'), models.Index(fields=['leader', 'id'], name='census_event_leader_idx')],
+            },
+        ),
+    ]
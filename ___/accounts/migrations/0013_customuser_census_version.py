@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-19 04:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0012_censusevent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='census_version',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Version de censo'),
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 4.2.30 on 2026-10-19 04:13
+
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+import django.utils.timezone
+
+
+RESULT_STATUSES = ['ACTIVE', 'NOT_FOUND', 'CANCELLED_DECEASED', 'CANCELLED_OTHER']
+
+
+def backfill_timestamps(apps, schema_editor):
+    """
+    Derive the new timestamps from existing data in set-based UPDATEs.
+
+    created_at comes from the user's date_joined (the old creation proxy);
+    status_changed_at from fetched_at, which refreshes also used to reset;
+    last_result_at from fetched_at for rows holding a definitive result.
+    """
+    CedulaInfo = apps.get_model('accounts', 'CedulaInfo')
+    CustomUser = apps.get_model('accounts', 'CustomUser')
+
+    date_joined = Subquery(
+        CustomUser.objects.filter(pk=OuterRef('user_id')).values('date_joined')[:1]
+    )
+    CedulaInfo.objects.update(created_at=date_joined)
+    CedulaInfo.objects.update(status_changed_at=Coalesce('fetched_at', 'created_at'))
+    CedulaInfo.objects.filter(
+        status__in=RESULT_STATUSES, fetched_at__isnull=False,
+    ).update(last_result_at=F('fetched_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0013_customuser_census_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cedulainfo',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False, verbose_name='Fecha de creacion'),
+        ),
+        migrations.AddField(
+            model_name='cedulainfo',
+            name='last_result_at',
+            field=models.DateTimeField(blank=True, editable=False, help_text='When the Registraduria last gave a definitive answer', null=True, verbose_name='Ultimo resultado'),
+        ),
+        migrations.AddField(
+            model_name='cedulainfo',
+            name='status_changed_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False, help_text='Set on every status transition (staleness and cooldown checks)', verbose_name='Cambio de estado'),
+        ),
+        migrations.AlterField(
+            model_name='cedulainfo',
+            name='fetched_at',
+            field=models.DateTimeField(blank=True, help_text='When the last scrape attempt finished', null=True, verbose_name='Fecha de consulta'),
+        ),
+        migrations.RunPython(backfill_timestamps, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='cedulainfo',
+            index=models.Index(fields=['status', 'status_changed_at'], name='cedula_status_changed_idx'),
+        ),
+    ]
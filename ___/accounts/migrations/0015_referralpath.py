@@ -0,0 +1,56 @@
+# Generated by Django 4.2.30 on 2026-10-19 04:15
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def populate_referral_paths(apps, schema_editor):
+    """Build the closure table from referred_by for existing users."""
+    CustomUser = apps.get_model('accounts', 'CustomUser')
+    ReferralPath = apps.get_model('accounts', 'ReferralPath')
+
+    parents = dict(CustomUser.objects.values_list('id', 'referred_by_id'))
+
+    def iter_paths():
+        for user_id in parents:
+            yield ReferralPath(ancestor_id=user_id, descendant_id=user_id, depth=0)
+            seen = {user_id}
+            ancestor_id = parents.get(user_id)
+            depth = 1
+            while ancestor_id is not None and ancestor_id not in seen:
+                yield ReferralPath(ancestor_id=ancestor_id, descendant_id=user_id, depth=depth)
+                seen.add(ancestor_id)
+                ancestor_id = parents.get(ancestor_id)
+                depth += 1
+
+    ReferralPath.objects.bulk_create(iter_paths(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0014_cedulainfo_status_timestamps'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReferralPath',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('depth', models.PositiveSmallIntegerField(verbose_name='Nivel')),
+                ('ancestor', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='downline_paths', to=settings.AUTH_USER_MODEL, verbose_name='Ancestro')),
+                ('descendant', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='upline_paths', to=settings.AUTH_USER_MODEL, verbose_name='Descendiente')),
+            ],
+            options={
+                'verbose_name': 'Ruta de referido',
+                'verbose_name_plural': 'Rutas de referidos',
+                'indexes': [models.Index(fields=['ancestor', 'depth', 'descendant'], name='referral_path_down_idx'), models.Index(fields=['descendant', 'depth', 'ancestor'], name='referral_path_up_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='referralpath',
+            constraint=models.UniqueConstraint(fields=('ancestor', 'descendant'), name='referral_path_unique'),
+        ),
+        migrations.RunPython(populate_referral_paths, migrations.RunPython.noop),
+    ]
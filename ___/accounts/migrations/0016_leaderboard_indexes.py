@@ -0,0 +1,31 @@
+# Generated by Django 4.2.30 on 2026-10-19 04:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0015_referralpath'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='customuser',
+            name='referral_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Referidos'),
+        ),
+        migrations.AlterField(
+            model_name='customuser',
+            name='verified_referral_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Referidos con cedula ACTIVE en el censo', verbose_name='Referidos verificados'),
+        ),
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(fields=['verified_referral_count', 'referral_count'], name='leaderboard_verified_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(fields=['referral_count', 'verified_referral_count'], name='leaderboard_total_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.30 on 2026-10-19 04:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0016_leaderboard_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='cedulainfo',
+            name='cedula_user_status_idx',
+        ),
+        migrations.AddIndex(
+            model_name='cedulainfo',
+            index=models.Index(fields=['user', 'status', 'departamento', 'municipio', 'puesto', 'mesa'], name='cedula_user_location_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.30 on 2026-10-19 04:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0017_cedula_location_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MetricCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, verbose_name='Nombre')),
+                ('labels', models.CharField(blank=True, default='', max_length=200, verbose_name='Etiquetas')),
+                ('value', models.FloatField(default=0, verbose_name='Valor')),
+            ],
+            options={
+                'verbose_name': 'Contador de métricas',
+                'verbose_name_plural': 'Contadores de métricas',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='metriccounter',
+            constraint=models.UniqueConstraint(fields=('name', 'labels'), name='metric_counter_unique'),
+        ),
+    ]
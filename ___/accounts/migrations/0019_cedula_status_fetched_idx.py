@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-19 04:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0018_metric_counter'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cedulainfo',
+            index=models.Index(fields=['status', 'fetched_at'], name='cedula_status_fetched_idx'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.30 on 2026-10-19 05:01
+
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0019_cedula_status_fetched_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cedulainfo',
+            index=models.Index(fields=['fetched_at'], name='cedula_fetched_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(django.db.models.functions.text.Upper('nombre_completo'), name='user_name_upper_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-19 05:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0020_admin_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cedulainfo',
+            name='batch_queued',
+            field=models.BooleanField(default=False, editable=False, help_text='Waiting in a validate_cedula_batch task (longer stale timeout); cleared by every status transition', verbose_name='En lote'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-19 05:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0021_cedula_batch_queued'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cedulainfo',
+            name='reverify_from',
+            field=models.CharField(blank=True, choices=[('PENDING', 'Pendiente'), ('PROCESSING', 'Procesando'), ('ACTIVE', 'Activo'), ('NOT_FOUND', 'No encontrado'), ('CANCELLED_DECEASED', 'Cancelada - Fallecido'), ('CANCELLED_OTHER', 'Cancelada - Otro'), ('ERROR', 'Error'), ('TIMEOUT', 'Timeout'), ('BLOCKED', 'Bloqueado')], editable=False, help_text='Status a re-verification (reverify.py) claimed the row from; a stale reset restores it. Cleared by every status transition', max_length=20, verbose_name='Reverificacion desde'),
+        ),
+    ]
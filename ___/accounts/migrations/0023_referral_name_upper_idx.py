@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-19 05:47
+
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0022_cedula_reverify_from'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(models.F('referred_by'), django.db.models.functions.text.Upper('nombre_completo'), name='referral_name_upper_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 4.2.30 on 2026-10-19 06:10
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0023_referral_name_upper_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ValidationBatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('heartbeat_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Último avance')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Fecha')),
+            ],
+            options={
+                'verbose_name': 'Lote de validación',
+                'verbose_name_plural': 'Lotes de validación',
+            },
+        ),
+        migrations.RemoveField(
+            model_name='cedulainfo',
+            name='batch_queued',
+        ),
+        migrations.AddField(
+            model_name='cedulainfo',
+            name='batch',
+            field=models.ForeignKey(blank=True, db_index=False, editable=False, help_text='validate_cedula_batch task the row waits in (stale timeout from the batch heartbeat); cleared by every status transition', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='rows', to='accounts.validationbatch', verbose_name='Lote'),
+        ),
+        migrations.AddIndex(
+            model_name='cedulainfo',
+            index=models.Index(fields=['batch', 'user'], name='cedula_batch_user_idx'),
+        ),
+    ]
@@ -1,10 +1,19 @@
+import logging
+from datetime import timedelta
+
 from django.conf import settings
 from django.contrib.auth.models import AbstractUser
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce, NullIf, Upper
+from django.utils import timezone
 from django.utils.crypto import get_random_string
 
 
+logger = logging.getLogger('django-q')
+
+
 def generate_referral_code():
     """Generate unique 8-char alphanumeric referral code."""
     return get_random_string(length=8)
@@ -71,9 +80,108 @@ class CustomUser(AbstractUser):
         verbose_name='Rol',
     )
 
+    # Denormalized referral counters, maintained by signals in signals.py
+    # Rebuild with: python manage.py rebuild_referral_counts
+    # Also the ranking keys of the leaderboard (see leaderboard.py)
+    referral_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Referidos',
+    )
+    verified_referral_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Referidos verificados',
+        help_text='Referidos con cedula ACTIVE en el censo',
+    )
+
+    # Bumped whenever a profile field shown in cached fragments changes
+    version = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Version',
+    )
+
+    # Bumped whenever this user's or one of their referrals' CedulaInfo
+    # changes; validates ETags of the HTMX polling endpoints in O(1)
+    census_version = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Version de censo',
+    )
+
+    # Fields rendered in cached referral fragments (see save())
+    VERSIONED_FIELDS = ('nombre_completo', 'cedula', 'phone')
+
+    REFERRER_CYCLE_ERROR = 'El referidor no puede pertenecer a la red de este usuario.'
+
+    class Meta(AbstractUser.Meta):
+        # Keyset pagination on the referidos page: one index per sort column,
+        # scoped to a leader's referrals (SQLite appends id as tie-breaker)
+        indexes = [
+            models.Index(fields=['referred_by', 'date_joined'], name='referral_date_idx'),
+            models.Index(fields=['referred_by', 'nombre_completo'], name='referral_name_idx'),
+            models.Index(fields=['referred_by', 'cedula'], name='referral_cedula_idx'),
+            # Leaderboard: top-N and rank counts walk these in order
+            # (replace the single-column counter indexes)
+            models.Index(
+                fields=['verified_referral_count', 'referral_count'],
+                name='leaderboard_verified_idx',
+            ),
+            models.Index(
+                fields=['referral_count', 'verified_referral_count'],
+                name='leaderboard_total_idx',
+            ),
+            # Name prefix search in the admin (admin.PrefixSearchMixin)
+            models.Index(Upper('nombre_completo'), name='user_name_upper_idx'),
+            # Name prefix search on the referidos page (referrals.py)
+            models.Index(F('referred_by'), Upper('nombre_completo'), name='referral_name_upper_idx'),
+        ]
+
     def __str__(self):
         return self.username
 
+    def save(self, *args, **kwargs):
+        """Bump version when profile fields may have changed.
+
+        Partial saves that don't touch VERSIONED_FIELDS (e.g. last_login on
+        login) keep the version, so cached fragments stay valid.
+
+        Raises:
+            ValidationError: The new referrer is in the user's own downline;
+                checked before writing, as the referral tree (signals.py)
+                can't move a subtree under itself
+        """
+        if (self.pk and self.referred_by_id != getattr(self, '_loaded_referred_by_id', None)
+                and self._referrer_in_downline()):
+            raise ValidationError({'referred_by': self.REFERRER_CYCLE_ERROR})
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None:
+            self.version += 1
+        elif set(update_fields) & set(self.VERSIONED_FIELDS):
+            self.version += 1
+            kwargs['update_fields'] = {*update_fields, 'version'}
+        super().save(*args, **kwargs)
+
+    def clean(self):
+        """Reject a referrer from the user's own downline (would create a cycle)."""
+        super().clean()
+        if self.pk and self._referrer_in_downline():
+            raise ValidationError({'referred_by': self.REFERRER_CYCLE_ERROR})
+
+    def _referrer_in_downline(self):
+        # The closure table has a depth-0 row per user, so this covers self-referral
+        return bool(self.referred_by_id) and ReferralPath.objects.filter(
+            ancestor_id=self.pk, descendant_id=self.referred_by_id,
+        ).exists()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Remember the loaded referred_by_id so signals can detect changes."""
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_referred_by_id = instance.__dict__.get('referred_by_id')
+        return instance
+
 
 class CedulaInfo(models.Model):
     """Census/voting information fetched from Registraduria."""
@@ -154,6 +262,25 @@ class CedulaInfo(models.Model):
         null=True,
         blank=True,
         verbose_name='Fecha de consulta',
+        help_text='When the last scrape attempt finished',
+    )
+    created_at = models.DateTimeField(
+        default=timezone.now,
+        editable=False,
+        verbose_name='Fecha de creacion',
+    )
+    status_changed_at = models.DateTimeField(
+        default=timezone.now,
+        editable=False,
+        verbose_name='Cambio de estado',
+        help_text='Set on every status transition (staleness and cooldown checks)',
+    )
+    last_result_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name='Ultimo resultado',
+        help_text='When the Registraduria last gave a definitive answer',
     )
     error_message = models.TextField(
         blank=True,
@@ -168,56 +295,514 @@ class CedulaInfo(models.Model):
         default=0,
         verbose_name='Intentos',
     )
+    version = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Version',
+        help_text='Incremented on every status transition (optimistic locking)',
+    )
+    reverify_from = models.CharField(
+        max_length=20,
+        choices=Status.choices,
+        blank=True,
+        editable=False,
+        verbose_name='Reverificacion desde',
+        help_text='Status a re-verification (reverify.py) claimed the row from; a stale '
+                  'reset restores it. Cleared by every status transition',
+    )
+    batch = models.ForeignKey(
+        'ValidationBatch',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        db_index=False,  # Leading column of cedula_batch_user_idx
+        related_name='rows',
+        verbose_name='Lote',
+        help_text='validate_cedula_batch task the row waits in (stale timeout from the '
+                  'batch heartbeat); cleared by every status transition',
+    )
+
+    # Allowed status transitions: source status -> set of target statuses.
+    # PROCESSING -> PROCESSING covers retry bookkeeping between attempts;
+    # every finished state can be re-queued with a refresh.
+    TRANSITIONS = {
+        Status.PENDING: {Status.PROCESSING, Status.ERROR},
+        Status.PROCESSING: {
+            Status.PROCESSING,
+            Status.ACTIVE,
+            Status.NOT_FOUND,
+            Status.CANCELLED_DECEASED,
+            Status.CANCELLED_OTHER,
+            Status.ERROR,
+            Status.TIMEOUT,
+            Status.BLOCKED,
+        },
+        Status.ACTIVE: {Status.PROCESSING},
+        Status.NOT_FOUND: {Status.PROCESSING},
+        Status.CANCELLED_DECEASED: {Status.PROCESSING},
+        Status.CANCELLED_OTHER: {Status.PROCESSING},
+        Status.ERROR: {Status.PROCESSING},
+        Status.TIMEOUT: {Status.PROCESSING},
+        Status.BLOCKED: {Status.PROCESSING},
+    }
+
+    STALE_ERROR_MESSAGE = 'La verificación tardó demasiado. Por favor, intenta de nuevo.'
+
+    # Stale timeout of rows waiting in a batch, counted from the batch's
+    # heartbeat: a batch validates one user per task run and every run beats,
+    # so only a batch that stopped running gets this old
+    BATCH_TIMEOUT_MINUTES = 60
+
+    # Primary keys per UPDATE of bulk_transition_to (SQLite variable limit)
+    BULK_CHUNK_SIZE = 500
+
+    # Definitive answers from the Registraduria (set last_result_at)
+    RESULT_STATUSES = {
+        Status.ACTIVE,
+        Status.NOT_FOUND,
+        Status.CANCELLED_DECEASED,
+        Status.CANCELLED_OTHER,
+    }
 
     class Meta:
         verbose_name = 'Informacion de cedula'
         verbose_name_plural = 'Informacion de cedulas'
+        indexes = [
+            # Covers the status filter join on the referidos page and the
+            # per-location GROUP BY of the geography drill-down (geography.py)
+            # without touching the table
+            models.Index(
+                fields=['user', 'status', 'departamento', 'municipio', 'puesto', 'mesa'],
+                name='cedula_user_location_idx',
+            ),
+            # Staleness, cooldown and re-verification scans on one table
+            models.Index(fields=['status', 'status_changed_at'], name='cedula_status_changed_idx'),
+            # Admin default ordering (newest fetched first)
+            models.Index(fields=['fetched_at'], name='cedula_fetched_idx'),
+            # Oldest-first re-verification of results (reverify.py)
+            models.Index(fields=['status', 'fetched_at'], name='cedula_status_fetched_idx'),
+            # Next user of a validate_cedula_batch task
+            models.Index(fields=['batch', 'user'], name='cedula_batch_user_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.cedula} - {self.get_status_display()}"
 
+    def save(self, *args, **kwargs):
+        """Bump version, so cached fragments of the row are re-rendered.
+
+        transition_to() and bulk_transition_to() bump it in their UPDATE;
+        this covers every other write (admin, shell, importers). The bump
+        also makes a concurrent transition_to() of the old version lose its
+        race instead of overwriting this save.
+        """
+        if self.pk is not None:
+            self.version += 1
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'version'}
+        super().save(*args, **kwargs)
+
+    @property
+    def effective_status(self):
+        """Status shown and counted: the re-checked status while a re-verification runs.
+
+        A re-verification (reverify.py) claims the row as PROCESSING but the
+        person stays verified (or not found) until a new result arrives, so
+        badges, verified counters and network totals keep the previous status.
+        """
+        return self.reverify_from or self.status
+
+    @staticmethod
+    def effective_status_expression(path=''):
+        """effective_status as a query expression; path is the lookup prefix to the row."""
+        return Coalesce(NullIf(F(f'{path}reverify_from'), Value('')), F(f'{path}status'))
+
     def is_stale(self, pending_timeout_minutes=2, processing_timeout_minutes=5):
         """
         Check if status is stuck in PENDING or PROCESSING for too long.
 
         Returns True if the status appears stale (task likely failed to queue
         or worker isn't processing). Used to detect and recover from stuck states.
+        Every transition (including retry bookkeeping) resets status_changed_at,
+        so the check needs no related lookups, except for rows waiting in a
+        batch task: they get BATCH_TIMEOUT_MINUTES from the batch's heartbeat
+        (one query for the batch).
 
         Args:
             pending_timeout_minutes: Max time for PENDING status (default 2 min)
             processing_timeout_minutes: Max time for PROCESSING status (default 5 min)
         """
-        from django.utils import timezone
-        from datetime import timedelta
-
-        now = timezone.now()
-
+        if self.status not in (self.Status.PENDING, self.Status.PROCESSING):
+            return False
+        if self.batch_id is not None:
+            return timezone.now() > self.batch.heartbeat_at + timedelta(minutes=self.BATCH_TIMEOUT_MINUTES)
         if self.status == self.Status.PENDING:
-            # For PENDING, use user's date_joined as creation proxy
-            threshold = self.user.date_joined + timedelta(minutes=pending_timeout_minutes)
-            return now > threshold
-
-        if self.status == self.Status.PROCESSING:
-            # For PROCESSING, use fetched_at (set when refresh triggered)
-            if self.fetched_at:
-                threshold = self.fetched_at + timedelta(minutes=processing_timeout_minutes)
-                return now > threshold
-            else:
-                # No fetched_at but PROCESSING - use date_joined as fallback
-                threshold = self.user.date_joined + timedelta(minutes=processing_timeout_minutes)
-                return now > threshold
+            timeout = pending_timeout_minutes
+        else:
+            timeout = processing_timeout_minutes
 
-        return False
+        return timezone.now() > self.status_changed_at + timedelta(minutes=timeout)
 
     def reset_if_stale(self):
         """
         Reset status to ERROR if stale, allowing user to retry.
 
+        An interrupted re-verification (reverify_from set) gets its previous
+        result status back instead, keeping its last result.
+
         Returns True if status was reset, False otherwise.
         """
-        if self.is_stale():
-            self.status = self.Status.ERROR
-            self.error_message = 'La verificación tardó demasiado. Por favor, intenta de nuevo.'
-            self.save(update_fields=['status', 'error_message'])
-            return True
-        return False
+        if not self.is_stale():
+            return False
+        if self.reverify_from:
+            return self.transition_to(
+                self.reverify_from,
+                fetched_at=timezone.now(),
+                last_result_at=self.last_result_at,
+            )
+        return self.transition_to(self.Status.ERROR, error_message=self.STALE_ERROR_MESSAGE)
+
+    @classmethod
+    def stale_filter(cls, pending_timeout_minutes=2, processing_timeout_minutes=5):
+        """Q matching rows that is_stale() would report (same default timeouts)."""
+        now = timezone.now()
+        return (
+            models.Q(status=cls.Status.PENDING, batch__isnull=True,
+                     status_changed_at__lt=now - timedelta(minutes=pending_timeout_minutes))
+            | models.Q(status=cls.Status.PROCESSING, batch__isnull=True,
+                       status_changed_at__lt=now - timedelta(minutes=processing_timeout_minutes))
+            | models.Q(status__in=[cls.Status.PENDING, cls.Status.PROCESSING], batch__isnull=False,
+                       batch__heartbeat_at__lt=now - timedelta(minutes=cls.BATCH_TIMEOUT_MINUTES))
+        )
+
+    @classmethod
+    def reset_stale(cls, cedula_infos):
+        """
+        Set-based reset_if_stale() for already loaded rows (e.g. one page).
+
+        Stale rows are moved to ERROR (interrupted re-verifications back to
+        reverify_from) with one UPDATE per target status instead of one
+        transition per row, and the given instances are updated in place.
+
+        Returns:
+            Number of rows reset
+        """
+        # Batch rows are left to stale_filter() in the UPDATE, which reads
+        # their batch's heartbeat in the same query
+        stale = {
+            info.user_id: info for info in cedula_infos
+            if (info.batch_id is not None and info.status in (cls.Status.PENDING, cls.Status.PROCESSING))
+            or info.is_stale()
+        }
+        if not stale:
+            return 0
+
+        now = timezone.now()
+        # Interrupted re-verifications go back to their status, the rest to ERROR
+        targets = {}
+        for info in stale.values():
+            targets.setdefault(info.reverify_from, []).append(info.user_id)
+
+        transitions = []
+        for reverify_from, user_ids in targets.items():
+            if reverify_from:
+                fields = {'fetched_at': now, 'last_result_at': F('last_result_at')}
+            else:
+                fields = {'error_message': cls.STALE_ERROR_MESSAGE}
+            transitions += cls.bulk_transition_to(
+                cls.objects.filter(cls.stale_filter(), user_id__in=user_ids,
+                                   reverify_from=reverify_from),
+                reverify_from or cls.Status.ERROR,
+                status_changed_at=now,
+                **fields,
+            )
+        for user_id, _, new_status in transitions:
+            info = stale[user_id]
+            info.status = new_status
+            if info.reverify_from:
+                info.fetched_at = now
+            else:
+                info.error_message = cls.STALE_ERROR_MESSAGE
+            info.status_changed_at = now
+            info.batch = None
+            info.reverify_from = ''
+            info.version += 1
+        return len(transitions)
+
+    def can_transition_to(self, new_status):
+        """Return True if new_status is reachable from the current status."""
+        return new_status in self.TRANSITIONS.get(self.status, ())
+
+    def transition_to(self, new_status, **fields):
+        """
+        Move to new_status with a single conditional UPDATE.
+
+        The UPDATE only matches while the row still has the status and version
+        this instance was loaded with, so a concurrent writer (task, view or
+        stale reset) can never clobber a newer result. Only status, version,
+        the transition timestamps and the given fields are written.
+
+        On success the instance is updated in place and the
+        cedula_status_changed signal is sent.
+
+        Args:
+            new_status: Target CedulaInfo.Status
+            **fields: Extra columns to write in the same UPDATE
+
+        Returns:
+            True if the transition was applied, False if it is not allowed
+            from the current status or another writer changed the row first.
+        """
+        old_status = self.status
+        if not self.can_transition_to(new_status):
+            logger.warning("CedulaInfo %s: transition %s -> %s not allowed",
+                           self.pk, old_status, new_status)
+            return False
+
+        now = timezone.now()
+        fields.setdefault('status_changed_at', now)
+        fields.setdefault('batch', None)
+        fields.setdefault('reverify_from', '')
+        if new_status in self.RESULT_STATUSES:
+            fields.setdefault('last_result_at', now)
+
+        updated = CedulaInfo.objects.filter(
+            pk=self.pk,
+            status=old_status,
+            version=self.version,
+        ).update(status=new_status, version=F('version') + 1, **fields)
+
+        if not updated:
+            logger.warning("CedulaInfo %s: lost race on %s -> %s (version %s)",
+                           self.pk, old_status, new_status, self.version)
+            return False
+
+        old_effective = self.effective_status
+        self.status = new_status
+        self.version += 1
+        for name, value in fields.items():
+            setattr(self, name, value)
+
+        from .signals import cedula_status_changed
+        cedula_status_changed.send(
+            sender=CedulaInfo,
+            transitions=[(self.user_id, old_status, new_status)],
+            effective_transitions=[(self.user_id, old_effective, self.effective_status)],
+        )
+        return True
+
+    @classmethod
+    def bulk_transition_to(cls, queryset, new_status, **fields):
+        """
+        Set-based transition_to() for every row of queryset.
+
+        Rows whose status can't reach new_status are left out. The candidate
+        rows are read once, then moved by an UPDATE matching the primary keys
+        read *and* the status each row was read with, so a row another writer
+        moved in between is left alone (SQLite has no SELECT ... FOR UPDATE
+        to lock it). One cedula_status_changed signal covers the rows that
+        were actually moved.
+
+        Args:
+            queryset: CedulaInfo queryset selecting candidate rows
+            new_status: Target CedulaInfo.Status
+            **fields: Extra columns to write in the same UPDATE
+
+        Returns:
+            List of (user_id, old_status, new_status) tuples that were applied
+        """
+        sources = [status for status, targets in cls.TRANSITIONS.items() if new_status in targets]
+        queryset = queryset.filter(status__in=sources)
+
+        now = timezone.now()
+        fields.setdefault('status_changed_at', now)
+        fields.setdefault('batch', None)
+        fields.setdefault('reverify_from', '')
+        if new_status in cls.RESULT_STATUSES:
+            fields.setdefault('last_result_at', now)
+
+        rows = {pk: (user_id, old_status, reverify_from) for pk, user_id, old_status, reverify_from
+                in queryset.values_list('pk', 'user_id', 'status', 'reverify_from')}
+        pks = list(rows)
+        new_effective = fields['reverify_from'] or new_status
+
+        transitions = []
+        effective_transitions = []
+        with transaction.atomic():
+            for start in range(0, len(pks), cls.BULK_CHUNK_SIZE):
+                chunk = pks[start:start + cls.BULK_CHUNK_SIZE]
+                # Each row must still have the status it was read with
+                by_status = {}
+                for pk in chunk:
+                    by_status.setdefault(rows[pk][1], []).append(pk)
+                expected = models.Q()
+                for old_status, status_pks in by_status.items():
+                    expected |= models.Q(pk__in=status_pks, status=old_status)
+                updated = cls.objects.filter(expected).update(
+                    status=new_status, version=F('version') + 1, **fields,
+                )
+                if updated < len(chunk):
+                    # Some rows changed since they were read: keep the ones
+                    # this UPDATE wrote (our status_changed_at)
+                    chunk = cls.objects.filter(
+                        pk__in=chunk,
+                        status=new_status,
+                        status_changed_at=fields['status_changed_at'],
+                    ).values_list('pk', flat=True)
+                transitions += [(rows[pk][0], rows[pk][1], new_status) for pk in chunk]
+                effective_transitions += [
+                    (rows[pk][0], rows[pk][2] or rows[pk][1], new_effective) for pk in chunk
+                ]
+
+        if not transitions:
+            return []
+        from .signals import cedula_status_changed
+        cedula_status_changed.send(sender=CedulaInfo, transitions=transitions,
+                                   effective_transitions=effective_transitions)
+        logger.info("CedulaInfo: %d rows moved to %s", len(transitions), new_status)
+        return transitions
+
+
+class ValidationBatch(models.Model):
+    """
+    A validate_cedula_batch task chain (bulk refresh or referral import).
+
+    Waiting CedulaInfo rows point at their batch, so each task run finds
+    its next user with an indexed query and only passes the batch id on;
+    its heartbeat is the one row every run updates, and rows waiting in a
+    batch go stale only when it stops beating (CedulaInfo.stale_filter).
+    Deleted by the run that finds no user left.
+    """
+
+    heartbeat_at = models.DateTimeField(default=timezone.now, verbose_name='Último avance')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Fecha')
+
+    class Meta:
+        verbose_name = 'Lote de validación'
+        verbose_name_plural = 'Lotes de validación'
+
+    def __str__(self):
+        return f"Lote {self.pk}"
+
+
+class CensusEvent(models.Model):
+    """
+    Notification log of CedulaInfo status changes for Server-Sent Events.
+
+    Written by a cedula_status_changed receiver (from web or qcluster
+    processes) and tailed by the /eventos/ stream, which pushes updated
+    census sections and referral rows to open pages. Rows are short-lived
+    and pruned after events.EVENT_RETENTION.
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Usuario',
+    )
+    # Referrer at the time of the change; receives the row update
+    leader = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name='Lider',
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=CedulaInfo.Status.choices,
+        verbose_name='Estado',
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        db_index=True,
+        verbose_name='Fecha',
+    )
+
+    class Meta:
+        verbose_name = 'Evento de censo'
+        verbose_name_plural = 'Eventos de censo'
+        indexes = [
+            models.Index(fields=['user', 'id'], name='census_event_user_idx'),
+            models.Index(fields=['leader', 'id'], name='census_event_leader_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} -> {self.status}"
+
+
+class ReferralPath(models.Model):
+    """
+    Closure table of the referral tree (see accounts/downline.py).
+
+    One row per (ancestor, descendant) pair, including a depth-0 row from
+    every user to themself. depth=1 rows mirror referred_by; deeper rows let
+    a leader's whole network be counted, listed and aggregated per level
+    with a single indexed query instead of recursive loops.
+
+    Maintained by the referral tree signal handlers; rebuild with
+    `python manage.py rebuild_referral_paths`.
+    """
+
+    ancestor = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        db_index=False,  # Leading column of the composite indexes below
+        related_name='downline_paths',
+        verbose_name='Ancestro',
+    )
+    descendant = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        db_index=False,  # Leading column of the composite indexes below
+        related_name='upline_paths',
+        verbose_name='Descendiente',
+    )
+    depth = models.PositiveSmallIntegerField(verbose_name='Nivel')
+
+    class Meta:
+        verbose_name = 'Ruta de referido'
+        verbose_name_plural = 'Rutas de referidos'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['ancestor', 'descendant'], name='referral_path_unique',
+            ),
+        ]
+        indexes = [
+            # Downline listing/counting, optionally limited by depth
+            models.Index(fields=['ancestor', 'depth', 'descendant'], name='referral_path_down_idx'),
+            # Upline lookups (ancestors of a user) for inserts and moves
+            models.Index(fields=['descendant', 'depth', 'ancestor'], name='referral_path_up_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.ancestor_id} -> {self.descendant_id} ({self.depth})"
+
+
+class MetricCounter(models.Model):
+    """
+    Cumulative pipeline counter shared by all processes (see accounts/metrics.py).
+
+    The scraper and task hooks run in the qcluster worker and monitor
+    processes, so their counters live here rather than in process memory;
+    the /metrics/ endpoint reads them from the web process. One row per
+    series, e.g. name='scraper_results_total', labels='status="found"'.
+    """
+
+    name = models.CharField(max_length=100, verbose_name='Nombre')
+    labels = models.CharField(max_length=200, blank=True, default='', verbose_name='Etiquetas')
+    value = models.FloatField(default=0, verbose_name='Valor')
+
+    class Meta:
+        verbose_name = 'Contador de métricas'
+        verbose_name_plural = 'Contadores de métricas'
+        constraints = [
+            models.UniqueConstraint(fields=['name', 'labels'], name='metric_counter_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.name}{{{self.labels}}} = {self.value}"
@@ -0,0 +1,200 @@
+"""
+Query helpers for a user's referral list.
+
+Shared by the referidos page and its HTMX fragments:
+- Status filter groups matching the page tabs (all, pending, found, errors)
+- Search by cedula or name prefix, as index ranges (search.py) on
+  CustomUser (referred_by, cedula) and (referred_by, UPPER(nombre_completo))
+- Sort options with keyset (cursor) pagination
+
+Keyset pagination orders by (sort column, id) and resumes after the last
+row of the previous page instead of using OFFSET. The composite indexes on
+CustomUser (referred_by, <sort column>) serve the date, name and cedula
+sorts directly, so those pages cost the same regardless of how many
+referrals a leader has; SQLite appends the rowid (id) to every index, which
+breaks ties for free.
+
+The status sort has no such index: the status lives in CedulaInfo, and no
+single index orders one table's rows by another's column. SQLite reads the
+leader's referrals (in the selected tab) and sorts them on every page, so
+its cost grows with the leader's direct referrals, though not with the
+size of the table.
+"""
+import base64
+import json
+
+from django.db.models import Q, Value
+from django.db.models.functions import Coalesce, Upper
+from django.utils.dateparse import parse_datetime
+
+from .models import CedulaInfo
+from .search import SELECTIVE_PREFIX_CHARS, Selective, prefix_range, upper_name
+
+
+PAGE_SIZE = 50
+
+PENDING_STATUSES = [CedulaInfo.Status.PENDING, CedulaInfo.Status.PROCESSING]
+
+# Tab name -> statuses shown (None = no filtering)
+STATUS_FILTERS = {
+    'all': None,
+    'pending': PENDING_STATUSES,
+    'found': [CedulaInfo.Status.ACTIVE],
+    'errors': [
+        CedulaInfo.Status.ERROR,
+        CedulaInfo.Status.TIMEOUT,
+        CedulaInfo.Status.BLOCKED,
+        CedulaInfo.Status.NOT_FOUND,
+        CedulaInfo.Status.CANCELLED_DECEASED,
+        CedulaInfo.Status.CANCELLED_OTHER,
+    ],
+}
+
+# Sort name -> column used for ordering and the keyset condition
+SORT_FIELDS = {
+    'date': 'date_joined',
+    'name': 'nombre_completo',
+    'cedula': 'cedula',
+    'status': 'sort_status',  # Annotated, see order_referrals()
+}
+
+DEFAULT_SORT = 'date'
+DEFAULT_DIRECTION = 'desc'
+
+
+def clean_params(params):
+    """
+    Normalize filter/sort query parameters.
+
+    Args:
+        params: QueryDict or dict (request.GET)
+
+    Returns:
+        dict with status_filter, search, sort and direction keys,
+        falling back to defaults for unknown values.
+    """
+    status_filter = params.get('filter', 'all')
+    if status_filter not in STATUS_FILTERS:
+        status_filter = 'all'
+
+    sort = params.get('sort', DEFAULT_SORT)
+    if sort not in SORT_FIELDS:
+        sort = DEFAULT_SORT
+
+    direction = params.get('dir', DEFAULT_DIRECTION)
+    if direction not in ('asc', 'desc'):
+        direction = DEFAULT_DIRECTION
+
+    return {
+        'status_filter': status_filter,
+        'search': params.get('q', '').strip()[:60],
+        'sort': sort,
+        'direction': direction,
+    }
+
+
+def filter_referrals(queryset, status_filter='all', search=''):
+    """
+    Apply status tab and search filters to a CustomUser queryset.
+
+    The search matches cedulas or full names starting with it (names
+    case-insensitively, for ASCII letters). Referrals without CedulaInfo
+    (created before census validation existed) are shown under 'pending',
+    matching the old client-side filter.
+    """
+    statuses = STATUS_FILTERS.get(status_filter)
+    if statuses is not None:
+        condition = Q(cedula_info__status__in=statuses)
+        if status_filter == 'pending':
+            condition |= Q(cedula_info__isnull=True)
+        queryset = queryset.filter(condition)
+
+    if search:
+        search = ' '.join(search.split())
+        if search.isdigit():
+            condition = prefix_range('cedula', search)
+        else:
+            condition = prefix_range(Upper('nombre_completo'), upper_name(search))
+        if len(search) >= SELECTIVE_PREFIX_CHARS:
+            condition = Selective(condition)
+        queryset = queryset.filter(condition)
+
+    return queryset
+
+
+def order_referrals(queryset, sort=DEFAULT_SORT, direction=DEFAULT_DIRECTION):
+    """Order by the sort column with id as tie-breaker in the same direction."""
+    if sort == 'status':
+        queryset = queryset.annotate(
+            sort_status=Coalesce('cedula_info__status', Value(''))
+        )
+    field = SORT_FIELDS[sort]
+    prefix = '-' if direction == 'desc' else ''
+    return queryset.order_by(f'{prefix}{field}', f'{prefix}id')
+
+
+def encode_cursor(value, pk):
+    """Encode the last row's (sort value, id) as an opaque URL-safe token."""
+    if hasattr(value, 'isoformat'):
+        value = value.isoformat()
+    raw = json.dumps([value, pk]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor, sort):
+    """
+    Decode a cursor produced by encode_cursor().
+
+    Returns:
+        (value, pk) tuple, or None if the cursor is missing or malformed
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        value, pk = json.loads(base64.urlsafe_b64decode(padded))
+        pk = int(pk)
+    except (ValueError, TypeError):
+        return None
+
+    if sort == 'date':
+        value = parse_datetime(value) if isinstance(value, str) else None
+        if value is None:
+            return None
+    elif not isinstance(value, str):
+        return None
+    return value, pk
+
+
+def paginate_referrals(queryset, sort=DEFAULT_SORT, direction=DEFAULT_DIRECTION,
+                       cursor=None, page_size=PAGE_SIZE):
+    """
+    Return one keyset page of an ordered referral queryset.
+
+    Args:
+        queryset: Queryset already passed through order_referrals()
+        sort: Sort name (key of SORT_FIELDS)
+        direction: 'asc' or 'desc'
+        cursor: Token from the previous page, or None for the first page
+        page_size: Rows per page
+
+    Returns:
+        (rows, next_cursor) - next_cursor is None on the last page
+    """
+    field = SORT_FIELDS[sort]
+    position = decode_cursor(cursor, sort)
+    if position is not None:
+        value, pk = position
+        op = 'lt' if direction == 'desc' else 'gt'
+        queryset = queryset.filter(
+            Q(**{f'{field}__{op}': value}) | Q(**{field: value, f'id__{op}': pk})
+        )
+
+    # Fetch one extra row to know whether another page exists
+    rows = list(queryset[:page_size + 1])
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, field), last.pk)
+    return rows, next_cursor
@@ -0,0 +1,122 @@
+"""
+Periodic re-verification of census results.
+
+Census assignments change before elections, so ACTIVE and NOT_FOUND rows
+whose last scrape attempt (fetched_at) is older than REVERIFY_AFTER_DAYS are
+scraped again, oldest first. tasks.reverify_tick runs every
+REVERIFY_TICK_MINUTES (install the schedule with
+`python manage.py schedule_reverification`) and scrapes at most quota()
+rows:
+
+- pace: the rows due now, spread evenly over REVERIFY_WINDOW_HOURS, so a
+  backlog is worked off gradually instead of in one stampede
+- capacity: what the worker can scrape in REVERIFY_SHARE of a tick, from
+  the measured mean scrape duration (scraper_duration_seconds in
+  accounts/metrics.py) and the scraper's rate limit. A tick is one task
+  run, so it only starts a scrape while the worst case
+  (scraper.MAX_SCRAPE_SECONDS) still ends before tasks.TASK_SECONDS.
+
+Interactive work always comes first: a tick does nothing while tasks wait
+in the queue (registrations, refreshes, bulk refreshes), and stops between
+two scrapes as soon as one arrives. Skipped rows stay the oldest and are
+picked up by the next tick.
+
+A claimed row remembers its status in CedulaInfo.reverify_from: if the
+tick is killed anyway, the stale reset gives the row that status back
+instead of writing ERROR over its last result.
+"""
+import math
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django_q.models import OrmQ
+
+from .models import CedulaInfo, MetricCounter
+from .scraper import MAX_SCRAPE_SECONDS, RATE_LIMIT_SECONDS
+
+
+REVERIFY_STATUSES = [CedulaInfo.Status.ACTIVE, CedulaInfo.Status.NOT_FOUND]
+
+# Mean scrape duration assumed until the metrics have measurements
+DEFAULT_SCRAPE_SECONDS = 45
+
+
+def cutoff():
+    """Rows last fetched before this are due."""
+    return timezone.now() - timedelta(days=settings.REVERIFY_AFTER_DAYS)
+
+
+def due_rows():
+    """CedulaInfo rows due for re-verification (cedula_status_fetched_idx)."""
+    return CedulaInfo.objects.filter(status__in=REVERIFY_STATUSES, fetched_at__lt=cutoff())
+
+
+def oldest_due(limit):
+    """
+    Return up to limit due rows, oldest fetched_at first.
+
+    One index range scan per status, merged here: SQLite can't return
+    status IN (...) rows ordered by fetched_at from the index.
+    """
+    rows = []
+    for status in REVERIFY_STATUSES:
+        rows += list(
+            due_rows().filter(status=status).order_by('fetched_at')
+            .select_related('user')[:limit]
+        )
+    rows.sort(key=lambda info: info.fetched_at)
+    return rows[:limit]
+
+
+def interactive_work_waiting():
+    """True while tasks wait in the queue (not counting ones being run)."""
+    now = timezone.now()
+    return OrmQ.objects.filter(Q(lock__isnull=True) | Q(lock__lte=now)).exists()
+
+
+def scrape_seconds():
+    """Worker time one scrape takes: measured mean, at least the rate limit."""
+    totals = dict(
+        MetricCounter.objects.filter(
+            name__in=['scraper_duration_seconds_sum', 'scraper_duration_seconds_count'],
+            labels='',
+        ).values_list('name', 'value')
+    )
+    count = totals.get('scraper_duration_seconds_count', 0)
+    mean = totals.get('scraper_duration_seconds_sum', 0) / count if count else DEFAULT_SCRAPE_SECONDS
+    return max(mean, RATE_LIMIT_SECONDS)
+
+
+def start_window():
+    """Seconds into a task run during which a worst-case scrape still fits."""
+    from .tasks import TASK_SECONDS
+    return max(0, TASK_SECONDS - MAX_SCRAPE_SECONDS)
+
+
+def quota(due):
+    """
+    Rows to re-verify this tick.
+
+    Args:
+        due: Number of rows due now
+
+    Returns:
+        dict with quota, pace, capacity, scrape_seconds and budget_seconds
+        (seconds into the tick during which scrapes may start)
+    """
+    tick_seconds = settings.REVERIFY_TICK_MINUTES * 60
+    window_seconds = settings.REVERIFY_WINDOW_HOURS * 3600
+    per_scrape = scrape_seconds()
+    budget = min(tick_seconds * settings.REVERIFY_SHARE, start_window())
+    # Scrapes start at 0, per_scrape, 2 * per_scrape, ... while within budget
+    capacity = max(1, math.ceil(budget / per_scrape))
+    pace = math.ceil(due * tick_seconds / window_seconds) if due else 0
+    return {
+        'quota': min(capacity, pace),
+        'pace': pace,
+        'capacity': capacity,
+        'scrape_seconds': per_scrape,
+        'budget_seconds': budget,
+    }
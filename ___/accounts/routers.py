@@ -0,0 +1,98 @@
+"""
+Database router sending reads of read-only views to a mode=ro connection.
+
+Views decorated with @read_only_db run their ORM reads on the 'readonly'
+alias (settings.READ_ONLY_DATABASE), a second SQLite connection opened with
+mode=ro and query_only. Readers there never share a connection, or its
+transaction, with the writer: the WAL lets them read the last committed
+state while the task worker or another request writes.
+
+Writes always go to 'default'. Reads also stay on 'default' while it has
+an open transaction, so a view sees its own uncommitted writes (and tests,
+which run inside a transaction on 'default', see their data).
+"""
+import contextvars
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+_read_only = contextvars.ContextVar('read_only_db', default=False)
+
+
+def _read_only_alias():
+    alias = getattr(settings, 'READ_ONLY_DATABASE', None)
+    return alias if alias in settings.DATABASES else None
+
+
+class ReadOnlyRouter:
+    """Route reads to the read-only alias inside @read_only_db views."""
+
+    def db_for_read(self, model, **hints):
+        alias = _read_only_alias()
+        if alias and _read_only.get() and not connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return alias
+        return None
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases are the same database file
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        if db == _read_only_alias():
+            return False
+        return None
+
+
+def _iter_read_only(content):
+    """Produce a streaming response's chunks with read-only routing on."""
+    iterator = iter(content)
+    while True:
+        token = _read_only.set(True)
+        try:
+            chunk = next(iterator)
+        except StopIteration:
+            return
+        finally:
+            _read_only.reset(token)
+        yield chunk
+
+
+async def _aiter_read_only(content):
+    """_iter_read_only() for async streaming content (ASGI)."""
+    iterator = aiter(content)
+    while True:
+        token = _read_only.set(True)  # Copied into sync_to_async() calls
+        try:
+            chunk = await anext(iterator)
+        except StopAsyncIteration:
+            return
+        finally:
+            _read_only.reset(token)
+        yield chunk
+
+
+def read_only_db(view_func):
+    """
+    Decorator for views that only read: route their queries to the
+    read-only connection.
+
+    Also covers the body of streaming responses, which is produced after
+    the view returns.
+    """
+    @wraps(view_func)
+    def _wrapped_view(request, *args, **kwargs):
+        token = _read_only.set(True)
+        try:
+            response = view_func(request, *args, **kwargs)
+        finally:
+            _read_only.reset(token)
+        if response.streaming:
+            wrap = _aiter_read_only if response.is_async else _iter_read_only
+            response.streaming_content = wrap(response.streaming_content)
+        return response
+    return _wrapped_view
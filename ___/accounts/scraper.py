@@ -10,6 +10,20 @@ The scraper implements a browser singleton pattern for performance:
 - Fresh browser context is created per scrape for isolation
 - Context cleanup happens in finally block to ensure clean state
 
+With SCRAPER_PROFILE_DIR set, a persistent context on that profile
+directory replaces the browser instead: the Registraduria page's scripts,
+stylesheets and reCAPTCHA bundles then come from Chromium's disk cache,
+across scrapes and worker restarts. Each scrape still gets a new page
+(fresh DOM and sessionStorage) after the context's cookies and the stored
+data of the Registraduria and reCAPTCHA origins (localStorage, IndexedDB,
+service workers, Cache Storage) are cleared, so no form or session state
+carries over from one lookup to the next; only the HTTP cache is kept.
+
+Every scrape records how long the page took to become ready and how many
+bytes went over the network (scraper_page_ready_seconds and
+scraper_transfer_bytes in accounts/metrics.py, labelled by profile), so
+both modes can be compared.
+
 Usage:
     scraper = RegistraduriaScraper()
     result = scraper.scrape_cedula('12345678')
@@ -34,13 +48,44 @@ from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
 from twocaptcha import TwoCaptcha
 from twocaptcha.api import ApiException
 
+from . import metrics
+
 
 # Constants
 REGISTRADURIA_URL = 'https://consultacenso.registraduria.gov.co/consultar/'
-DEFAULT_TIMEOUT = 90000  # 90 seconds in milliseconds
+DEFAULT_TIMEOUT = settings.SCRAPER_ACTION_TIMEOUT_MS  # Per action on the loaded page
 RATE_LIMIT_SECONDS = 5  # Minimum seconds between requests
-PAGE_LOAD_TIMEOUT = 60000  # 60 seconds for initial page load
+PAGE_LOAD_TIMEOUT = 60000  # 60 seconds for the page to load and become ready
 CAPTCHA_TIMEOUT = 120  # 2 minutes for 2captcha to solve
+CAPTCHA_POLL_SECONDS = 10  # 2captcha polling interval
+BROWSER_START_SECONDS = 15  # Allowance for launching Chromium
+FIXED_WAITS_SECONDS = 6  # wait_for_timeout() pauses of scrape_cedula()
+ACTION_STEPS = 4  # Page actions bounded by DEFAULT_TIMEOUT: fill, sitekey, click, results
+
+# Longest one scrape_cedula() call can take, with every wait running into its
+# timeout. Task deadlines (tasks.py) are derived from it, and Q_CLUSTER's
+# timeout must stay above it.
+MAX_SCRAPE_SECONDS = (
+    RATE_LIMIT_SECONDS
+    + BROWSER_START_SECONDS
+    + PAGE_LOAD_TIMEOUT / 1000
+    + CAPTCHA_TIMEOUT + CAPTCHA_POLL_SECONDS
+    + ACTION_STEPS * DEFAULT_TIMEOUT / 1000
+    + FIXED_WAITS_SECONDS
+)
+PROFILE_CACHE_BYTES = 200 * 1024 * 1024  # Disk cache cap of the persistent profile
+# Origins whose stored data is cleared before each persistent-profile lookup
+PROFILE_CLEARED_ORIGINS = (
+    'https://consultacenso.registraduria.gov.co',
+    'https://www.google.com',
+    'https://www.gstatic.com',
+    'https://www.recaptcha.net',
+)
+# Storage.clearDataForOrigin types: everything but cookies (cleared through
+# Playwright) and the HTTP cache
+PROFILE_CLEARED_STORAGE = 'local_storage,indexeddb,websql,file_systems,service_workers,cache_storage'
+VIEWPORT = {'width': 1280, 'height': 800}
+USER_AGENT = 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
 
 # CSS Selectors based on actual Registraduria page structure
 SELECTORS = {
@@ -76,7 +121,8 @@ class RegistraduriaScraper:
     - _playwright and _browser are class-level singletons
     - get_browser() performs lazy initialization
     - close_browser() cleans up resources
-    - Each scrape_cedula() call creates a fresh context
+    - Each scrape_cedula() call creates a fresh context, or a new page in
+      the persistent context (_context) when SCRAPER_PROFILE_DIR is set
 
     Rate limiting:
     - _last_request_time tracks last scrape across all instances
@@ -85,6 +131,8 @@ class RegistraduriaScraper:
 
     _playwright = None
     _browser = None
+    _context = None  # Persistent context (SCRAPER_PROFILE_DIR)
+    _launches = 0  # Browser launches in this process (more than 1 = restarts)
     _last_request_time: float = 0  # Class-level rate limiting tracker
 
     @classmethod
@@ -121,8 +169,50 @@ class RegistraduriaScraper:
             )
             logger.info("Playwright browser initialized (headless=%s)",
                        not settings.DEBUG)
+            cls._count_launch()
         return cls._browser
 
+    @classmethod
+    def get_persistent_context(cls):
+        """
+        Get or create the persistent context on SCRAPER_PROFILE_DIR.
+
+        Chromium locks a profile directory, so only one process at a time
+        may use it (the qcluster runs a single worker).
+
+        Returns:
+            BrowserContext: Playwright persistent context
+        """
+        if cls._context is None:
+            logger.debug("Initializing persistent Playwright context")
+            if cls._playwright is None:
+                cls._playwright = sync_playwright().start()
+            cls._context = cls._playwright.chromium.launch_persistent_context(
+                settings.SCRAPER_PROFILE_DIR,
+                headless=not settings.DEBUG,
+                viewport=VIEWPORT,
+                user_agent=USER_AGENT,
+                args=[f'--disk-cache-size={PROFILE_CACHE_BYTES}'],
+            )
+            # Chromium crashed or was closed: launch again on the next scrape
+            cls._context.on('close', lambda context: cls._forget_context(context))
+            logger.info("Playwright persistent context initialized (profile=%s)",
+                        settings.SCRAPER_PROFILE_DIR)
+            cls._count_launch()
+        return cls._context
+
+    @classmethod
+    def _forget_context(cls, context):
+        if cls._context is context:
+            cls._context = None
+
+    @classmethod
+    def _count_launch(cls):
+        cls._launches += 1
+        metrics.increment('scraper_browser_launches_total')
+        if cls._launches > 1:
+            metrics.increment('scraper_browser_restarts_total')
+
     @classmethod
     def close_browser(cls):
         """
@@ -131,6 +221,10 @@ class RegistraduriaScraper:
         Should be called when shutting down the worker or
         when browser needs to be restarted.
         """
+        if cls._context is not None:
+            logger.debug("Closing persistent Playwright context")
+            context, cls._context = cls._context, None
+            context.close()
         if cls._browser is not None:
             logger.debug("Closing Playwright browser")
             cls._browser.close()
@@ -201,14 +295,21 @@ class RegistraduriaScraper:
             logger.error("Could not find reCAPTCHA sitekey on page")
             return None
 
+        started = time.monotonic()
+        outcome = 'error'
         try:
             logger.info("Sending reCAPTCHA to 2captcha for solving...")
-            solver = TwoCaptcha(api_key)
+            solver = TwoCaptcha(
+                api_key,
+                recaptchaTimeout=CAPTCHA_TIMEOUT,
+                pollingInterval=CAPTCHA_POLL_SECONDS,
+            )
             result = solver.recaptcha(
                 sitekey=sitekey,
                 url=page_url
             )
             token = result.get('code') if isinstance(result, dict) else result
+            outcome = 'solved'
             logger.info("reCAPTCHA solved successfully")
             return token
 
@@ -218,6 +319,8 @@ class RegistraduriaScraper:
         except Exception as e:
             logger.error("2captcha solving failed: %s", str(e))
             return None
+        finally:
+            metrics.observe('scraper_captcha_seconds', time.monotonic() - started, outcome=outcome)
 
     def _inject_captcha_token(self, page, token: str) -> bool:
         """
@@ -272,7 +375,7 @@ class RegistraduriaScraper:
             logger.error("Failed to inject reCAPTCHA token: %s", str(e))
             return False
 
-    def _wait_for_page_ready(self, page):
+    def _wait_for_page_ready(self, page, deadline):
         """
         Wait for the page to be fully loaded and interactive.
 
@@ -281,21 +384,26 @@ class RegistraduriaScraper:
 
         Args:
             page: Playwright page object
+            deadline: time.monotonic() by which the page must be ready; the
+                waits share what is left of PAGE_LOAD_TIMEOUT after goto()
         """
+        def remaining():
+            return max(1, (deadline - time.monotonic()) * 1000)
+
         # Wait for network to settle
-        page.wait_for_load_state('networkidle', timeout=PAGE_LOAD_TIMEOUT)
+        page.wait_for_load_state('networkidle', timeout=remaining())
 
         # Wait for any spinner/overlay to disappear
         try:
             spinner = page.locator(SELECTORS['spinner_overlay'])
             if spinner.count() > 0:
-                spinner.first.wait_for(state='hidden', timeout=30000)
+                spinner.first.wait_for(state='hidden', timeout=remaining())
                 logger.debug("Page spinner disappeared")
         except PlaywrightTimeoutError:
             logger.debug("No spinner found or already hidden")
 
         # Ensure form input is visible
-        page.locator(SELECTORS['cedula_input']).first.wait_for(state='visible', timeout=30000)
+        page.locator(SELECTORS['cedula_input']).first.wait_for(state='visible', timeout=remaining())
         logger.debug("Page ready - form input visible")
 
     def _extract_results_from_table(self, page) -> dict:
@@ -405,21 +513,31 @@ class RegistraduriaScraper:
         """
         self._enforce_rate_limit()
 
-        browser = self.get_browser()
-        context = browser.new_context(
-            viewport={'width': 1280, 'height': 800},
-            user_agent='Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-        )
+        persistent = bool(settings.SCRAPER_PROFILE_DIR)
+        if persistent:
+            context = self.get_persistent_context()
+            # Isolate the lookup: no cookies (server session, reCAPTCHA) from
+            # the previous one; the HTTP cache is kept
+            context.clear_cookies()
+        else:
+            context = self.get_browser().new_context(viewport=VIEWPORT, user_agent=USER_AGENT)
         page = None
+        finished = []  # Requests answered, for the transfer size
+        page_ready = None
 
         try:
             page = context.new_page()
+            if persistent:
+                self._clear_origin_storage(context, page)
             page.set_default_timeout(DEFAULT_TIMEOUT)
+            page.on('requestfinished', finished.append)
 
             # Step 1: Navigate and wait for page ready
             logger.info("Navigating to Registraduria for cedula=%s", cedula)
+            started = time.monotonic()
             page.goto(REGISTRADURIA_URL, timeout=PAGE_LOAD_TIMEOUT)
-            self._wait_for_page_ready(page)
+            self._wait_for_page_ready(page, started + PAGE_LOAD_TIMEOUT / 1000)
+            page_ready = time.monotonic() - started
 
             # Step 2: Fill cedula input
             cedula_input = page.locator(SELECTORS['cedula_input']).first
@@ -472,4 +590,56 @@ class RegistraduriaScraper:
             return {'status': 'network_error', 'error': error_msg}
 
         finally:
-            context.close()
+            self._record_page_metrics(finished, page_ready, persistent)
+            if persistent:
+                if page is not None:
+                    try:
+                        page.close()
+                    except Exception as e:
+                        logger.warning("Could not close scraper page: %s", e)
+            else:
+                context.close()
+
+    def _clear_origin_storage(self, context, page):
+        """
+        Clear what the previous lookup stored in the persistent profile.
+
+        Args:
+            context: The persistent BrowserContext
+            page: A page of the context, to attach the CDP session to
+        """
+        session = context.new_cdp_session(page)
+        try:
+            for origin in PROFILE_CLEARED_ORIGINS:
+                session.send('Storage.clearDataForOrigin', {
+                    'origin': origin, 'storageTypes': PROFILE_CLEARED_STORAGE,
+                })
+        finally:
+            session.detach()
+
+    def _record_page_metrics(self, requests, page_ready, persistent):
+        """
+        Record the page-ready time and the bytes received for one scrape.
+
+        Responses served from Chromium's cache report no transferred bytes,
+        so the total shows what the cache saved.
+
+        Args:
+            requests: Finished Playwright requests of the scrape
+            page_ready: Seconds until the form was usable, None if it never was
+            persistent: True when scraped with the persistent profile
+        """
+        transferred = 0
+        for request in requests:
+            try:
+                sizes = request.sizes()
+            except Exception:
+                continue  # Context already gone
+            transferred += sizes['responseHeadersSize'] + sizes['responseBodySize']
+        profile = 'persistent' if persistent else 'fresh'
+        logger.info("Scrape transfer: %d KB in %d requests, page ready %s (%s profile)",
+                    transferred // 1024, len(requests),
+                    f'{page_ready:.1f}s' if page_ready is not None else 'never', profile)
+        metrics.observe('scraper_transfer_bytes', transferred, profile=profile)
+        if page_ready is not None:
+            metrics.observe('scraper_page_ready_seconds', page_ready, profile=profile)
@@ -0,0 +1,221 @@
+"""
+Standalone scraper service: one long-lived process owns the Playwright
+browser, django-q tasks ask it for lookups over a local Unix socket.
+
+django-q workers are forked and recycled every Q_CLUSTER['recycle'] tasks,
+and the browser singleton of scraper.py dies with them. With
+SCRAPER_SOCKET set, tasks.py sends lookups to `python manage.py
+run_scraper_service` instead, so the browser (and the persistent profile
+of SCRAPER_PROFILE_DIR, the rate limit and the scrape metrics) live as
+long as that process, whatever the workers do.
+
+Protocol: one JSON line per connection each way.
+
+    -> {"cedula": "12345678", "timeout": 270.0}
+    <- {"status": "found", "departamento": ..., ...}
+
+The answer is the dict scrape_cedula() returns. Lookups are queued and
+scraped one at a time by the main thread (Playwright's sync API is
+single-threaded); connections are accepted by server threads, and a full
+queue is answered right away with a retriable error. The browser is
+restarted every `recycle` lookups to bound Chromium's memory.
+
+`timeout` is what is left of the calling task's run (tasks.TASK_SECONDS).
+A queued lookup is dropped without scraping once that has passed, or as
+soon as its client disconnects (e.g. the task was killed), so abandoned
+lookups don't hold up the ones behind them.
+
+request() never raises: an unreachable service or a lookup slower than
+the caller's timeout come back as 'network_error' / 'timeout' results,
+which tasks retry like any other scrape failure.
+"""
+import json
+import logging
+import os
+import queue
+import socket
+import select
+import socketserver
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from .scraper import RegistraduriaScraper
+
+
+logger = logging.getLogger('django-q')
+
+MAX_REQUEST_BYTES = 4096
+
+# Seconds between checks of a waiting handler for a disconnected client
+DISCONNECT_POLL_SECONDS = 1
+
+
+def request(cedula, timeout, path=None):
+    """
+    Scrape a cedula through the service.
+
+    Args:
+        cedula: Cedula to look up
+        timeout: Seconds the caller can wait for the answer
+        path: Socket path (default SCRAPER_SOCKET)
+
+    Returns:
+        dict: scrape_cedula() result
+    """
+    path = path or settings.SCRAPER_SOCKET
+    if timeout <= 0:
+        return {'status': 'timeout', 'error': 'No time left for the lookup'}
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(path)
+            sock.sendall(json.dumps({'cedula': cedula, 'timeout': timeout}).encode() + b'\n')
+            with sock.makefile('rb') as reader:
+                line = reader.readline()
+    except socket.timeout:
+        return {'status': 'timeout', 'error': f'Scraper service gave no answer in {timeout:.0f}s'}
+    except OSError as e:
+        return {'status': 'network_error', 'error': f'Scraper service unavailable: {e}'}
+    try:
+        return json.loads(line)
+    except ValueError:
+        return {'status': 'network_error', 'error': 'Scraper service closed the connection'}
+
+
+class Lookup:
+    """One queued lookup; the handler thread waits on done."""
+
+    def __init__(self, cedula, timeout):
+        self.cedula = cedula
+        self.deadline = time.monotonic() + timeout
+        self.abandoned = False  # Client disconnected while queued
+        self.result = None
+        self.done = threading.Event()
+
+    def skip_reason(self):
+        """Why the lookup shouldn't be scraped anymore, or None."""
+        if self.abandoned:
+            return 'client disconnected'
+        if time.monotonic() >= self.deadline:
+            return 'deadline passed'
+        return None
+
+
+class Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        line = self.rfile.readline(MAX_REQUEST_BYTES)
+        if not line:
+            return  # Connect-only probe (_listening)
+        try:
+            request = json.loads(line)
+            lookup = Lookup(str(request['cedula']), float(request['timeout']))
+        except (ValueError, KeyError, TypeError):
+            self._answer({'status': 'parse_error', 'error': 'Invalid request'})
+            return
+        try:
+            self.server.lookups.put_nowait(lookup)
+        except queue.Full:
+            self._answer({'status': 'network_error', 'error': 'Scraper service busy'})
+            return
+        while not lookup.done.wait(DISCONNECT_POLL_SECONDS):
+            if self._client_gone():
+                lookup.abandoned = True
+                return
+        self._answer(lookup.result)
+
+    def _client_gone(self):
+        """True once the client closed its end (it sends nothing after the request)."""
+        readable, _, _ = select.select([self.connection], [], [], 0)
+        if not readable:
+            return False
+        try:
+            return not self.connection.recv(1, socket.MSG_PEEK)
+        except OSError:
+            return True
+
+    def _answer(self, result):
+        try:
+            self.wfile.write(json.dumps(result).encode() + b'\n')
+        except OSError:
+            logger.warning("scraper service: client left before the answer")
+
+
+class ScraperServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    Accepts lookups on a Unix socket; run() scrapes them in the calling thread.
+
+    Args:
+        path: Socket path; a stale socket file is replaced
+        queue_size: Lookups waiting at most before new ones are refused
+        recycle: Restart the browser after this many lookups (0: never)
+    """
+
+    daemon_threads = True
+
+    def __init__(self, path, queue_size=10, recycle=500):
+        self.path = path
+        self.lookups = queue.Queue(maxsize=queue_size)
+        self.recycle = recycle
+        self.scraped = 0
+        self.stopping = threading.Event()
+        if os.path.exists(path):
+            if _listening(path):
+                raise OSError(f'Another scraper service is listening on {path}')
+            os.unlink(path)
+        super().__init__(path, Handler)
+        os.chmod(path, 0o660)
+
+    def run(self):
+        """Serve until stop() is called; must run in the main thread."""
+        threading.Thread(target=self.serve_forever, name='scraper-accept', daemon=True).start()
+        logger.info("scraper service: listening on %s", self.path)
+        scraper = RegistraduriaScraper()
+        try:
+            while not self.stopping.is_set():
+                try:
+                    lookup = self.lookups.get(timeout=1)
+                except queue.Empty:
+                    continue
+                reason = lookup.skip_reason()
+                if reason:
+                    logger.warning("scraper service: dropped lookup of %s (%s)", lookup.cedula, reason)
+                    lookup.result = {'status': 'timeout', 'error': f'Lookup dropped: {reason}'}
+                    lookup.done.set()
+                    continue
+                close_old_connections()  # Metrics writes, as a django-q worker does
+                try:
+                    lookup.result = scraper.scrape_cedula(lookup.cedula)
+                except Exception as e:
+                    logger.exception("scraper service: lookup failed")
+                    lookup.result = {'status': 'network_error', 'error': str(e)}
+                    RegistraduriaScraper.close_browser()
+                lookup.done.set()
+                self.scraped += 1
+                if self.recycle and self.scraped % self.recycle == 0:
+                    logger.info("scraper service: restarting browser after %d lookups", self.scraped)
+                    RegistraduriaScraper.close_browser()
+        finally:
+            self.shutdown()
+            self.server_close()
+            os.unlink(self.path)
+            while not self.lookups.empty():
+                lookup = self.lookups.get_nowait()
+                lookup.result = {'status': 'network_error', 'error': 'Scraper service stopped'}
+                lookup.done.set()
+            RegistraduriaScraper.close_browser()
+            logger.info("scraper service: stopped after %d lookups", self.scraped)
+
+    def stop(self):
+        self.stopping.set()
+
+
+def _listening(path):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(path)
+        except OSError:
+            return False
+    return True
@@ -0,0 +1,49 @@
+"""
+Prefix search as index ranges, shared by the admin (admin.PrefixSearchMixin)
+and the referidos page (referrals.filter_referrals).
+
+LIKE 'term%' only uses an index on SQLite when the column's collation
+matches case_sensitive_like, and LIKE '%term%' never does. A prefix is
+instead searched as `column >= term AND column < next(term)`, which walks
+an index on the column, or on UPPER(column) for case-insensitive names
+(see the *_upper_idx indexes on CustomUser).
+"""
+from django.db.models import BooleanField, F, Func, Q
+from django.db.models.lookups import GreaterThanOrEqual, LessThan
+
+
+# Shorter search prefixes match too many rows to search them first (Selective)
+SELECTIVE_PREFIX_CHARS = 4
+
+
+class Selective(Func):
+    """
+    SQLite planner hint that a condition matches few rows (likelihood()).
+
+    Without it, SQLite prefers walking the index of the list's ORDER BY and
+    filtering every row over a range search of the condition plus a sort.
+    Other databases get the bare condition.
+    """
+
+    # The probability must be a literal, not a parameter
+    template = 'likelihood(%(expressions)s, 0.001)'
+    output_field = BooleanField()
+
+    def as_sql(self, compiler, connection, **extra_context):
+        return compiler.compile(self.source_expressions[0])
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return super().as_sql(compiler, connection, **extra_context)
+
+
+def prefix_range(expression, prefix):
+    """Q for expression (or field path) starting with prefix, as an index range."""
+    if isinstance(expression, str):
+        expression = F(expression)
+    upper_bound = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    return Q(GreaterThanOrEqual(expression, prefix)) & Q(LessThan(expression, upper_bound))
+
+
+def upper_name(term):
+    """Search term as stored by SQLite's UPPER(), which only folds ASCII letters."""
+    return ''.join(char.upper() if char.isascii() else char for char in term)
@@ -4,18 +4,31 @@ Signals for the accounts app.
 Signal handlers are registered in AccountsConfig.ready() via import.
 """
 import logging
+from collections import Counter
 from functools import partial
 
+from django.conf import settings
 from django.db import transaction
-from django.db.models.signals import post_save
-from django.dispatch import receiver
+from django.db.models import F, Q
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import Signal, receiver
 from django_q.tasks import async_task
 
+from . import downline
+from . import stats
+from .events import record_census_events
 from .models import CedulaInfo, CustomUser
 
 
 logger = logging.getLogger('django-q')
 
+# Sent after CedulaInfo.transition_to() commits a status change.
+# Kwargs: transitions - list of (user_id, old_status, new_status) tuples
+#         effective_transitions - the same changes in effective_status terms
+#             (a re-verification claim keeps the re-checked status)
+cedula_status_changed = Signal()
+
 
 @receiver(post_save, sender=CustomUser, dispatch_uid='queue_cedula_validation')
 def queue_cedula_validation(sender, instance, created, raw, **kwargs):
@@ -73,3 +86,148 @@ def _queue_validation_task(user_id):
         logger.info("Queued validate_cedula task %s for user_id=%s", task_id, user_id)
     except Exception as e:
         logger.error("Failed to queue validate_cedula for user_id=%s: %s", user_id, e, exc_info=True)
+
+
+def _adjust_referral_counts(referrer_id, delta, verified=False):
+    """Add delta to a referrer's counters (never below zero)."""
+    if referrer_id is None:
+        return
+    updates = {'referral_count': Greatest(F('referral_count') + delta, 0)}
+    if verified:
+        updates['verified_referral_count'] = Greatest(F('verified_referral_count') + delta, 0)
+    CustomUser.objects.filter(pk=referrer_id).update(**updates)
+
+
+def _is_verified(user_id):
+    """Return True if the user's cedula is ACTIVE in the census (or being re-verified from it)."""
+    return CedulaInfo.objects.alias(
+        effective=CedulaInfo.effective_status_expression(),
+    ).filter(user_id=user_id, effective=CedulaInfo.Status.ACTIVE).exists()
+
+
+@receiver(post_save, sender=CustomUser, dispatch_uid='update_referral_tree')
+def update_referral_tree(sender, instance, created, raw, **kwargs):
+    """
+    Keep referrer-derived data in sync with referred_by.
+
+    Maintains the referrer's referral_count/verified_referral_count and the
+    ReferralPath closure table, for new registrations and for later changes
+    to referred_by (e.g. from the admin, which moves the whole subtree).
+    """
+    if raw:
+        return
+
+    previous_id = getattr(instance, '_loaded_referred_by_id', None)
+    current_id = instance.referred_by_id
+
+    if created:
+        # New users start PENDING, so only the total changes
+        with transaction.atomic():
+            _adjust_referral_counts(current_id, 1)
+            downline.add_user(instance.pk, current_id)
+            stats.invalidate([instance.pk])
+    elif previous_id != current_id:
+        with transaction.atomic():
+            verified = _is_verified(instance.pk)
+            _adjust_referral_counts(previous_id, -1, verified=verified)
+            _adjust_referral_counts(current_id, 1, verified=verified)
+            stats.invalidate([instance.pk])  # Old upline
+            downline.move_subtree(instance.pk, current_id)
+            stats.invalidate([instance.pk])  # New upline
+        logger.info("Referrer of user %s changed: %s -> %s", instance.pk, previous_id, current_id)
+
+    instance._loaded_referred_by_id = current_id
+
+
+@receiver(pre_delete, sender=CustomUser, dispatch_uid='remove_from_referral_tree')
+def remove_from_referral_tree(sender, instance, **kwargs):
+    """Remove a deleted user from their referrer's counters and the closure table.
+
+    Runs before the CASCADE delete so the CedulaInfo status is still readable.
+    The deleted user's own referrals are detached by SET_NULL and keep their
+    counts; their subtrees become separate networks.
+    """
+    _adjust_referral_counts(instance.referred_by_id, -1, verified=_is_verified(instance.pk))
+    stats.invalidate([instance.pk])
+    downline.detach_subtree(instance.pk, include_self=True)
+
+
+@receiver(cedula_status_changed, dispatch_uid='update_verified_referral_counts')
+def update_verified_referral_counts(sender, transitions, effective_transitions=None, **kwargs):
+    """Adjust referrers' verified_referral_count when a cedula enters or leaves ACTIVE.
+
+    Works on effective statuses: claiming an ACTIVE row for re-verification
+    and its result or restore leave the count alone unless the result differs.
+    """
+    deltas = {}
+    for user_id, old_status, new_status in effective_transitions or transitions:
+        if old_status == new_status:
+            continue
+        if new_status == CedulaInfo.Status.ACTIVE:
+            deltas[user_id] = 1
+        elif old_status == CedulaInfo.Status.ACTIVE:
+            deltas[user_id] = -1
+
+    if not deltas:
+        return
+
+    per_referrer = Counter()
+    referrers = CustomUser.objects.filter(
+        id__in=deltas, referred_by__isnull=False
+    ).values_list('id', 'referred_by_id')
+    for user_id, referrer_id in referrers:
+        per_referrer[referrer_id] += deltas[user_id]
+
+    with transaction.atomic():
+        for referrer_id, delta in per_referrer.items():
+            if delta:
+                CustomUser.objects.filter(pk=referrer_id).update(
+                    verified_referral_count=Greatest(F('verified_referral_count') + delta, 0)
+                )
+
+
+@receiver(cedula_status_changed, dispatch_uid='push_census_events')
+def push_census_events(sender, transitions, **kwargs):
+    """Append status changes to the CensusEvent log for the SSE stream."""
+    if settings.CENSUS_EVENTS:
+        record_census_events(transitions)
+
+
+@receiver(cedula_status_changed, dispatch_uid='bump_census_versions')
+def bump_census_versions(sender, transitions, **kwargs):
+    """Bump census_version of each changed user and their referrer.
+
+    Invalidates ETags of census_section_view (own status) and
+    pending_referrals_view (referrals' statuses) with one UPDATE.
+    """
+    _bump_census_versions([user_id for user_id, _, _ in transitions])
+
+
+def _bump_census_versions(user_ids):
+    referrer_ids = CustomUser.objects.filter(pk__in=user_ids).values('referred_by')
+    CustomUser.objects.filter(
+        Q(pk__in=user_ids) | Q(pk__in=referrer_ids)
+    ).update(census_version=F('census_version') + 1)
+
+
+@receiver(cedula_status_changed, dispatch_uid='invalidate_network_stats')
+def invalidate_network_stats(sender, transitions, **kwargs):
+    """Drop cached network stats of everyone upline of the changed users."""
+    stats.invalidate({user_id for user_id, old, new in transitions if old != new})
+
+
+@receiver(post_save, sender=CedulaInfo, dispatch_uid='invalidate_stats_on_cedula_save')
+@receiver(post_delete, sender=CedulaInfo, dispatch_uid='invalidate_stats_on_cedula_delete')
+def invalidate_stats_on_cedula_change(sender, instance, raw=False, **kwargs):
+    """CedulaInfo writes outside transition_to() (creation, admin edits, deletes)."""
+    if raw:
+        return
+    stats.invalidate([instance.user_id])
+
+
+@receiver(post_save, sender=CedulaInfo, dispatch_uid='bump_census_versions_on_cedula_save')
+def bump_census_versions_on_save(sender, instance, created, raw, **kwargs):
+    """Invalidate polling ETags after a save() outside transition_to() (admin edits)."""
+    if created or raw:
+        return
+    _bump_census_versions([instance.user_id])
@@ -0,0 +1,155 @@
+"""
+SQLite connection profile and lock failure instrumentation.
+
+Pragmas are applied once per connection by the connection_created receiver
+below. With CONN_MAX_AGE (see settings.DATABASES) a connection is reused
+across requests, so this is once per long-lived connection, not per request.
+
+Profiles (settings.SQLITE_PROFILE):
+
+- safe: WAL journal and a 5s busy timeout (the previous behaviour)
+- tuned: safe plus synchronous=NORMAL (durable across application crashes;
+  only the last commits can be lost on power loss), a 64 MB page cache, a
+  256 MB memory map and in-memory temp tables
+
+Connections of the read-only alias (mode=ro, see routers.py) skip the
+pragmas that need write access and set query_only.
+
+Every connection also gets an execute wrapper that counts and times
+statements failing with "database is locked" (the busy timeout ran out
+waiting for the writer). Statements that waited on the busy handler and
+then succeeded are not counted: Python's sqlite3 module doesn't expose the
+busy handler, and a slow statement can't be told apart from one that
+waited. Counters are per process; see lock_failure_stats().
+
+estimated_rows() reads a table's row count from the planner statistics
+(sqlite_stat1, written by analyze()) instead of counting it. Nothing else
+refreshes them: tasks.analyze_database runs analyze() on the schedule
+installed by `python manage.py schedule_analyze`.
+"""
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import OperationalError, connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+logger = logging.getLogger('django-q')
+
+PROFILES = {
+    'safe': {
+        'journal_mode': 'WAL',
+        'busy_timeout': 5000,
+    },
+    'tuned': {
+        'journal_mode': 'WAL',
+        'busy_timeout': 5000,
+        'synchronous': 'NORMAL',
+        'cache_size': -64000,  # KiB
+        'mmap_size': 268435456,
+        'temp_store': 'MEMORY',
+    },
+}
+
+# Pragmas a mode=ro connection can't (or needn't) set
+WRITE_PRAGMAS = {'journal_mode', 'synchronous'}
+
+_lock = threading.Lock()
+_lock_failures = {}  # alias -> statements that failed with "database is locked"
+_lock_failure_seconds = {}  # alias -> time spent in those statements
+
+
+def profile_pragmas(read_only=False):
+    """Return the (pragma, value) pairs of settings.SQLITE_PROFILE."""
+    profile = getattr(settings, 'SQLITE_PROFILE', 'safe')
+    pragmas = PROFILES.get(profile)
+    if pragmas is None:
+        logger.warning("Unknown SQLITE_PROFILE %r, using 'safe'", profile)
+        pragmas = PROFILES['safe']
+    pragmas = [(name, value) for name, value in pragmas.items()
+               if not (read_only and name in WRITE_PRAGMAS)]
+    if read_only:
+        pragmas.append(('query_only', 'ON'))
+    return pragmas
+
+
+def is_read_only(connection):
+    """True for connections opened with mode=ro."""
+    return 'mode=ro' in str(connection.settings_dict['NAME'])
+
+
+def _count_lock_failures(alias):
+    """Execute wrapper recording "database is locked" failures for alias."""
+    def wrapper(execute, sql, params, many, context):
+        started = time.monotonic()
+        try:
+            return execute(sql, params, many, context)
+        except OperationalError as e:
+            if 'database is locked' in str(e):
+                elapsed = time.monotonic() - started
+                with _lock:
+                    _lock_failures[alias] = _lock_failures.get(alias, 0) + 1
+                    _lock_failure_seconds[alias] = _lock_failure_seconds.get(alias, 0.0) + elapsed
+                logger.warning("SQLite %s: database is locked after %.1fs: %s",
+                               alias, elapsed, sql[:200])
+            raise
+    wrapper.counts_lock_failures = True
+    return wrapper
+
+
+def lock_failure_stats():
+    """Return {alias: {'failures': n, 'seconds': s}} for this process."""
+    with _lock:
+        return {
+            alias: {'failures': count, 'seconds': _lock_failure_seconds.get(alias, 0.0)}
+            for alias, count in _lock_failures.items()
+        }
+
+
+def analyze(using='default'):
+    """Refresh the planner statistics (sqlite_stat1) of every table."""
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+
+
+def estimated_rows(model, using='default'):
+    """
+    Row count of model's table as of the last ANALYZE.
+
+    Returns:
+        int, or None when the database isn't SQLite or has no statistics
+        for the table
+    """
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'")
+        if cursor.fetchone() is None:
+            return None
+        # One row per index; its first number is the rows in the index
+        cursor.execute('SELECT stat FROM sqlite_stat1 WHERE tbl = %s', [model._meta.db_table])
+        counts = [int(stat.split()[0]) for stat, in cursor.fetchall() if stat]
+    return max(counts) if counts else None
+
+
+@receiver(connection_created, dispatch_uid='configure_sqlite_connection')
+def configure_sqlite_connection(sender, connection, **kwargs):
+    """Apply the SQLite profile to a new connection and instrument it."""
+    if connection.vendor != 'sqlite':
+        return
+
+    read_only = is_read_only(connection)
+    with connection.cursor() as cursor:
+        for name, value in profile_pragmas(read_only):
+            cursor.execute(f'PRAGMA {name}={value};')
+
+    # The wrapper object outlives reconnects; install it only once
+    if not any(getattr(w, 'counts_lock_failures', False) for w in connection.execute_wrappers):
+        connection.execute_wrappers.append(_count_lock_failures(connection.alias))
@@ -0,0 +1,79 @@
+"""
+Per-user dashboard stats cache.
+
+The referidos page shows census status totals per level of a leader's
+network (downline.level_summary(), a GROUP BY over the whole downline).
+The result is cached per user in the 'stats' cache and deleted when
+anything it counts changes:
+
+- a cedula status transition (cedula_status_changed)
+- a CedulaInfo saved or deleted outside transition_to() (e.g. the admin)
+- a user registered, deleted or moved to another referrer
+- a bulk import (importer.py) or a closure table rebuild
+
+Each change deletes the entries of the affected users' whole upline (one
+ReferralPath query), after the transaction commits so a concurrent request
+can't cache the old numbers again. Hit/miss counters come from
+CountingCacheMixin (see cache.py).
+"""
+import logging
+
+from django.core.cache import caches
+from django.db import transaction
+
+from . import downline
+from .models import ReferralPath
+
+
+logger = logging.getLogger('django-q')
+
+STATS_CACHE = 'stats'
+
+
+def _key(user_id):
+    return f'network_summary:{user_id}'
+
+
+def network_summary(user_id):
+    """
+    Census status totals of a user's downline, cached.
+
+    Returns:
+        dict with levels (downline.level_summary() rows), total and verified
+    """
+    cache = caches[STATS_CACHE]
+    summary = cache.get(_key(user_id))
+    if summary is None:
+        levels = downline.level_summary(user_id)
+        summary = {
+            'levels': levels,
+            'total': sum(level['total'] for level in levels),
+            'verified': sum(level['verified'] for level in levels),
+        }
+        cache.set(_key(user_id), summary)
+    return summary
+
+
+def upline_ids(user_ids):
+    """Return the users whose network contains any of user_ids (themselves included)."""
+    return set(
+        ReferralPath.objects.filter(descendant_id__in=user_ids)
+        .values_list('ancestor_id', flat=True)
+    )
+
+
+def invalidate(user_ids):
+    """Delete cached stats of user_ids' upline once the transaction commits.
+
+    The upline is read now, so call this before paths are removed.
+    """
+    user_ids = list(user_ids)
+    if not user_ids:
+        return
+    keys = [_key(user_id) for user_id in upline_ids(user_ids) | set(user_ids)]
+    transaction.on_commit(lambda: caches[STATS_CACHE].delete_many(keys))
+
+
+def clear():
+    """Drop all cached stats (after bulk rebuilds that bypass signals)."""
+    caches[STATS_CACHE].clear()
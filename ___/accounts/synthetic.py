@@ -0,0 +1,235 @@
+"""
+Synthetic production-scale data for load testing (generate_dataset command).
+
+generate() writes users, CedulaInfo rows and the referral closure table
+with bulk_create, in batches of one transaction each; signals don't run,
+so no validation tasks are queued. The shape follows the real site:
+
+- a few leaders at the roots, each growing a network
+- most users refer nobody, a few refer many: a new user's referrer is
+  often one of the latest users (recruiting chains that make the trees
+  deep), otherwise picked in proportion to the referrals they already
+  have (preferential attachment: the big recruiters keep growing)
+- depth is capped at max_depth levels below the roots
+- census statuses mixed per STATUS_WEIGHTS, registration dates spread
+  over the last DAYS days, voting locations for ACTIVE rows
+
+Every synthetic user shares one password and has an email at
+SYNTHETIC_DOMAIN, so load tests can log in as them and they are easy to
+find. Cedulas are consecutive from `start` (default 9000000000, outside
+the range of real cedulas).
+
+Run with the qcluster stopped: refreshing synthetic users would send their
+fake cedulas to the Registraduria.
+"""
+import random
+from array import array
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from . import sqlite
+from .models import CedulaInfo, CustomUser, ReferralPath
+
+
+SYNTHETIC_DOMAIN = 'sintetico.invalid'
+DEFAULT_PASSWORD = 'carga-sintetica'
+DEFAULT_START = 9000000000
+DAYS = 90
+
+# Relative frequency of each census status
+STATUS_WEIGHTS = {
+    CedulaInfo.Status.ACTIVE: 70,
+    CedulaInfo.Status.NOT_FOUND: 8,
+    CedulaInfo.Status.PENDING: 6,
+    CedulaInfo.Status.ERROR: 5,
+    CedulaInfo.Status.TIMEOUT: 3,
+    CedulaInfo.Status.PROCESSING: 2,
+    CedulaInfo.Status.CANCELLED_DECEASED: 2,
+    CedulaInfo.Status.CANCELLED_OTHER: 2,
+    CedulaInfo.Status.BLOCKED: 1,
+}
+
+# Chance that a new user is referred by one of the latest RECENT_WINDOW users
+CHAIN_PROBABILITY = 0.3
+RECENT_WINDOW = 50
+
+# Users with at least this many direct referrals become leaders
+LEADER_MIN_REFERRALS = 5
+
+DEPARTAMENTOS = {
+    'ANTIOQUIA': ['MEDELLIN', 'BELLO', 'ITAGUI', 'ENVIGADO', 'RIONEGRO'],
+    'BOGOTA D.C.': ['BOGOTA D.C.'],
+    'VALLE': ['CALI', 'PALMIRA', 'BUENAVENTURA', 'TULUA'],
+    'ATLANTICO': ['BARRANQUILLA', 'SOLEDAD', 'MALAMBO'],
+    'SANTANDER': ['BUCARAMANGA', 'FLORIDABLANCA', 'GIRON'],
+    'BOLIVAR': ['CARTAGENA', 'MAGANGUE'],
+}
+
+
+class TreeBuilder:
+    """Picks referrers and tracks depth/parents of the generated users (by index)."""
+
+    def __init__(self, rng, leaders, max_depth):
+        self.rng = rng
+        self.leaders = leaders
+        self.max_depth = max_depth
+        self.parent = array('l')  # Index of the referrer, -1 for roots
+        self.depth = array('b')
+        # Every user once plus every referrer once per referral, so a
+        # uniform pick from it favours users who already refer many
+        self.weighted = array('l')
+
+    def add(self):
+        """Add a user; return (index, parent index or -1)."""
+        index = len(self.parent)
+        if index < self.leaders:
+            parent = -1
+        else:
+            if self.rng.random() < CHAIN_PROBABILITY:
+                parent = index - 1 - min(index - 1, int(self.rng.expovariate(1 / RECENT_WINDOW)))
+            else:
+                parent = self.weighted[self.rng.randrange(len(self.weighted))]
+            while self.depth[parent] >= self.max_depth:
+                parent = self.parent[parent]
+            self.weighted.append(parent)
+        self.parent.append(parent)
+        self.depth.append(0 if parent < 0 else self.depth[parent] + 1)
+        self.weighted.append(index)
+        return index, parent
+
+    def ancestors(self, index):
+        """Yield (ancestor index, depth) from the user itself up to its root."""
+        depth = 0
+        while index >= 0:
+            yield index, depth
+            index = self.parent[index]
+            depth += 1
+
+
+def _referral_code(number):
+    # 'SY' + 6 base-36 digits of the user id: unique across runs, and the
+    # fixed width makes string order numeric order
+    digits = ''
+    for _ in range(6):
+        number, rest = divmod(number, 36)
+        digits = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'[rest] + digits
+    return 'SY' + digits
+
+
+def _cedula_info(rng, user_id, joined, now):
+    status = rng.choices(list(STATUS_WEIGHTS), weights=list(STATUS_WEIGHTS.values()))[0]
+    if status in (CedulaInfo.Status.PENDING, CedulaInfo.Status.PROCESSING):
+        changed_at = now  # In flight right now
+    else:
+        changed_at = joined + (now - joined) * rng.random()
+    info = CedulaInfo(user_id=user_id, status=status, created_at=joined,
+                      status_changed_at=changed_at)
+    if status not in (CedulaInfo.Status.PENDING, CedulaInfo.Status.PROCESSING):
+        info.fetched_at = changed_at
+    if status in CedulaInfo.RESULT_STATUSES:
+        info.last_result_at = changed_at
+    if status == CedulaInfo.Status.ACTIVE:
+        departamento = rng.choice(list(DEPARTAMENTOS))
+        municipio = rng.choice(DEPARTAMENTOS[departamento])
+        info.departamento = departamento
+        info.municipio = municipio
+        info.puesto = f'PUESTO {rng.randint(1, 40):02d}'
+        info.direccion = f'CALLE {rng.randint(1, 200)} # {rng.randint(1, 99)}-{rng.randint(1, 99)}'
+        info.mesa = str(rng.randint(1, 30))
+    elif status in (CedulaInfo.Status.ERROR, CedulaInfo.Status.TIMEOUT, CedulaInfo.Status.BLOCKED):
+        info.error_message = 'After 3 attempts: timeout - synthetic'
+        info.retry_count = 3
+    return info
+
+
+def generate(users, leaders=20, max_depth=10, start=DEFAULT_START, batch_size=5000,
+             password=DEFAULT_PASSWORD, seed=None, progress=None):
+    """
+    Create a synthetic dataset.
+
+    Args:
+        users: Number of users, leaders included
+        leaders: Number of root leaders
+        max_depth: Deepest referral level below a root
+        start: First cedula (must not be taken)
+        batch_size: Users per bulk insert transaction
+        password: Raw password of every synthetic user
+        seed: Random seed for a reproducible dataset
+        progress: Optional callable(created) called after each batch
+
+    Returns:
+        dict with users, paths (ReferralPath rows) and the first/last cedula
+
+    Raises:
+        ValueError: A referral code of the new users' id range is taken
+    """
+    first_id = (CustomUser.objects.aggregate(Max('id'))['id__max'] or 0) + 1
+    first_code, last_code = _referral_code(first_id), _referral_code(first_id + users - 1)
+    if CustomUser.objects.filter(referral_code__gte=first_code, referral_code__lte=last_code).exists():
+        raise ValueError(f'Referral codes {first_code}-{last_code} are already in use')
+
+    rng = random.Random(seed)
+    tree = TreeBuilder(rng, leaders, max_depth)
+    password_hash = make_password(password)
+    now = timezone.now()
+    paths_written = 0
+
+    for batch_start in range(0, users, batch_size):
+        batch_users, infos, paths = [], [], []
+        for _ in range(min(batch_size, users - batch_start)):
+            index, parent = tree.add()
+            user_id = first_id + index
+            cedula = str(start + index)
+            # Older users first, so referrers registered before their referrals
+            joined = now - timedelta(days=DAYS) * (1 - index / users)
+            batch_users.append(CustomUser(
+                id=user_id,
+                username=cedula,
+                cedula=cedula,
+                email=f'{cedula}@{SYNTHETIC_DOMAIN}',
+                nombre_completo=f'Persona Sintetica {index}',
+                phone=f'3{rng.randrange(10 ** 9):09d}',
+                referral_code=_referral_code(user_id),
+                referred_by_id=first_id + parent if parent >= 0 else None,
+                role=CustomUser.Role.LEADER if parent < 0 else CustomUser.Role.USER,
+                password=password_hash,
+                data_policy_accepted=True,
+                date_joined=joined,
+            ))
+            infos.append(_cedula_info(rng, user_id, joined, now))
+            paths.extend(
+                ReferralPath(ancestor_id=first_id + ancestor, descendant_id=user_id, depth=depth)
+                for ancestor, depth in tree.ancestors(index)
+            )
+        with transaction.atomic():
+            CustomUser.objects.bulk_create(batch_users, batch_size=1000)
+            CedulaInfo.objects.bulk_create(infos, batch_size=1000)
+            ReferralPath.objects.bulk_create(paths, batch_size=1000)
+        paths_written += len(paths)
+        if progress:
+            progress(batch_start + len(batch_users))
+
+    return {
+        'users': users,
+        'paths': paths_written,
+        'first_cedula': str(start),
+        'last_cedula': str(start + users - 1),
+    }
+
+
+def promote_leaders(min_referrals=LEADER_MIN_REFERRALS):
+    """Make synthetic users with many direct referrals leaders (after counts are rebuilt)."""
+    return CustomUser.objects.filter(
+        email__endswith=f'@{SYNTHETIC_DOMAIN}',
+        referral_count__gte=min_referrals,
+        role=CustomUser.Role.USER,
+    ).update(role=CustomUser.Role.LEADER)
+
+
+def analyze():
+    """Refresh SQLite's planner statistics (sqlite_stat1) after a bulk load."""
+    sqlite.analyze()
@@ -3,16 +3,22 @@ Background tasks for the accounts app.
 
 Tasks are executed by Django-Q2 qcluster worker process.
 Run worker: python manage.py qcluster
+
+With SCRAPER_SOCKET set, scrapes are sent to the scraper service
+(python manage.py run_scraper_service) instead of a browser in the worker.
 """
 import logging
 import os
+import time
 from datetime import timedelta
 
+from django.conf import settings
 from django.utils import timezone
-from django_q.tasks import schedule
+from django_q.tasks import async_task, schedule
 
-from .models import CedulaInfo, CustomUser
-from .scraper import RegistraduriaScraper
+from . import metrics, reverify, scraper_service, sqlite
+from .models import CedulaInfo, CustomUser, ValidationBatch
+from .scraper import MAX_SCRAPE_SECONDS, RegistraduriaScraper
 
 # Allow sync database operations in async context (Playwright's sync API runs an event loop)
 # This is safe for background workers - the check is meant to prevent blocking in web requests
@@ -28,6 +34,14 @@ MAX_ATTEMPTS = 3
 # Status codes that should NOT trigger retry (permanent results)
 PERMANENT_STATUSES = {'found', 'not_found', 'cancelled'}
 
+# Seconds a task run may spend before django-q kills it at
+# Q_CLUSTER['timeout']; the margin covers the database writes after a scrape
+TASK_SECONDS = settings.Q_CLUSTER['timeout'] - 15
+if MAX_SCRAPE_SECONDS > TASK_SECONDS:
+    logger.warning("A scrape may take %ds, more than the %ds a task run has "
+                   "(SCRAPER_ACTION_TIMEOUT_MS vs Q_CLUSTER['timeout'])",
+                   MAX_SCRAPE_SECONDS, TASK_SECONDS)
+
 
 def echo_test(message):
     """Simple test task to verify Django-Q2 is working.
@@ -51,6 +65,7 @@ def validate_cedula(user_id, attempt=1):
         user_id: CustomUser.id to validate
         attempt: Current attempt number (1-based, max 3)
     """
+    deadline = time.monotonic() + TASK_SECONDS
     try:
         user = CustomUser.objects.get(id=user_id)
         cedula_info = user.cedula_info
@@ -61,20 +76,155 @@ def validate_cedula(user_id, attempt=1):
         logger.error("validate_cedula: CedulaInfo not found for user %s", user_id)
         return
 
-    # Update status to PROCESSING (browser actively running)
-    cedula_info.status = CedulaInfo.Status.PROCESSING
-    cedula_info.save(update_fields=['status'])
+    # Claim the row as PROCESSING (browser actively running). Views already
+    # set PROCESSING when a refresh is triggered, so only write if needed.
+    if cedula_info.status != CedulaInfo.Status.PROCESSING:
+        if not cedula_info.transition_to(CedulaInfo.Status.PROCESSING):
+            logger.warning("validate_cedula: User %s claimed by another writer, skipping",
+                           user_id)
+            return
 
     logger.info("validate_cedula: User %s (cedula=%s), attempt %d/%d",
                 user_id, user.cedula, attempt, MAX_ATTEMPTS)
 
-    # Run scraper
-    scraper = RegistraduriaScraper()
-    result = scraper.scrape_cedula(user.cedula)
+    result = _scrape(user.cedula, deadline)
+    if not _apply_result(cedula_info, result):
+        # Retriable error: timeout, network_error, captcha_failed, parse_error, blocked
+        _handle_retriable_error(cedula_info, result, user_id, attempt)
 
-    # Process result based on status
-    status = result.get('status')
 
+def validate_cedula_batch(batch_id):
+    """
+    Validate many cedulas claimed as PROCESSING by a bulk refresh, or
+    created PENDING by a bulk import (importer.py).
+
+    Each run validates one user (same path as validate_cedula, including
+    per-user retries), so a run's worst case is one scrape, below the
+    Q_CLUSTER timeout. The rest is re-enqueued as a new batch task *before*
+    scraping: a run killed anyway only loses its own user, never the queue
+    behind it. The queue is the batch's PENDING/PROCESSING rows in user id
+    order, so a run only reads the next one, beats the batch's heartbeat
+    (which keeps the others from being reset as stale while they wait,
+    CedulaInfo.BATCH_TIMEOUT_MINUTES) and passes the batch id on. The user
+    being validated leaves the batch and gets the normal stale timeouts.
+
+    Args:
+        batch_id: ValidationBatch id
+    """
+    now = timezone.now()
+    if not ValidationBatch.objects.filter(pk=batch_id).update(heartbeat_at=now):
+        logger.info("validate_cedula_batch: batch %s no longer exists", batch_id)
+        return
+
+    user_id = CedulaInfo.objects.filter(
+        batch_id=batch_id,
+        status__in=[CedulaInfo.Status.PENDING, CedulaInfo.Status.PROCESSING],
+    ).order_by('user_id').values_list('user_id', flat=True).first()
+    if user_id is None:
+        ValidationBatch.objects.filter(pk=batch_id).delete()
+        logger.info("validate_cedula_batch: batch %s done", batch_id)
+        return
+
+    # Heartbeat, not a transition: the stale timeout restarts now
+    CedulaInfo.objects.filter(user_id=user_id).update(batch=None, status_changed_at=now)
+    task_id = async_task(
+        'accounts.tasks.validate_cedula_batch',
+        batch_id,
+        task_name=f'validate_cedula_batch_{batch_id}_{user_id}',
+    )
+    logger.info("validate_cedula_batch: batch %s validating user %s, re-queued as %s",
+                batch_id, user_id, task_id)
+
+    validate_cedula(user_id, 1)
+
+
+def reverify_tick():
+    """
+    Re-verify the oldest due ACTIVE/NOT_FOUND rows (see reverify.py).
+
+    Runs on the schedule installed by the schedule_reverification command.
+    Does nothing while other tasks wait in the queue and stops between two
+    scrapes as soon as one is queued, so registrations and refreshes never
+    wait behind re-verification. A failed scrape is not retried: the row
+    gets its previous status back with a new fetched_at, so its last
+    result stays visible and it is tried again after REVERIFY_AFTER_DAYS.
+    """
+    started = time.monotonic()
+    if reverify.interactive_work_waiting():
+        logger.info("reverify_tick: interactive work queued, skipping")
+        return
+
+    plan = reverify.quota(reverify.due_rows().count())
+    logger.info("reverify_tick: %(quota)d rows (pace %(pace)d, capacity %(capacity)d "
+                "at %(scrape_seconds).0fs/scrape)", plan)
+
+    done = 0
+    for cedula_info in reverify.oldest_due(plan['quota']):
+        # Within the tick's share, and only while a worst-case scrape still
+        # ends before the task timeout
+        if time.monotonic() - started > plan['budget_seconds'] or reverify.interactive_work_waiting():
+            break
+        previous = cedula_info.status
+        # Claim only if nobody refreshed the row since it was read; a stale
+        # reset of the claim restores previous (reverify_from)
+        if not cedula_info.transition_to(CedulaInfo.Status.PROCESSING, reverify_from=previous):
+            continue
+
+        result = _scrape(cedula_info.user.cedula, started + TASK_SECONDS)
+        if not _apply_result(cedula_info, result):
+            cedula_info.transition_to(
+                previous,
+                fetched_at=timezone.now(),
+                last_result_at=cedula_info.last_result_at,
+            )
+            logger.warning("reverify_tick: %s for %s, keeping %s",
+                           result.get('status'), cedula_info.user.cedula, previous)
+        done += 1
+
+    logger.info("reverify_tick: re-verified %d rows", done)
+
+
+def analyze_database():
+    """
+    Refresh SQLite's planner statistics (sqlite.analyze()).
+
+    Runs hourly on the schedule installed by the schedule_analyze command.
+    The query planner and the admin's row estimates
+    (admin.EstimatedCountPaginator) read them; without it they stay as old
+    as the last manual ANALYZE.
+    """
+    started = time.monotonic()
+    sqlite.analyze()
+    logger.info("analyze_database: statistics refreshed in %.1fs", time.monotonic() - started)
+
+
+def _scrape(cedula, deadline):
+    """
+    Scrape one cedula, through the scraper service if configured, and record its metrics.
+
+    Args:
+        cedula: Cedula to look up
+        deadline: time.monotonic() by which the task run must be done; the
+            scraper service gives up on the lookup then
+    """
+    started = time.monotonic()
+    if settings.SCRAPER_SOCKET:
+        result = scraper_service.request(cedula, deadline - started)
+    else:
+        result = RegistraduriaScraper().scrape_cedula(cedula)
+    metrics.increment('scraper_results_total', status=result.get('status'))
+    metrics.observe('scraper_duration_seconds', time.monotonic() - started)
+    return result
+
+
+def _apply_result(cedula_info, result):
+    """
+    Store a permanent scraper result.
+
+    Returns:
+        False for a retriable error (nothing written), True otherwise
+    """
+    status = result.get('status')
     if status == 'found':
         _handle_found(cedula_info, result)
     elif status == 'not_found':
@@ -82,31 +232,35 @@ def validate_cedula(user_id, attempt=1):
     elif status == 'cancelled':
         _handle_cancelled(cedula_info, result)
     else:
-        # Retriable error: timeout, network_error, captcha_failed, parse_error, blocked
-        _handle_retriable_error(cedula_info, result, user_id, attempt)
+        return False
+    return True
 
 
 def _handle_found(cedula_info, result):
     """Update CedulaInfo with voting location data."""
-    cedula_info.status = CedulaInfo.Status.ACTIVE
-    cedula_info.departamento = result.get('departamento') or ''
-    cedula_info.municipio = result.get('municipio') or ''
-    cedula_info.puesto = result.get('puesto') or ''
-    cedula_info.direccion = result.get('direccion') or ''
-    cedula_info.mesa = result.get('mesa') or ''
-    cedula_info.fetched_at = timezone.now()
-    cedula_info.error_message = ''
-    cedula_info.save()
-    logger.info("validate_cedula: FOUND - %s", cedula_info.user.cedula)
+    applied = cedula_info.transition_to(
+        CedulaInfo.Status.ACTIVE,
+        departamento=result.get('departamento') or '',
+        municipio=result.get('municipio') or '',
+        puesto=result.get('puesto') or '',
+        direccion=result.get('direccion') or '',
+        mesa=result.get('mesa') or '',
+        fetched_at=timezone.now(),
+        error_message='',
+    )
+    if applied:
+        logger.info("validate_cedula: FOUND - %s", cedula_info.user.cedula)
 
 
 def _handle_not_found(cedula_info):
     """Update CedulaInfo as not found in census."""
-    cedula_info.status = CedulaInfo.Status.NOT_FOUND
-    cedula_info.fetched_at = timezone.now()
-    cedula_info.error_message = ''
-    cedula_info.save()
-    logger.info("validate_cedula: NOT_FOUND - %s", cedula_info.user.cedula)
+    applied = cedula_info.transition_to(
+        CedulaInfo.Status.NOT_FOUND,
+        fetched_at=timezone.now(),
+        error_message='',
+    )
+    if applied:
+        logger.info("validate_cedula: NOT_FOUND - %s", cedula_info.user.cedula)
 
 
 def _handle_cancelled(cedula_info, result):
@@ -114,17 +268,20 @@ def _handle_cancelled(cedula_info, result):
     # Determine if deceased or other cancellation
     novedad = result.get('novedad') or ''
     if 'FALLECIDO' in novedad.upper() or 'MUERTE' in novedad.upper():
-        cedula_info.status = CedulaInfo.Status.CANCELLED_DECEASED
+        status = CedulaInfo.Status.CANCELLED_DECEASED
     else:
-        cedula_info.status = CedulaInfo.Status.CANCELLED_OTHER
+        status = CedulaInfo.Status.CANCELLED_OTHER
 
-    cedula_info.novedad = novedad
-    cedula_info.resolucion = result.get('resolucion') or ''
-    cedula_info.fecha_novedad = result.get('fecha_novedad') or ''
-    cedula_info.fetched_at = timezone.now()
-    cedula_info.error_message = ''
-    cedula_info.save()
-    logger.info("validate_cedula: CANCELLED - %s", cedula_info.user.cedula)
+    applied = cedula_info.transition_to(
+        status,
+        novedad=novedad,
+        resolucion=result.get('resolucion') or '',
+        fecha_novedad=result.get('fecha_novedad') or '',
+        fetched_at=timezone.now(),
+        error_message='',
+    )
+    if applied:
+        logger.info("validate_cedula: CANCELLED - %s", cedula_info.user.cedula)
 
 
 def _handle_retriable_error(cedula_info, result, user_id, attempt):
@@ -137,10 +294,15 @@ def _handle_retriable_error(cedula_info, result, user_id, attempt):
         delay_seconds = RETRY_DELAYS[attempt - 1]  # 0-indexed: [60, 300, 900]
         next_run = timezone.now() + timedelta(seconds=delay_seconds)
 
-        # Update status and retry count
-        cedula_info.retry_count = attempt
-        cedula_info.error_message = f"Attempt {attempt}: {error_status} - {error_msg}"
-        cedula_info.save(update_fields=['retry_count', 'error_message'])
+        # Update retry count (status stays PROCESSING)
+        applied = cedula_info.transition_to(
+            CedulaInfo.Status.PROCESSING,
+            retry_count=attempt,
+            error_message=f"Attempt {attempt}: {error_status} - {error_msg}",
+        )
+        if not applied:
+            # Row was reset or refreshed meanwhile - that writer owns it now
+            return
 
         logger.warning(
             "validate_cedula: %s on attempt %d, scheduling retry in %ds for user %s",
@@ -165,17 +327,20 @@ def _mark_as_error(cedula_info, error_status, error_msg, raw_html=None):
     """Mark CedulaInfo as ERROR after all retries exhausted."""
     # Map scraper status to CedulaInfo.Status
     if error_status == 'timeout':
-        cedula_info.status = CedulaInfo.Status.TIMEOUT
+        status = CedulaInfo.Status.TIMEOUT
     elif error_status == 'blocked':
-        cedula_info.status = CedulaInfo.Status.BLOCKED
+        status = CedulaInfo.Status.BLOCKED
     else:
-        cedula_info.status = CedulaInfo.Status.ERROR
+        status = CedulaInfo.Status.ERROR
 
-    cedula_info.retry_count = MAX_ATTEMPTS
-    cedula_info.error_message = f"After {MAX_ATTEMPTS} attempts: {error_msg}"
-    cedula_info.fetched_at = timezone.now()
+    fields = {
+        'retry_count': MAX_ATTEMPTS,
+        'error_message': f"After {MAX_ATTEMPTS} attempts: {error_msg}",
+        'fetched_at': timezone.now(),
+    }
     if raw_html:
-        cedula_info.raw_response = raw_html
-    cedula_info.save()
-    logger.error("validate_cedula: ERROR after max attempts - %s",
-                 cedula_info.user.cedula)
+        fields['raw_response'] = raw_html
+
+    if cedula_info.transition_to(status, **fields):
+        logger.error("validate_cedula: ERROR after max attempts - %s",
+                     cedula_info.user.cedula)
@@ -0,0 +1,116 @@
+"""
+Generated dataset for the performance regression tests.
+
+build_dataset(size) creates one leader with `size` direct referrals, each
+with one referral of their own (a two-level network of 2 * size users),
+CedulaInfo rows cycling through every status (ACTIVE rows get a voting
+location, every row last changed an hour ago), plus a second leader with one referral to exercise rankings and
+permission checks.
+
+Rows are bulk-inserted, so signals don't run; the closure table and
+referral counters are rebuilt afterwards exactly as the maintenance
+commands do.
+
+The size comes from the PERF_DATASET_SIZE environment variable:
+
+    PERF_DATASET_SIZE=5000 python manage.py test accounts
+"""
+import io
+import itertools
+import os
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.utils import timezone
+
+from accounts.downline import rebuild_paths
+from accounts.models import CedulaInfo, CustomUser
+
+
+DEFAULT_SIZE = 120
+PASSWORD = 'prueba-rendimiento'
+
+DEPARTAMENTOS = ['ANTIOQUIA', 'BOGOTA D.C.', 'VALLE', 'ATLANTICO']
+
+
+def dataset_size():
+    """Return PERF_DATASET_SIZE, or DEFAULT_SIZE if unset or invalid."""
+    try:
+        return max(1, int(os.environ.get('PERF_DATASET_SIZE', DEFAULT_SIZE)))
+    except ValueError:
+        return DEFAULT_SIZE
+
+
+def _user(number, referred_by=None, role=CustomUser.Role.USER, password='!'):
+    cedula = str(10000000 + number)
+    return CustomUser(
+        username=cedula,
+        cedula=cedula,
+        nombre_completo=f'Persona {number}',
+        phone=f'300{number:07d}',
+        referral_code=f'R{number:07d}',
+        referred_by=referred_by,
+        role=role,
+        password=password,
+    )
+
+
+def _cedula_info(user_id, status, number):
+    # Old enough to be past refresh cooldowns; PENDING/PROCESSING rows are
+    # stale, so the first page loads also exercise the stale reset path
+    changed_at = timezone.now() - timedelta(hours=1)
+    info = CedulaInfo(user_id=user_id, status=status, created_at=changed_at,
+                      status_changed_at=changed_at)
+    if status == CedulaInfo.Status.ACTIVE:
+        departamento = DEPARTAMENTOS[number % len(DEPARTAMENTOS)]
+        info.departamento = departamento
+        info.municipio = f'{departamento} {number % 7}'
+        info.puesto = f'Puesto {number % 11}'
+        info.mesa = str(number % 5 + 1)
+    elif status in (CedulaInfo.Status.ERROR, CedulaInfo.Status.TIMEOUT):
+        info.error_message = 'Prueba'
+    return info
+
+
+def build_dataset(size=None):
+    """
+    Create the dataset and return its key users.
+
+    Returns:
+        dict with leader, other_leader, referral (a direct referral of
+        leader) and deep_referral (second level) CustomUser instances
+    """
+    size = size or dataset_size()
+    password = make_password(PASSWORD)
+
+    leader, other_leader = CustomUser.objects.bulk_create([
+        _user(0, role=CustomUser.Role.LEADER, password=password),
+        _user(1, role=CustomUser.Role.LEADER, password=password),
+    ])
+    direct = CustomUser.objects.bulk_create(
+        [_user(2 + i, referred_by=leader) for i in range(size)],
+        batch_size=1000,
+    )
+    second = CustomUser.objects.bulk_create(
+        [_user(2 + size + i, referred_by=direct[i]) for i in range(size)]
+        + [_user(2 + 2 * size, referred_by=other_leader)],
+        batch_size=1000,
+    )
+
+    statuses = itertools.cycle(CedulaInfo.Status.values)
+    CedulaInfo.objects.bulk_create(
+        [_cedula_info(user.pk, CedulaInfo.Status.ACTIVE, 0) for user in (leader, other_leader)]
+        + [_cedula_info(user.pk, next(statuses), n) for n, user in enumerate(direct + second)],
+        batch_size=1000,
+    )
+
+    rebuild_paths()
+    call_command('rebuild_referral_counts', stdout=io.StringIO())
+
+    return {
+        'leader': CustomUser.objects.get(pk=leader.pk),
+        'other_leader': CustomUser.objects.get(pk=other_leader.pk),
+        'referral': CustomUser.objects.get(pk=direct[0].pk),
+        'deep_referral': CustomUser.objects.get(pk=second[0].pk),
+    }
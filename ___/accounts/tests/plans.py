@@ -0,0 +1,95 @@
+"""
+Query capture and SQLite EXPLAIN QUERY PLAN checks for the test suite.
+"""
+import re
+
+from django.db import connection
+
+
+# Tables that grow with the number of users; scanning them is a regression
+LARGE_TABLES = {
+    'accounts_customuser',
+    'accounts_cedulainfo',
+    'accounts_referralpath',
+    'accounts_censusevent',
+}
+
+EXPLAINABLE = ('SELECT', 'UPDATE', 'DELETE')
+
+_TABLE_ALIAS = re.compile(r'(?:FROM|JOIN|UPDATE)\s+"(\w+)"(?:\s+(?:AS\s+)?"?(\w+)"?)?', re.IGNORECASE)
+# 'SCAN <table>', or 'SCAN TABLE <table>' before SQLite 3.36
+_SCAN = re.compile(r'^SCAN (?:TABLE )?(\w+)')
+
+
+class QueryRecorder:
+    """
+    Record every SQL statement (with parameters) run on the default database.
+
+    Usage:
+        with QueryRecorder() as recorder:
+            client.get(url)
+        recorder.queries  # [(sql, params), ...]
+    """
+
+    def __init__(self):
+        self.queries = []
+        self._wrapper = None
+
+    def __call__(self, execute, sql, params, many, context):
+        if not many:
+            self.queries.append((sql, params))
+        return execute(sql, params, many, context)
+
+    def __enter__(self):
+        self._wrapper = connection.execute_wrapper(self)
+        self._wrapper.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        return self._wrapper.__exit__(*exc_info)
+
+    def __len__(self):
+        return len(self.queries)
+
+
+def explain(sql, params):
+    """Return the EXPLAIN QUERY PLAN detail lines of one statement."""
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+        return [row[3] for row in cursor.fetchall()]
+
+
+def _aliases(sql):
+    """Map every table name and alias in sql to the real table name."""
+    aliases = {}
+    for table, alias in _TABLE_ALIAS.findall(sql):
+        aliases[table] = table
+        if alias and alias.upper() not in ('ON', 'WHERE', 'SET', 'INNER', 'LEFT', 'ORDER', 'GROUP', 'LIMIT'):
+            aliases[alias] = table
+    return aliases
+
+
+def large_table_scans(queries):
+    """
+    Find full scans of LARGE_TABLES in recorded queries.
+
+    Returns:
+        List of (sql, plan detail line) for each offending scan. Index
+        searches (SEARCH ...) are fine; SCAN means every row (or every
+        index entry) of the table is visited.
+    """
+    offending = []
+    for sql, params in queries:
+        if not sql.lstrip().upper().startswith(EXPLAINABLE):
+            continue
+        aliases = _aliases(sql)
+        for detail in explain(sql, params):
+            match = _SCAN.match(detail)
+            if match and aliases.get(match.group(1), match.group(1)) in LARGE_TABLES:
+                offending.append((sql, detail))
+    return offending
+
+
+def format_queries(queries):
+    """Numbered list of statements for assertion messages."""
+    return '\n'.join(f'{n}. {sql} {params}' for n, (sql, params) in enumerate(queries, start=1))
@@ -0,0 +1,60 @@
+"""
+Bulk validation queue (tasks.validate_cedula_batch).
+"""
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase
+from django.utils import timezone
+
+from accounts import tasks
+from accounts.models import CedulaInfo, ValidationBatch
+
+from .dataset import build_dataset
+
+
+class ValidateCedulaBatchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        build_dataset(5)
+        cls.batch = ValidationBatch.objects.create()
+        cls.user_ids = list(
+            CedulaInfo.objects.order_by('user_id').values_list('user_id', flat=True)[:4]
+        )
+        CedulaInfo.objects.filter(user_id__in=cls.user_ids).update(
+            status=CedulaInfo.Status.PROCESSING, batch=cls.batch,
+            status_changed_at=timezone.now() - timedelta(hours=2),
+        )
+
+    def run_batch(self):
+        with mock.patch('accounts.tasks.async_task') as async_task, \
+                mock.patch('accounts.tasks.validate_cedula') as validate_cedula:
+            tasks.validate_cedula_batch(self.batch.pk)
+        return async_task, validate_cedula
+
+    def test_run_validates_next_user_and_passes_batch_on(self):
+        # Constant work per run, whatever the size of the batch
+        with self.assertNumQueries(3):
+            async_task, validate_cedula = self.run_batch()
+        validate_cedula.assert_called_once_with(self.user_ids[0], 1)
+        self.assertEqual(async_task.call_args.args[1], self.batch.pk)
+        current = CedulaInfo.objects.get(user_id=self.user_ids[0])
+        self.assertIsNone(current.batch_id)
+        self.assertFalse(current.is_stale())
+
+    def test_waiting_rows_stale_only_when_batch_stops(self):
+        waiting = CedulaInfo.objects.filter(user_id__in=self.user_ids)
+        self.assertFalse(waiting.filter(CedulaInfo.stale_filter()).exists())
+        ValidationBatch.objects.filter(pk=self.batch.pk).update(
+            heartbeat_at=timezone.now() - timedelta(minutes=CedulaInfo.BATCH_TIMEOUT_MINUTES + 1),
+        )
+        self.assertEqual(waiting.filter(CedulaInfo.stale_filter()).count(), len(self.user_ids))
+
+    def test_empty_batch_is_deleted(self):
+        CedulaInfo.objects.filter(user_id__in=self.user_ids).update(
+            status=CedulaInfo.Status.ACTIVE, batch=None,
+        )
+        async_task, validate_cedula = self.run_batch()
+        async_task.assert_not_called()
+        validate_cedula.assert_not_called()
+        self.assertFalse(ValidationBatch.objects.filter(pk=self.batch.pk).exists())
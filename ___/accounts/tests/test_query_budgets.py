@@ -0,0 +1,337 @@
+"""
+Query-count and query-plan regression tests for every view in accounts/urls.py.
+
+Each test renders one view against the generated dataset (see dataset.py)
+and checks that:
+
+- the number of SQL statements stays within a fixed budget, independent of
+  the dataset size (an N+1 pattern grows with PERF_DATASET_SIZE and fails)
+- no statement does a full scan of a large table (EXPLAIN QUERY PLAN)
+
+Run a larger dataset before deploying changes to hot pages:
+
+    PERF_DATASET_SIZE=5000 python manage.py test accounts
+"""
+import math
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+
+from django.conf import settings
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import CedulaInfo, CustomUser
+from accounts.views import BULK_ERROR_STATUSES
+
+from .dataset import PASSWORD, build_dataset, dataset_size
+from .plans import QueryRecorder, format_queries, large_table_scans
+
+
+# Fixed cost of CedulaInfo.reset_stale()/bulk_transition_to() on a page with
+# stale rows: savepoint, locking select, update, release, referrer lookup,
+# census event insert, occasional event prune, census_version bump, upline
+# lookup for the stats cache
+STALE_RESET_QUERIES = 9
+
+# Rows per INSERT when bulk_create() splits CensusEvent rows on SQLite
+# (999 variables / 4 columns)
+EVENT_INSERT_BATCH = 249
+
+
+# In-memory stats cache, so tests never touch the deployment's
+# STATS_CACHE_DIR; unhashed static URLs, so no collectstatic manifest is
+# needed; budgets include the CensusEvent inserts of the SSE push
+@override_settings(
+    CACHES={
+        **settings.CACHES,
+        'stats': {'BACKEND': 'accounts.cache.CountingLocMemCache', 'LOCATION': 'test-stats'},
+    },
+    STORAGES={
+        **settings.STORAGES,
+        'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+    },
+    CENSUS_EVENTS=True,
+)
+class QueryBudgetTestCase(TestCase):
+    """Base class: builds the dataset once and provides budget assertions."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.size = dataset_size()
+        users = build_dataset(cls.size)
+        cls.leader = users['leader']
+        cls.other_leader = users['other_leader']
+        cls.referral = users['referral']
+        cls.deep_referral = users['deep_referral']
+
+    def setUp(self):
+        # Cached stats of the previous test's (rolled back) data
+        caches['stats'].clear()
+        self.client.force_login(self.leader)
+        # Views queue scraping tasks; the budget covers the request only
+        patcher = mock.patch('accounts.views.async_task')
+        self.async_task = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def request(self, method, url, budget, expected_status=200, check_plans=True, **kwargs):
+        """
+        Run one request and assert its query budget and plans.
+
+        Args:
+            method: 'get' or 'post'
+            url: URL to request
+            budget: Maximum number of SQL statements
+            expected_status: Expected response status code
+            check_plans: False for pages that list a whole table on purpose
+            **kwargs: Passed to the test client (data, headers)
+
+        Returns:
+            The response (streaming responses are fully consumed)
+        """
+        with QueryRecorder() as recorder:
+            response = getattr(self.client, method)(url, **kwargs)
+            if response.streaming:
+                b''.join(response.streaming_content)
+
+        self.assertEqual(response.status_code, expected_status)
+        self.assertLessEqual(
+            len(recorder), budget,
+            f'{method.upper()} {url}: {len(recorder)} queries (budget {budget}, '
+            f'dataset size {self.size}):\n{format_queries(recorder.queries)}',
+        )
+        scans = large_table_scans(recorder.queries) if check_plans else []
+        self.assertFalse(
+            scans,
+            f'{method.upper()} {url}: full scans of large tables:\n'
+            + '\n'.join(f'{detail}\n    {sql}' for sql, detail in scans),
+        )
+        return response
+
+    def event_batches(self, transitions):
+        """Number of CensusEvent INSERTs for a bulk transition of that many rows."""
+        return math.ceil(transitions / EVENT_INSERT_BATCH)
+
+
+class PublicViewTests(QueryBudgetTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.logout()
+
+    def test_register(self):
+        self.request('get', reverse('register') + f'?ref={self.leader.referral_code}', budget=1)
+
+    def test_login(self):
+        self.request('get', reverse('login'), budget=0)
+
+    def test_login_post(self):
+        self.request('post', reverse('login'), budget=9, expected_status=302, data={
+            'username': self.leader.username, 'password': PASSWORD,
+        })
+
+
+class ProfileViewTests(QueryBudgetTestCase):
+    def test_home(self):
+        self.request('get', reverse('home'), budget=2)
+
+    def test_profile(self):
+        self.request('get', reverse('perfil'), budget=3)
+
+    def test_password_change(self):
+        self.request('get', reverse('password_change'), budget=2)
+
+    def test_census_section(self):
+        self.client.get(reverse('census_section'))  # Sets the CSRF cookie (part of the ETag)
+        response = self.request('get', reverse('census_section'), budget=4)
+        self.request('get', reverse('census_section'), budget=3, expected_status=304,
+                     headers={'If-None-Match': response['ETag']})
+
+    def test_refresh_own_cedula(self):
+        CedulaInfo.objects.filter(user=self.leader).update(status=CedulaInfo.Status.ERROR)
+        self.request('post', reverse('refresh_cedula'), budget=8)
+
+    def test_logout(self):
+        self.request('post', reverse('logout'), budget=4, expected_status=302)
+
+
+class ReferralViewTests(QueryBudgetTestCase):
+    def test_referidos(self):
+        self.request('get', reverse('referidos'), budget=3 + STALE_RESET_QUERIES)
+
+    def test_referidos_cached_network_summary(self):
+        self.client.get(reverse('referidos'))  # Resets stale rows, fills the stats cache
+        self.request('get', reverse('referidos'), budget=3)
+
+    def test_referidos_filtered_by_name(self):
+        self.request('get', reverse('referidos') + '?filter=errors&sort=name&dir=asc', budget=4)
+
+    def test_referral_rows_next_page(self):
+        response = self.request('get', reverse('referral_rows') + '?sort=cedula',
+                                budget=2 + STALE_RESET_QUERIES)
+        cursor = response.context['next_query']
+        if cursor:
+            self.request('get', reverse('referral_rows') + f'?{cursor}',
+                         budget=2 + STALE_RESET_QUERIES)
+
+    def test_referral_rows_search(self):
+        self.request('get', reverse('referral_rows') + '?q=1000', budget=2 + STALE_RESET_QUERIES)
+
+    def test_referral_rows_search_by_name_prefix(self):
+        response = self.request('get', reverse('referral_rows')
+                                + f'?q={self.referral.nombre_completo.lower()}',
+                                budget=2 + STALE_RESET_QUERIES)
+        self.assertContains(response, self.referral.cedula)
+
+    def test_referral_rows_status_sort(self):
+        self.request('get', reverse('referral_rows') + '?sort=status&filter=pending',
+                     budget=2 + STALE_RESET_QUERIES)
+
+    def test_pending_referrals(self):
+        self.request('get', reverse('pending_referrals'), budget=3 + STALE_RESET_QUERIES)
+
+    def test_pending_referrals_by_ids(self):
+        ids = ','.join(str(pk) for pk in self.leader.referrals.values_list('pk', flat=True)[:50])
+        self.request('get', reverse('pending_referrals') + f'?ids={ids}',
+                     budget=3 + STALE_RESET_QUERIES)
+
+    def test_referral_row(self):
+        self.request('get', reverse('referral_row', args=[self.referral.pk]),
+                     budget=3 + STALE_RESET_QUERIES)
+
+    def test_refresh_deep_referral(self):
+        CedulaInfo.objects.filter(user=self.deep_referral).update(status=CedulaInfo.Status.ERROR)
+        self.request('post', reverse('refresh_cedula_user', args=[self.deep_referral.pk]), budget=10)
+
+    def test_refresh_cooldown_after_scrape_only(self):
+        url = reverse('refresh_cedula_user', args=[self.deep_referral.pk])
+        # Just registered: no cooldown
+        CedulaInfo.objects.filter(user=self.deep_referral).update(
+            status=CedulaInfo.Status.PENDING, status_changed_at=timezone.now(),
+        )
+        self.request('post', url, budget=10)
+        self.async_task.assert_called_once()
+        # Just scraped
+        CedulaInfo.objects.filter(user=self.deep_referral).update(
+            status=CedulaInfo.Status.ERROR, status_changed_at=timezone.now(),
+        )
+        response = self.request('post', url, budget=10)
+        self.assertIn('Espera 30 segundos', response['HX-Trigger'])
+        self.async_task.assert_called_once()
+
+    def test_refresh_outside_network_forbidden(self):
+        other = self.other_leader.referrals.get()
+        self.request('post', reverse('refresh_cedula_user', args=[other.pk]), budget=3,
+                     expected_status=403)
+
+    def test_bulk_refresh_selection(self):
+        ids = list(self.leader.referrals.values_list('pk', flat=True))
+        self.request('post', reverse('bulk_refresh'), budget=12 + self.event_batches(len(ids)),
+                     data={'ids': ids})
+
+    def test_bulk_refresh_errors(self):
+        errors = CedulaInfo.objects.filter(
+            user__upline_paths__ancestor=self.leader, user__upline_paths__depth__gt=0,
+            status__in=BULK_ERROR_STATUSES,
+        ).count()
+        self.request('post', reverse('bulk_refresh'), budget=12 + self.event_batches(errors),
+                     data={'scope': 'errors'})
+
+
+class LeaderReportTests(QueryBudgetTestCase):
+    def test_ranking(self):
+        self.request('get', reverse('ranking'), budget=5)
+        self.request('get', reverse('ranking') + '?tabla=total', budget=5)
+
+    def test_export_csv(self):
+        self.request('get', reverse('export_referrals') + '?formato=csv', budget=3)
+
+    def test_export_xlsx(self):
+        self.request('get', reverse('export_referrals') + '?formato=xlsx&filter=found', budget=3)
+
+    def test_export_asgi_streams_async(self):
+        # Under ASGI a sync iterator would be buffered whole
+        url = reverse('export_referrals') + '?formato=csv'
+        expected = b''.join(self.client.get(url).streaming_content)
+        self.async_client.force_login(self.leader)
+        response = async_to_sync(self.async_client.get)(url)
+        self.assertTrue(response.is_async)
+        self.assertEqual(async_to_sync(_read_async)(response), expected)
+
+    def test_locations(self):
+        self.request('get', reverse('referral_locations'), budget=3)
+
+    def test_locations_drill_down(self):
+        self.request('get', reverse('referral_locations') + '?departamento=ANTIOQUIA&municipio=ANTIOQUIA 1',
+                     budget=3, headers={'HX-Request': 'true'})
+
+
+async def _read_async(response):
+    return b''.join([chunk async for chunk in response.streaming_content])
+
+
+@override_settings(METRICS_TOKEN='metrics-secret')
+class OperationsViewTests(QueryBudgetTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.logout()  # Prometheus scraper: no session
+
+    def test_metrics(self):
+        response = self.request('get', reverse('metrics'), budget=8,
+                                headers={'Authorization': 'Bearer metrics-secret'})
+        self.assertIn(b'paginamadre_cedula_status{status="ACTIVE"}', response.content)
+
+    def test_metrics_forbidden_without_token(self):
+        self.request('get', reverse('metrics'), budget=8, expected_status=403,
+                     headers={'Authorization': 'Bearer wrong'})
+        # Localhost is not trusted unless METRICS_ALLOW_LOCALHOST is on
+        self.request('get', reverse('metrics'), budget=8, expected_status=403)
+
+    @override_settings(METRICS_ALLOW_LOCALHOST=True)
+    def test_metrics_localhost(self):
+        self.request('get', reverse('metrics'), budget=8)
+        self.request('get', reverse('metrics'), budget=8, expected_status=403,
+                     headers={'X-Forwarded-For': '203.0.113.9'})
+
+
+class AdminViewTests(QueryBudgetTestCase):
+    def setUp(self):
+        super().setUp()
+        CustomUser.objects.filter(pk=self.leader.pk).update(is_staff=True, is_superuser=True)
+
+    def test_cedula_list(self):
+        # Ordered index walk with LIMIT; one query per page whatever its rows
+        self.request('get', reverse('admin:accounts_cedulainfo_changelist'), budget=6,
+                     check_plans=False)
+
+    def test_cedula_search_by_cedula_prefix(self):
+        self.request('get', reverse('admin:accounts_cedulainfo_changelist')
+                     + f'?q={self.referral.cedula[:-1]}', budget=4)
+
+    def test_cedula_search_by_name_prefix(self):
+        response = self.request('get', reverse('admin:accounts_cedulainfo_changelist')
+                                + f'?q={self.referral.nombre_completo.lower()}', budget=4)
+        self.assertContains(response, self.referral.cedula)
+
+    def test_user_list(self):
+        self.request('get', reverse('admin:accounts_customuser_changelist'), budget=6,
+                     check_plans=False)
+
+    def test_user_search_by_cedula_prefix(self):
+        response = self.request('get', reverse('admin:accounts_customuser_changelist')
+                                + f'?q={self.referral.cedula}', budget=5)
+        self.assertContains(response, self.referral.referral_code)
+
+    def test_estimated_count_is_exact_near_the_end(self):
+        # Statistics still count rows deleted since the last ANALYZE
+        rows = CedulaInfo.objects.count()
+        estimate = rows + 500
+        url = reverse('admin:accounts_cedulainfo_changelist')
+        with mock.patch('accounts.admin.ESTIMATE_MIN_ROWS', 1), \
+                mock.patch('accounts.sqlite.estimated_rows', return_value=estimate):
+            first = self.client.get(url)
+            last = self.client.get(url + f'?p={math.ceil(estimate / 100)}')
+        self.assertEqual(first.context['cl'].result_count, estimate)
+        self.assertEqual(last.context['cl'].result_count, rows)
+        self.assertTrue(last.context['cl'].result_list)
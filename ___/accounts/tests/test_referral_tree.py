@@ -0,0 +1,93 @@
+"""
+Referrer changes, the ReferralPath closure table and the referral counters
+(signals.update_referral_tree, signals.remove_from_referral_tree).
+"""
+from django.core.exceptions import ValidationError
+from django.test import TestCase
+
+from accounts import downline
+from accounts.models import CedulaInfo, CustomUser, ReferralPath
+
+from .dataset import _user, build_dataset
+
+
+class ReferrerChangeTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        users = build_dataset(2)
+        cls.leader = users['leader']
+        cls.other_leader = users['other_leader']
+        cls.referral = users['referral']
+        cls.deep_referral = users['deep_referral']
+
+    def assertCountersMatchTree(self):
+        """Every referrer's cached counters equal a count of its referrals."""
+        for user in CustomUser.objects.all():
+            referrals = CustomUser.objects.filter(referred_by=user)
+            verified = referrals.filter(cedula_info__status=CedulaInfo.Status.ACTIVE)
+            self.assertEqual(
+                (user.referral_count, user.verified_referral_count),
+                (referrals.count(), verified.count()),
+                f'counters of user {user.pk}',
+            )
+
+    def upline(self, user):
+        """{ancestor id: depth} of the user's ReferralPath rows."""
+        return dict(ReferralPath.objects.filter(descendant=user).values_list('ancestor_id', 'depth'))
+
+    def test_counters_after_register_delete_and_move(self):
+        CedulaInfo.objects.filter(user=self.referral).update(status=CedulaInfo.Status.ACTIVE)
+        CustomUser.objects.filter(pk=self.leader.pk).update(
+            verified_referral_count=CustomUser.objects.filter(
+                referred_by=self.leader, cedula_info__status=CedulaInfo.Status.ACTIVE,
+            ).count(),
+        )
+        self.assertCountersMatchTree()
+
+        new_user = _user(900, referred_by=self.deep_referral)
+        new_user.save()
+        self.assertEqual(CedulaInfo.objects.get(user=new_user).status, CedulaInfo.Status.PENDING)
+        self.assertCountersMatchTree()
+
+        self.referral.referred_by = self.other_leader
+        self.referral.save()
+        self.assertCountersMatchTree()
+
+        new_user.delete()
+        self.assertCountersMatchTree()
+
+    def test_mid_tree_move_updates_paths(self):
+        new_user = _user(900, referred_by=self.deep_referral)
+        new_user.save()
+        self.assertEqual(self.upline(new_user), {
+            new_user.pk: 0, self.deep_referral.pk: 1, self.referral.pk: 2, self.leader.pk: 3,
+        })
+
+        # Move the middle of the chain; its subtree follows
+        self.referral.referred_by = self.other_leader
+        self.referral.save()
+        self.assertEqual(self.upline(new_user), {
+            new_user.pk: 0, self.deep_referral.pk: 1, self.referral.pk: 2, self.other_leader.pk: 3,
+        })
+        self.assertEqual(self.upline(self.referral), {self.referral.pk: 0, self.other_leader.pk: 1})
+        self.assertTrue(downline.is_in_downline(self.other_leader.pk, new_user.pk))
+        self.assertTrue(downline.is_in_downline(self.referral.pk, new_user.pk))
+        self.assertFalse(downline.is_in_downline(self.leader.pk, new_user.pk))
+        self.assertFalse(downline.is_in_downline(self.leader.pk, self.referral.pk))
+
+    def test_move_subtree(self):
+        self.referral.referred_by = self.other_leader
+        self.referral.save()
+        self.assertTrue(downline.is_in_downline(self.other_leader.pk, self.deep_referral.pk))
+        self.assertFalse(downline.is_in_downline(self.leader.pk, self.deep_referral.pk))
+
+    def test_referrer_from_own_downline_rejected_before_saving(self):
+        self.leader.referred_by = self.deep_referral
+        with self.assertRaises(ValidationError) as raised:
+            self.leader.save()
+        self.assertIn('referred_by', raised.exception.message_dict)
+        self.leader.refresh_from_db()
+        self.assertIsNone(self.leader.referred_by_id)
+        self.assertTrue(downline.is_in_downline(self.leader.pk, self.deep_referral.pk))
+        self.assertEqual(self.upline(self.leader), {self.leader.pk: 0})
+        self.assertCountersMatchTree()
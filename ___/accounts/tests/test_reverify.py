@@ -0,0 +1,72 @@
+"""
+Periodic re-verification (tasks.reverify_tick) and the verified counters.
+"""
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase
+from django.utils import timezone
+
+from accounts import leaderboard, tasks
+from accounts.models import CedulaInfo, CustomUser
+
+from .dataset import build_dataset
+
+
+class ReverifyTickTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        users = build_dataset(3)
+        cls.leader = users['leader']
+        cls.referral = users['referral']
+        now = timezone.now()
+        CedulaInfo.objects.update(fetched_at=now)
+        # The only row due: an ACTIVE direct referral of the leader
+        CedulaInfo.objects.filter(user=cls.referral).update(
+            status=CedulaInfo.Status.ACTIVE, fetched_at=now - timedelta(days=60),
+        )
+        CustomUser.objects.filter(pk=cls.leader.pk).update(
+            verified_referral_count=CustomUser.objects.filter(
+                referred_by=cls.leader, cedula_info__status=CedulaInfo.Status.ACTIVE,
+            ).count(),
+        )
+
+    def verified(self):
+        return CustomUser.objects.get(pk=self.leader.pk).verified_referral_count
+
+    def board(self):
+        return [(user.pk, user.rank) for user in leaderboard.top()]
+
+    def tick(self, result):
+        """Run a tick whose scrape returns result; return what was seen during the scrape."""
+        seen = {}
+
+        def scrape(cedula, deadline):
+            info = CedulaInfo.objects.get(user=self.referral)
+            seen.update(status=info.status, effective_status=info.effective_status,
+                        verified=self.verified(), board=self.board())
+            return result
+
+        with mock.patch('accounts.tasks._scrape', side_effect=scrape):
+            tasks.reverify_tick()
+        return seen
+
+    def test_found_keeps_the_referral_verified(self):
+        verified, board = self.verified(), self.board()
+        seen = self.tick({'status': 'found', 'departamento': 'ANTIOQUIA', 'municipio': 'MEDELLIN'})
+        self.assertEqual(seen['status'], CedulaInfo.Status.PROCESSING)
+        self.assertEqual(seen['effective_status'], CedulaInfo.Status.ACTIVE)
+        self.assertEqual((seen['verified'], seen['board']), (verified, board))
+        self.assertEqual((self.verified(), self.board()), (verified, board))
+        self.assertEqual(CedulaInfo.objects.get(user=self.referral).status, CedulaInfo.Status.ACTIVE)
+
+    def test_failed_scrape_restores_without_changing_counts(self):
+        verified, board = self.verified(), self.board()
+        self.tick({'status': 'timeout', 'error': 'prueba'})
+        self.assertEqual((self.verified(), self.board()), (verified, board))
+        self.assertEqual(CedulaInfo.objects.get(user=self.referral).status, CedulaInfo.Status.ACTIVE)
+
+    def test_not_found_result_is_counted_once(self):
+        verified = self.verified()
+        self.tick({'status': 'not_found'})
+        self.assertEqual(self.verified(), verified - 1)
@@ -0,0 +1,45 @@
+"""
+Server-Timing header of middleware.ServerTimingMiddleware (SERVER_TIMING on).
+"""
+import re
+
+from django.db import connection
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from accounts import timing
+
+from .test_query_budgets import QueryBudgetTestCase
+
+
+METRIC = re.compile(r'(\w+);dur=([\d.]+)')
+
+
+@override_settings(SERVER_TIMING=True)
+class ServerTimingTests(QueryBudgetTestCase):
+    def setUp(self):
+        super().setUp()
+        # The test database connection predates the setting
+        timing.install_query_timer(sender=None, connection=connection)
+        self.addCleanup(connection.execute_wrappers.remove, timing._time_queries)
+        self.addCleanup(timing.reset)
+
+    def metrics(self, response):
+        return {name: float(duration) for name, duration in METRIC.findall(response['Server-Timing'])}
+
+    def test_header(self):
+        response = self.client.get(reverse('perfil'))
+        metrics = self.metrics(response)
+        self.assertEqual(set(metrics), {'total', 'db', 'tpl', 'auth'})
+        self.assertLessEqual(metrics['auth'] + metrics['tpl'], metrics['total'])
+        self.assertRegex(response['Server-Timing'], r'db;dur=[\d.]+;desc="[1-9]\d* queries"')
+        self.assertEqual(timing.url_stats()['perfil']['requests'], 1)
+
+    def test_auth_phase_includes_csrf_check(self):
+        # The view start is marked after CsrfViewMiddleware: a request it
+        # rejects never reaches the marker
+        client = Client(enforce_csrf_checks=True)
+        client.force_login(self.leader)
+        response = client.post(reverse('refresh_cedula'))
+        self.assertEqual(response.status_code, 403)
+        self.assertNotIn('auth', self.metrics(response))
@@ -0,0 +1,205 @@
+"""
+Per-request timing breakdown for middleware.ServerTimingMiddleware.
+
+Opt-in with settings.SERVER_TIMING. For each request it measures:
+
+- total: time spent in the middleware stack and view (the body of a
+  streaming response is produced later and not included)
+- auth: time before the view runs, i.e. session load, user lookup, CSRF
+  and the login check (up to middleware.ViewStartMiddleware, the last
+  middleware); absent when a middleware answers before the view
+- db: SQL statements and their time, on every connection alias
+- tpl: template rendering (TimedDjangoTemplates, the TEMPLATES backend)
+
+The measurements go to the Server-Timing response header (browser devtools,
+Network tab, Timing), to a rolling per-URL-name aggregate (url_stats()) and,
+over settings.SLOW_REQUEST_MS, to a warning log line.
+
+The current request's RequestTiming lives in a context variable, so the SQL
+and template hooks also find it inside sync_to_async() threads of async
+views. Aggregates are per process.
+"""
+import logging
+import statistics
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import DjangoTemplates, Template, reraise
+
+
+logger = logging.getLogger('django-q')
+
+ROLLING_WINDOW = 500  # Requests kept per URL name
+
+_current = ContextVar('request_timing', default=None)
+
+_lock = threading.Lock()
+_rolling = {}  # url name -> deque of (total_ms, db_ms, queries, tpl_ms)
+_requests = {}  # url name -> requests since process start
+
+
+class RequestTiming:
+    """Timers of one request."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.total = 0.0
+        self.auth = None
+        self.db = 0.0
+        self.queries = 0
+        self.template = 0.0
+        self._render_depth = 0
+
+    def view_started(self):
+        if self.auth is None:
+            self.auth = time.perf_counter() - self.started
+
+    def finish(self):
+        self.total = time.perf_counter() - self.started
+
+    @contextmanager
+    def rendering(self):
+        """Time a template render; nested renders count once."""
+        self._render_depth += 1
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._render_depth -= 1
+            if self._render_depth == 0:
+                self.template += time.perf_counter() - started
+
+    def header(self):
+        """Value of the Server-Timing header (durations in ms)."""
+        metrics = [
+            f'total;dur={self.total * 1000:.1f}',
+            f'db;dur={self.db * 1000:.1f};desc="{self.queries} queries"',
+            f'tpl;dur={self.template * 1000:.1f}',
+        ]
+        if self.auth is not None:
+            metrics.append(f'auth;dur={self.auth * 1000:.1f}')
+        return ', '.join(metrics)
+
+
+def start():
+    """Begin timing the current request; returns (timing, context token)."""
+    timing = RequestTiming()
+    return timing, _current.set(timing)
+
+
+def stop(token):
+    _current.reset(token)
+
+
+def current():
+    """RequestTiming of the request being handled, or None."""
+    return _current.get()
+
+
+def _time_queries(execute, sql, params, many, context):
+    timing = _current.get()
+    if timing is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timing.db += time.perf_counter() - started
+        timing.queries += 1
+
+
+@receiver(connection_created, dispatch_uid='time_queries')
+def install_query_timer(sender, connection, **kwargs):
+    """Add the SQL timer to new connections when SERVER_TIMING is on."""
+    if not getattr(settings, 'SERVER_TIMING', False):
+        return
+    if _time_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_time_queries)
+
+
+class TimedTemplate(Template):
+    """Backend template whose render() counts towards the request's tpl time."""
+
+    def render(self, context=None, request=None):
+        timing = _current.get()
+        if timing is None:
+            return super().render(context, request)
+        with timing.rendering():
+            return super().render(context, request)
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """DjangoTemplates backend returning TimedTemplate objects."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return TimedTemplate(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
+
+
+def record(request, response, timing):
+    """Add a finished request to the aggregates and log it if slow."""
+    match = getattr(request, 'resolver_match', None)
+    name = match.view_name if match else '<unresolved>'
+    sample = (timing.total * 1000, timing.db * 1000, timing.queries, timing.template * 1000)
+    with _lock:
+        if name not in _rolling:
+            _rolling[name] = deque(maxlen=ROLLING_WINDOW)
+        _rolling[name].append(sample)
+        _requests[name] = _requests.get(name, 0) + 1
+
+    slow_ms = getattr(settings, 'SLOW_REQUEST_MS', 1000)
+    if slow_ms and sample[0] >= slow_ms:
+        logger.warning(
+            "Slow request %s %s (%s) -> %s: %.0f ms (db %.0f ms / %d queries, "
+            "tpl %.0f ms, auth %.0f ms)",
+            request.method, request.path, name, response.status_code,
+            sample[0], sample[1], timing.queries, sample[3], (timing.auth or 0) * 1000,
+        )
+
+
+def url_stats():
+    """
+    Rolling aggregates per URL name, over the last ROLLING_WINDOW requests.
+
+    Returns:
+        dict url name -> {requests (since start), window, mean_ms, p50_ms,
+        p95_ms, max_ms, db_ms, queries, tpl_ms}; db_ms, queries and tpl_ms
+        are means
+    """
+    with _lock:
+        snapshot = {name: (list(samples), _requests[name]) for name, samples in _rolling.items()}
+    stats = {}
+    for name, (samples, requests) in snapshot.items():
+        totals = sorted(sample[0] for sample in samples)
+        count = len(totals)
+        stats[name] = {
+            'requests': requests,
+            'window': count,
+            'mean_ms': statistics.fmean(totals),
+            'p50_ms': totals[count // 2],
+            'p95_ms': totals[min(count - 1, int(count * 0.95))],
+            'max_ms': totals[-1],
+            'db_ms': statistics.fmean(sample[1] for sample in samples),
+            'queries': statistics.fmean(sample[2] for sample in samples),
+            'tpl_ms': statistics.fmean(sample[3] for sample in samples),
+        }
+    return stats
+
+
+def reset():
+    """Forget all aggregates."""
+    with _lock:
+        _rolling.clear()
+        _requests.clear()
@@ -2,7 +2,9 @@ from django.urls import path
 from .views import (
     register, CustomLoginView, home, profile_view, CustomPasswordChangeView,
     referidos_view, census_section_view, refresh_cedula_view,
-    bulk_refresh_view, referral_row_view, pending_referrals_view
+    bulk_refresh_view, referral_row_view, pending_referrals_view, referral_rows_view,
+    census_events_view, ranking_view, export_referrals_view, referral_locations_view,
+    metrics_view,
 )
 from django.contrib.auth.views import LogoutView
 
@@ -17,7 +19,13 @@ urlpatterns = [
     path('refrescar-cedula/<int:user_id>/', refresh_cedula_view, name='refresh_cedula_user'),
     path('cambiar-password/', CustomPasswordChangeView.as_view(), name='password_change'),
     path('referidos/', referidos_view, name='referidos'),
+    path('ranking/', ranking_view, name='ranking'),
     path('referidos/pending/', pending_referrals_view, name='pending_referrals'),
+    path('referidos/filas/', referral_rows_view, name='referral_rows'),
+    path('referidos/exportar/', export_referrals_view, name='export_referrals'),
+    path('referidos/ubicaciones/', referral_locations_view, name='referral_locations'),
     path('bulk-refresh/', bulk_refresh_view, name='bulk_refresh'),
     path('referido/<int:referral_id>/', referral_row_view, name='referral_row'),
+    path('eventos/', census_events_view, name='census_events'),
+    path('metrics/', metrics_view, name='metrics'),
 ]
@@ -1,18 +1,63 @@
+import hashlib
+import json
+import logging
+import time
 from datetime import timedelta
-
-from django.http import HttpResponseForbidden
-from django.shortcuts import render, redirect
+from functools import partial
+from urllib.parse import urlencode
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse, HttpResponseForbidden, StreamingHttpResponse
+from django.shortcuts import get_object_or_404, render, redirect
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
 from django.contrib import messages
 from django.contrib.auth import login
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.views import LoginView, PasswordChangeView
+from django.db import transaction
+from django.db.models import Q
 from django.urls import reverse, reverse_lazy
 from django.utils import timezone
+from django.utils.crypto import constant_time_compare
 from django_q.tasks import async_task
 
+from . import export
+from . import geography
+from . import leaderboard
+from . import longpoll
+from . import metrics
+from . import referrals as referral_queries
+from . import stats
+from .events import census_event_stream, latest_event_id
 from .decorators import leader_or_self_required
 from .forms import CustomUserCreationForm, ProfileForm, CustomPasswordChangeForm
-from .models import CedulaInfo, CustomUser
+from .models import CedulaInfo, CustomUser, ValidationBatch
+from .routers import read_only_db
+
+
+logger = logging.getLogger('django-q')
+
+# Minimum time between refreshes of the same cedula. It runs from the last
+# refresh or scrape outcome; a row still PENDING since registration or an
+# import has neither, so it can be refreshed right away.
+REFRESH_COOLDOWN = timedelta(seconds=30)
+
+# Final results are not refreshed in bulk; PROCESSING rows are already queued
+REFRESH_SKIP_STATUSES = [
+    CedulaInfo.Status.ACTIVE,
+    CedulaInfo.Status.CANCELLED_DECEASED,
+    CedulaInfo.Status.CANCELLED_OTHER,
+    CedulaInfo.Status.PROCESSING,
+]
+
+# Failed lookups refreshed by "Reintentar errores" (scope=errors)
+BULK_ERROR_STATUSES = [
+    CedulaInfo.Status.ERROR,
+    CedulaInfo.Status.TIMEOUT,
+    CedulaInfo.Status.BLOCKED,
+    CedulaInfo.Status.NOT_FOUND,
+]
 
 
 def register(request):
@@ -31,7 +76,9 @@ def register(request):
         if form.is_valid():
             user = form.save(commit=False)
             user.referred_by = referrer  # May be None if invalid/missing code
-            user.save()
+            # Atomic so the referrer's counters and CedulaInfo commit with the user
+            with transaction.atomic():
+                user.save()
             login(request, user)
             try:
                 return redirect('home')
@@ -46,7 +93,8 @@ def register(request):
 @login_required
 def home(request):
     """Home page view with referral statistics."""
-    referral_count = request.user.referrals.count()
+    # Denormalized counter, already loaded with request.user (no extra query)
+    referral_count = request.user.referral_count
     referral_goal = request.user.referral_goal
     progress_percent = min(100, int((referral_count / referral_goal) * 100)) if referral_goal > 0 else 100
     referral_url = request.build_absolute_uri(reverse('register') + f'?ref={request.user.referral_code}')
@@ -60,6 +108,19 @@ def home(request):
     })
 
 
+@login_required
+@read_only_db
+def ranking_view(request):
+    """Referral leaderboard: top referrers and the current user's rank."""
+    board = leaderboard.clean_board(request.GET.get('tabla'))
+    return render(request, 'ranking.html', {
+        'board': board,
+        'top_users': leaderboard.top(board),
+        'my_rank': leaderboard.rank(request.user, board),
+        'participants': leaderboard.participant_count(board),
+    })
+
+
 @login_required
 def profile_view(request):
     """Profile editing view."""
@@ -92,12 +153,67 @@ def profile_view(request):
         'is_polling': is_polling,
         'is_leader': request.user.role == CustomUser.Role.LEADER,
         'show_refresh': True,  # On own profile, always show if leader
+        'census_events': settings.CENSUS_EVENTS,
     })
 
 
-@login_required
-def census_section_view(request):
-    """Return census section partial for HTMX polling."""
+# ETags of polling responses also change every STALE_CHECK_SECONDS so stuck
+# PENDING/PROCESSING rows still get their reset_if_stale() check
+STALE_CHECK_SECONDS = 60
+
+
+def _etag_variant(request):
+    """Time bucket for stale checks plus a hash of the query string and CSRF
+    cookie (rendered buttons embed the CSRF token)."""
+    variant = hashlib.md5(
+        f"{request.GET.urlencode()}|{request.COOKIES.get(settings.CSRF_COOKIE_NAME, '')}".encode(),
+        usedforsecurity=False,
+    ).hexdigest()[:12]
+    bucket = int(time.time() // STALE_CHECK_SECONDS)
+    return f'{bucket}-{variant}'
+
+
+def _polling_etag(request, census_version=None):
+    """
+    ETag for HTMX polling endpoints, computed without touching the ORM.
+
+    Combines the user's census_version (bumped by any relevant CedulaInfo
+    transition), role and profile version and _etag_variant().
+
+    Args:
+        census_version: Freshly read census_version (default: the value
+            loaded with request.user)
+    """
+    user = request.user
+    if census_version is None:
+        census_version = user.census_version
+    return f'{user.pk}-{census_version}-{user.version}-{user.role}-{_etag_variant(request)}'
+
+
+async def _census_etag(request, fresh):
+    """_polling_etag() for long_poll(); re-reads census_version when fresh."""
+    census_version = None
+    if fresh:
+        census_version = await (
+            CustomUser.objects.filter(pk=request.user.pk)
+            .values_list('census_version', flat=True).afirst()
+        )
+    return _polling_etag(request, census_version)
+
+
+async def census_section_view(request):
+    """Return census section partial for HTMX polling (async).
+
+    Answers 304 Not Modified (see _polling_etag) while nothing changed;
+    with LONG_POLL_SECONDS set, holds the request until it does (longpoll.py).
+    """
+    # login_required doesn't support async views on Django 4.2
+    if not await longpoll.is_authenticated(request):
+        return longpoll.login_redirect(request)
+    return await longpoll.long_poll(request, _census_etag, _render_census_section)
+
+
+def _render_census_section(request):
     cedula_info = getattr(request.user, 'cedula_info', None)
 
     # Determine if polling should continue
@@ -138,8 +254,8 @@ def refresh_cedula_view(request, user_id=None):
     cedula_info = getattr(target_user, 'cedula_info', None)
 
     # Rate limiting: 30 second cooldown
-    if cedula_info and cedula_info.fetched_at:
-        cooldown_until = cedula_info.fetched_at + timedelta(seconds=30)
+    if cedula_info and cedula_info.status != CedulaInfo.Status.PENDING:
+        cooldown_until = cedula_info.status_changed_at + REFRESH_COOLDOWN
         if timezone.now() < cooldown_until:
             # Return current section with error message via HX-Trigger
             response = render(request, 'partials/_census_section.html', {
@@ -152,11 +268,24 @@ def refresh_cedula_view(request, user_id=None):
             response['HX-Trigger'] = '{"showToast": {"message": "Espera 30 segundos antes de actualizar de nuevo", "type": "warning"}}'
             return response
 
-    # Set status to PROCESSING immediately (avoid race condition)
+    # Set status to PROCESSING immediately (avoid race condition).
+    # If another writer changed the row first, don't queue a duplicate scrape.
     if cedula_info:
-        cedula_info.status = CedulaInfo.Status.PROCESSING
-        cedula_info.fetched_at = timezone.now()  # Reset for cooldown
-        cedula_info.save(update_fields=['status', 'fetched_at'])
+        claimed = cedula_info.transition_to(CedulaInfo.Status.PROCESSING)
+        if not claimed:
+            cedula_info.refresh_from_db()
+            response = render(request, 'partials/_census_section.html', {
+                'cedula_info': cedula_info,
+                'is_polling': cedula_info.status in [
+                    CedulaInfo.Status.PENDING,
+                    CedulaInfo.Status.PROCESSING
+                ],
+                'user': target_user,
+                'is_leader': request.user.role == CustomUser.Role.LEADER,
+                'show_refresh': True,
+            })
+            response['HX-Trigger'] = '{"showToast": {"message": "La cedula ya se esta actualizando", "type": "warning"}}'
+            return response
 
     # Queue async task
     async_task('accounts.tasks.validate_cedula', target_user.id, 1)
@@ -204,69 +333,114 @@ class CustomPasswordChangeView(PasswordChangeView):
 
 @login_required
 def bulk_refresh_view(request):
-    """Bulk refresh census data for selected referrals (leader only)."""
+    """Bulk refresh census data for a leader's referrals (set-based).
+
+    POST ids=<id>... refreshes the selected referrals; scope=errors refreshes
+    every failed lookup in the leader's whole network. Eligible rows (not
+    final, not already PROCESSING, outside the cooldown) are filtered in SQL,
+    moved to PROCESSING with one UPDATE and queued as one batch task.
+
+    The HX-Trigger response carries a bulkRefreshResult event with the
+    accepted, skipped and queued counts, plus a toast.
+    """
     # RBAC check
     if request.user.role != CustomUser.Role.LEADER:
         return HttpResponseForbidden("No tienes permiso para esta accion.")
 
-    # Get selected IDs from POST
-    ids = request.POST.getlist('ids')
-    if not ids:
-        response = render(request, 'partials/_empty_response.html', {})
-        response['HX-Trigger'] = '{"showToast": {"message": "No se seleccionaron usuarios", "type": "warning"}}'
-        return response
-
-    # Limit to max 10
-    ids = ids[:10]
-
-    # Query referrals (only those referred by this leader)
-    referrals = CustomUser.objects.filter(id__in=ids, referred_by=request.user)
+    # Referrals anywhere in this leader's network
+    cedulas = CedulaInfo.objects.filter(
+        user__upline_paths__ancestor=request.user,
+        user__upline_paths__depth__gt=0,
+    )
 
-    refreshed = 0
-    for referral in referrals:
-        cedula_info = getattr(referral, 'cedula_info', None)
-        if not cedula_info:
-            continue
-
-        # Skip final statuses
-        if cedula_info.status in ['ACTIVE', 'CANCELLED_DECEASED', 'CANCELLED_OTHER', 'PROCESSING']:
-            continue
-
-        # Cooldown check (30 seconds)
-        if cedula_info.fetched_at:
-            cooldown_until = cedula_info.fetched_at + timedelta(seconds=30)
-            if timezone.now() < cooldown_until:
-                continue
+    if request.POST.get('scope') == 'errors':
+        cedulas = cedulas.filter(status__in=BULK_ERROR_STATUSES)
+    else:
+        try:
+            ids = {int(x) for x in request.POST.getlist('ids')}
+        except ValueError:
+            ids = set()
+        if not ids:
+            response = render(request, 'partials/_empty_response.html', {})
+            response['HX-Trigger'] = '{"showToast": {"message": "No se seleccionaron usuarios", "type": "warning"}}'
+            return response
+        cedulas = cedulas.filter(user_id__in=ids)
+
+    requested = cedulas.count()
+    eligible = cedulas.exclude(status__in=REFRESH_SKIP_STATUSES).filter(
+        Q(status=CedulaInfo.Status.PENDING)
+        | Q(status_changed_at__lt=timezone.now() - REFRESH_COOLDOWN),
+    )
+    batch = ValidationBatch.objects.create()
+    transitions = CedulaInfo.bulk_transition_to(
+        eligible, CedulaInfo.Status.PROCESSING, batch=batch,
+    )
+
+    accepted = len(transitions)
+    queued = 0
+    if transitions:
+        async_task(
+            'accounts.tasks.validate_cedula_batch',
+            batch.pk,
+            task_name=f'validate_cedula_batch_{batch.pk}_{accepted}',
+        )
+        queued = accepted
+    else:
+        batch.delete()
+
+    result = {'accepted': accepted, 'skipped': requested - accepted, 'queued': queued}
+    logger.info("bulk_refresh: leader %s %s", request.user.id, result)
+
+    if accepted:
+        message = f"{accepted} cedulas en actualizacion"
+        if result['skipped']:
+            message += f" ({result['skipped']} omitidas)"
+        toast = {'message': message, 'type': 'info'}
+    elif requested:
+        toast = {'message': 'Todas las cedulas seleccionadas fueron actualizadas recientemente', 'type': 'warning'}
+    else:
+        toast = {'message': 'No hay cedulas para actualizar', 'type': 'warning'}
 
-        # Set to PROCESSING and update timestamp
-        cedula_info.status = CedulaInfo.Status.PROCESSING
-        cedula_info.fetched_at = timezone.now()
-        cedula_info.save(update_fields=['status', 'fetched_at'])
+    response = render(request, 'partials/_empty_response.html', {})
+    response['HX-Trigger'] = json.dumps({'showToast': toast, 'bulkRefreshResult': result})
+    return response
 
-        # Queue async task
-        async_task('accounts.tasks.validate_cedula', referral.id, 1)
-        refreshed += 1
 
-    # Return response with toast
-    response = render(request, 'partials/_empty_response.html', {})
-    if refreshed > 0:
-        response['HX-Trigger'] = f'{{"showToast": {{"message": "{refreshed} cedulas en actualizacion", "type": "info"}}}}'
-    else:
-        response['HX-Trigger'] = '{"showToast": {"message": "Todas las cedulas seleccionadas fueron actualizadas recientemente", "type": "warning"}}'
+async def _referral_row_etag(request, fresh, referral_id):
+    """ETag of one referral row: its profile and CedulaInfo versions (one
+    indexed query), or None if it isn't a referral of the user."""
+    versions = await (
+        CustomUser.objects.filter(pk=referral_id, referred_by=request.user.pk)
+        .values_list('version', 'cedula_info__version').afirst()
+    )
+    if versions is None:
+        return None
+    version, cedula_version = versions
+    return (f'{request.user.pk}-{referral_id}-{version}-{cedula_version}-'
+            f'{request.user.role}-{_etag_variant(request)}')
 
-    return response
 
+async def referral_row_view(request, referral_id):
+    """Return single referral row partial for HTMX updates (async, long-poll)."""
+    if not await longpoll.is_authenticated(request):
+        return longpoll.login_redirect(request)
 
-@login_required
-def referral_row_view(request, referral_id):
-    """Return single referral row partial for HTMX updates."""
     # RBAC check
     if request.user.role != CustomUser.Role.LEADER:
         return HttpResponseForbidden("No tienes permiso para esta accion.")
 
+    return await longpoll.long_poll(
+        request,
+        partial(_referral_row_etag, referral_id=referral_id),
+        partial(_render_referral_row, referral_id=referral_id),
+    )
+
+
+def _render_referral_row(request, referral_id):
     # Get referral (only if referred by this user)
-    from django.shortcuts import get_object_or_404
-    referral = get_object_or_404(CustomUser, id=referral_id, referred_by=request.user)
+    referral = get_object_or_404(
+        CustomUser.objects.select_related('cedula_info'), id=referral_id, referred_by=request.user,
+    )
 
     # Check for stale status on referral's cedula_info
     cedula_info = getattr(referral, 'cedula_info', None)
@@ -279,74 +453,258 @@ def referral_row_view(request, referral_id):
     })
 
 
+def _referral_page(request):
+    """
+    Build one keyset page of the current user's referrals from request.GET.
+
+    Resets stale PENDING/PROCESSING rows on the page and returns the template
+    context shared by referidos_view and referral_rows_view.
+    """
+    params = referral_queries.clean_params(request.GET)
+    queryset = referral_queries.filter_referrals(
+        request.user.referrals.select_related('cedula_info'),
+        params['status_filter'],
+        params['search'],
+    )
+    queryset = referral_queries.order_referrals(queryset, params['sort'], params['direction'])
+    referrals, next_cursor = referral_queries.paginate_referrals(
+        queryset, params['sort'], params['direction'], request.GET.get('cursor'),
+    )
+
+    # Reset stale statuses on this page's referrals only (one UPDATE)
+    cedula_infos = [
+        referral.cedula_info for referral in referrals
+        if getattr(referral, 'cedula_info', None)
+    ]
+    CedulaInfo.reset_stale(cedula_infos)
+    has_pending = any(
+        info.status in referral_queries.PENDING_STATUSES for info in cedula_infos
+    )
+
+    next_query = None
+    if next_cursor:
+        next_query = urlencode({
+            'filter': params['status_filter'],
+            'q': params['search'],
+            'sort': params['sort'],
+            'dir': params['direction'],
+            'cursor': next_cursor,
+        })
+
+    return {
+        'referrals': referrals,
+        'next_query': next_query,
+        'is_first_page': not request.GET.get('cursor'),
+        'has_pending': has_pending,
+        'is_leader': request.user.role == CustomUser.Role.LEADER,
+        **params,
+    }
+
+
 @login_required
 def referidos_view(request):
-    """View showing users referred by the current user."""
-    referrals = request.user.referrals.prefetch_related('cedula_info').all().order_by('-date_joined')
-
-    # Check for stale status on all referrals' cedula_info
-    pending_ids = []
-    for referral in referrals:
-        cedula_info = getattr(referral, 'cedula_info', None)
-        if cedula_info:
-            cedula_info.reset_if_stale()
-            if cedula_info.status in [CedulaInfo.Status.PENDING, CedulaInfo.Status.PROCESSING]:
-                pending_ids.append(str(referral.id))
+    """View showing users referred by the current user (first keyset page).
 
-    is_leader = request.user.role == CustomUser.Role.LEADER
-    referral_url = request.build_absolute_uri(reverse('register') + f'?ref={request.user.referral_code}')
+    Leaders also get census status totals per level of their whole network.
+    """
+    context = _referral_page(request)
+    context['has_referrals'] = request.user.referral_count > 0
+    if context['is_leader'] and context['has_referrals']:
+        summary = stats.network_summary(request.user.id)  # Cached per user
+        context['network_levels'] = summary['levels']
+        context['network_total'] = summary['total']
+        context['network_verified'] = summary['verified']
+    context['referral_url'] = request.build_absolute_uri(
+        reverse('register') + f'?ref={request.user.referral_code}'
+    )
+    context['census_events'] = settings.CENSUS_EVENTS
+    return render(request, 'referidos.html', context)
 
-    return render(request, 'referidos.html', {
-        'referrals': referrals,
-        'is_leader': is_leader,
-        'referral_url': referral_url,
-        'has_pending': len(pending_ids) > 0,
-        'pending_ids': ','.join(pending_ids),
-    })
+
+@login_required
+def referral_rows_view(request):
+    """Return a page of referral rows for HTMX filtering, sorting and infinite scroll.
+
+    Accepts filter, q, sort, dir and cursor parameters. Without a cursor the
+    response replaces the table body; with one it replaces the load-more row.
+    """
+    return render(request, 'partials/_referral_rows.html', _referral_page(request))
 
 
 @login_required
-def pending_referrals_view(request):
-    """Return pending referral rows for HTMX batch polling.
+@read_only_db
+def referral_locations_view(request):
+    """Verified referrals of the leader's network per voting location.
+
+    Drill-down departamento -> municipio -> puesto -> mesa through query
+    parameters; HTMX requests get only the table partial.
+    """
+    if request.user.role != CustomUser.Role.LEADER:
+        return HttpResponseForbidden("No tienes permiso para esta accion.")
+
+    path = geography.clean_path(request.GET)
+    level, rows = geography.location_summary(request.user.id, path)
+
+    breadcrumbs = [{'label': 'Todos', 'query': ''}]
+    for index, (_, value) in enumerate(path):
+        breadcrumbs.append({'label': value, 'query': urlencode(path[:index + 1])})
+
+    drillable = level != geography.LEVELS[-1]
+    for row in rows:
+        row['query'] = urlencode(path + [(level, row['name'])]) if drillable else None
+
+    context = {
+        'level_label': geography.LEVEL_LABELS[level],
+        'rows': rows,
+        'total': sum(row['total'] for row in rows),
+        'breadcrumbs': breadcrumbs,
+    }
+    if request.headers.get('HX-Request'):
+        return render(request, 'partials/_location_table.html', context)
+    return render(request, 'ubicaciones.html', context)
+
+
+@login_required
+@read_only_db
+def export_referrals_view(request):
+    """Stream the leader's referrals with census data as CSV or XLSX.
+
+    Accepts formato=csv|xlsx plus the referidos page parameters (filter, q,
+    sort, dir), so the file matches what the table shows.
+    """
+    if request.user.role != CustomUser.Role.LEADER:
+        return HttpResponseForbidden("No tienes permiso para esta accion.")
+
+    file_format = request.GET.get('formato', 'csv')
+    if file_format not in export.CONTENT_TYPES:
+        file_format = 'csv'
+
+    params = referral_queries.clean_params(request.GET)
+    queryset = referral_queries.filter_referrals(
+        request.user.referrals.all(), params['status_filter'], params['search'],
+    )
+    queryset = referral_queries.order_referrals(queryset, params['sort'], params['direction'])
+
+    rows = export.export_rows(queryset)
+    stream = export.stream_xlsx(rows) if file_format == 'xlsx' else export.stream_csv(rows)
+    if isinstance(request, ASGIRequest):
+        # A sync iterator is buffered whole under ASGI; only WSGI streams it
+        stream = export.async_stream(stream)
+
+    filename = f"referidos_{timezone.localdate():%Y%m%d}.{file_format}"
+    response = StreamingHttpResponse(stream, content_type=export.CONTENT_TYPES[file_format])
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response['Cache-Control'] = 'private, no-store'
+    return response
+
+
+async def pending_referrals_view(request):
+    """Return pending referral rows for HTMX batch polling (async).
 
     Accepts ?ids=1,2,3 parameter with row IDs to check.
     Returns rows with hx-swap-oob="true" to update in place,
     plus a polling trigger that controls whether to continue polling.
+    Answers 304 Not Modified (see _polling_etag) while nothing changed;
+    with LONG_POLL_SECONDS set, holds the request until it does.
     """
-    pending_statuses = [CedulaInfo.Status.PENDING, CedulaInfo.Status.PROCESSING]
+    if not await longpoll.is_authenticated(request):
+        return longpoll.login_redirect(request)
+    return await longpoll.long_poll(request, _census_etag, _render_pending_referrals)
+
+
+def _render_pending_referrals(request):
+    pending_statuses = referral_queries.PENDING_STATUSES
 
     # Get IDs from query parameter (sent by client JS)
     ids_param = request.GET.get('ids', '')
-    if ids_param:
-        # Fetch specific rows by ID (regardless of current status)
+    if 'ids' in request.GET:
+        # Fetch specific rows by ID (regardless of current status).
+        # An empty list means no pending rows are displayed any more.
         try:
             ids = [int(x) for x in ids_param.split(',') if x.strip()]
         except ValueError:
             ids = []
-        referrals = request.user.referrals.prefetch_related('cedula_info').filter(id__in=ids)
+        referrals = request.user.referrals.select_related('cedula_info').filter(id__in=ids)
     else:
         # Fallback: fetch rows with PENDING or PROCESSING status
-        referrals = request.user.referrals.prefetch_related('cedula_info').filter(
+        referrals = request.user.referrals.select_related('cedula_info').filter(
             cedula_info__status__in=pending_statuses
         )
 
-    # Check for stale status and build list of rows to update
-    rows_to_update = []
-    still_pending_ids = []
-    for referral in referrals:
-        cedula_info = getattr(referral, 'cedula_info', None)
-        if cedula_info:
-            cedula_info.reset_if_stale()
-            # After reset, check if still pending
-            if cedula_info.status in pending_statuses:
-                still_pending_ids.append(str(referral.id))
-            rows_to_update.append(referral)
+    # Reset stale statuses (one UPDATE) and build list of rows to update
+    rows_to_update = [
+        referral for referral in referrals
+        if getattr(referral, 'cedula_info', None)
+    ]
+    CedulaInfo.reset_stale([referral.cedula_info for referral in rows_to_update])
+    # After reset, check if still pending
+    has_pending = any(
+        referral.cedula_info.status in pending_statuses for referral in rows_to_update
+    )
 
     is_leader = request.user.role == CustomUser.Role.LEADER
 
+    # The next poll reads pending row IDs from the DOM (getPendingRowIds),
+    # so rows added by infinite scroll are picked up as well
     return render(request, 'partials/_pending_referrals.html', {
         'referrals': rows_to_update,
         'is_leader': is_leader,
-        'has_pending': len(still_pending_ids) > 0,
-        'pending_ids': ','.join(still_pending_ids),
+        'has_pending': has_pending,
     })
+
+
+async def census_events_view(request):
+    """Server-Sent Events stream of census status changes (ASGI).
+
+    Pushes the user's own census section and their referrals' rows as
+    statuses change. Resumes from the Last-Event-ID header on reconnect;
+    new connections start at the newest event. Answers 204 (no reconnect)
+    unless CENSUS_EVENTS is on.
+    """
+    if not settings.CENSUS_EVENTS:
+        return HttpResponse(status=204)
+
+    # login_required doesn't support async views on Django 4.2
+    is_authenticated = await sync_to_async(lambda: request.user.is_authenticated)()
+    if not is_authenticated:
+        return HttpResponseForbidden("No tienes permiso para esta accion.")
+
+    try:
+        last_event_id = int(request.headers.get('Last-Event-ID', ''))
+    except ValueError:
+        last_event_id = await sync_to_async(latest_event_id)()
+
+    response = StreamingHttpResponse(
+        census_event_stream(request, last_event_id),
+        content_type='text/event-stream',
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Disable proxy buffering
+    return response
+
+
+LOOPBACK_ADDRESSES = {'127.0.0.1', '::1'}
+
+
+def _metrics_allowed(request):
+    """Staff users, the METRICS_TOKEN bearer, or a direct connection from this host if allowed."""
+    if request.user.is_authenticated and request.user.is_staff:
+        return True
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if token and constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return True
+    return (
+        getattr(settings, 'METRICS_ALLOW_LOCALHOST', False)
+        and request.META.get('REMOTE_ADDR') in LOOPBACK_ADDRESSES
+        and 'X-Forwarded-For' not in request.headers
+    )
+
+
+@read_only_db
+def metrics_view(request):
+    """Pipeline health metrics in Prometheus text format (see accounts/metrics.py)."""
+    if not _metrics_allowed(request):
+        return HttpResponseForbidden("No tienes permiso para esta accion.")
+    response = HttpResponse(metrics.render(), content_type=metrics.CONTENT_TYPE)
+    response['Cache-Control'] = 'no-store'
+    return response
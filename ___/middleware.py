@@ -1,11 +1,159 @@
 """
-Custom middleware for global authentication enforcement.
+Custom middleware: static assets, request timing, response compression and
+global authentication enforcement.
 """
+from urllib.parse import urlsplit
 
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.core.exceptions import MiddlewareNotUsed
+from django.middleware.gzip import GZipMiddleware
 from django.shortcuts import redirect
 from django.conf import settings
 from django.urls import reverse
 
+from accounts import assets, timing
+
+
+class StaticAssetMiddleware:
+    """
+    Serve collected static files (STATIC_ROOT) from the app process.
+
+    Goes first in MIDDLEWARE: static requests are answered before sessions,
+    auth or CSRF run, with precompressed variants and far-future cache
+    headers (see accounts/assets.py). Files missing from STATIC_ROOT fall
+    through to the normal 404.
+
+    Not used under DEBUG: runserver serves the source files through the
+    staticfiles finders, so edits show up without collectstatic instead of
+    a stale STATIC_ROOT copy.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if settings.DEBUG:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.prefix = urlsplit(settings.STATIC_URL).path
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def _static_path(self, request):
+        if request.method in ('GET', 'HEAD') and request.path_info.startswith(self.prefix):
+            return request.path_info[len(self.prefix):]
+        return None
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        path = self._static_path(request)
+        if path is not None:
+            response = assets.serve(request, path)
+            if response is not None:
+                return response
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        path = self._static_path(request)
+        if path is not None:
+            response = await sync_to_async(assets.serve, thread_sensitive=False)(request, path)
+            if response is not None:
+                return response
+        return await self.get_response(request)
+
+
+class ServerTimingMiddleware:
+    """
+    Time each request and report it in a Server-Timing header.
+
+    Opt-in: only loaded when settings.SERVER_TIMING is on. Place it right
+    after StaticAssetMiddleware so the session/auth middleware is measured,
+    and ViewStartMiddleware last. Also feeds the per-URL aggregates and
+    slow-request log (see accounts/timing.py).
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'SERVER_TIMING', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        request_timing, token = timing.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            timing.stop(token)
+        return self._finish(request, response, request_timing)
+
+    async def __acall__(self, request):
+        request_timing, token = timing.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            timing.stop(token)
+        return self._finish(request, response, request_timing)
+
+    def _finish(self, request, response, request_timing):
+        request_timing.finish()
+        response['Server-Timing'] = request_timing.header()
+        timing.record(request, response, request_timing)
+        return response
+
+
+class ViewStartMiddleware:
+    """
+    Mark the end of ServerTimingMiddleware's auth phase.
+
+    Goes last in MIDDLEWARE: process_view hooks run in MIDDLEWARE order, so
+    its own runs after CsrfViewMiddleware's check, right before the view.
+    Only loaded with settings.SERVER_TIMING.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'SERVER_TIMING', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request_timing = timing.current()
+        if request_timing is not None:
+            request_timing.view_started()
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    GZipMiddleware for HTML pages and HTMX partials.
+
+    Skips Server-Sent Events (each pushed message must reach the browser as
+    it is sent) and formats that are already compressed (XLSX exports).
+    """
+
+    skip_content_types = (
+        'text/event-stream',
+        'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    )
+
+    def process_response(self, request, response):
+        if response.get('Content-Type', '').startswith(self.skip_content_types):
+            return response
+        return super().process_response(request, response)
+
 
 class LoginRequiredMiddleware:
     """
@@ -16,14 +164,39 @@ class LoginRequiredMiddleware:
     - Registration page (/register/)
     - Admin pages (/admin/* - admin has its own authentication)
     - Static files (/static/* - needed for login/register page styling)
+    - Metrics (/metrics/ - Prometheus scrapers; the view checks access)
 
     Includes ?next= parameter in redirects for post-login navigation.
+
+    Supports both sync (WSGI) and async (ASGI) request handling, so async
+    views aren't forced through a sync adapter thread under ASGI.
     """
 
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
 
     def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = self._login_redirect(request)
+        if response is not None:
+            return response
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        # request.user is resolved lazily with sync session/ORM lookups
+        response = await sync_to_async(self._login_redirect)(request)
+        if response is not None:
+            return response
+        return await self.get_response(request)
+
+    def _login_redirect(self, request):
+        """Return a redirect to the login page, or None if access is allowed."""
         # Check if user is authenticated
         if not request.user.is_authenticated:
             path = request.path_info
@@ -34,6 +207,7 @@ class LoginRequiredMiddleware:
                 reverse('register'),          # /register/ (dynamically resolved)
                 '/admin/',                    # Admin has own login
                 '/static/',                   # Static files for login/register pages
+                reverse('metrics'),           # /metrics/ checks staff/token itself
             ]
 
             # Check if current path requires authentication
@@ -42,4 +216,4 @@ class LoginRequiredMiddleware:
                 return redirect(f'{settings.LOGIN_URL}?next={path}')
 
         # Continue processing request
-        return self.get_response(request)
+        return None
@@ -0,0 +1,51 @@
+(function() {
+    'use strict';
+
+    const script = document.currentScript;
+    if (!window.EventSource || !script) return;
+
+    const source = new EventSource(script.dataset.url);
+
+    function parse(html) {
+        const template = document.createElement('template');
+        template.innerHTML = html.trim();
+        return template.content;
+    }
+
+    // Replace an element by id with its pushed version and activate HTMX on it
+    function replaceById(node) {
+        const current = node.id && document.getElementById(node.id);
+        if (!current) return;
+        current.replaceWith(node);
+        htmx.process(node);
+    }
+
+    source.addEventListener('open', function() {
+        window.censusPushActive = true;
+    });
+
+    source.addEventListener('error', function() {
+        // Fall back to polling until the browser reconnects
+        window.censusPushActive = false;
+        if (window.resumePolling) {
+            window.resumePolling();
+        }
+    });
+
+    // Own census section (profile page)
+    source.addEventListener('census', function(evt) {
+        parse(evt.data).querySelectorAll('#census-section').forEach(replaceById);
+    });
+
+    // Referral main + detail rows (referidos page, only if the row is loaded)
+    source.addEventListener('row', function(evt) {
+        parse(evt.data).querySelectorAll('tr[id]').forEach(replaceById);
+        if (window.updateBulkButton) {
+            window.updateBulkButton();
+        }
+    });
+
+    window.addEventListener('beforeunload', function() {
+        source.close();
+    });
+})();
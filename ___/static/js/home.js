@@ -0,0 +1,37 @@
+(function() {
+    'use strict';
+
+    const copyBtn = document.getElementById('copyBtn');
+    const referralUrl = document.getElementById('referralUrl');
+    const toastEl = document.getElementById('copyToast');
+
+    if (copyBtn && referralUrl && toastEl) {
+        const toast = new bootstrap.Toast(toastEl, { delay: 3000 });
+
+        copyBtn.addEventListener('click', async function() {
+            try {
+                await navigator.clipboard.writeText(referralUrl.value);
+
+                // Update button temporarily
+                const originalHTML = copyBtn.innerHTML;
+                copyBtn.innerHTML = '<i class="bi bi-check-lg"></i> Copiado!';
+                copyBtn.classList.remove('btn-primary');
+                copyBtn.classList.add('btn-success');
+
+                // Show toast
+                toast.show();
+
+                // Reset after 2 seconds
+                setTimeout(() => {
+                    copyBtn.innerHTML = originalHTML;
+                    copyBtn.classList.remove('btn-success');
+                    copyBtn.classList.add('btn-primary');
+                }, 2000);
+
+            } catch (err) {
+                console.error('Copy failed:', err);
+                alert('No se pudo copiar. Tu enlace es: ' + referralUrl.value);
+            }
+        });
+    }
+})();
@@ -0,0 +1,228 @@
+(function() {
+    'use strict';
+
+    // Show Django messages (rendered as data-message elements) as toasts
+    document.querySelectorAll('#profileMessages [data-message]').forEach(function(message) {
+        const toastEl = document.getElementById('profileToast');
+        const toastBody = document.getElementById('toastMessage');
+        if (toastEl && toastBody) {
+            toastBody.textContent = message.dataset.message;
+            const header = toastEl.querySelector('.toast-header i');
+            if (message.dataset.tags === 'success') {
+                header.className = 'bi bi-check-circle text-success me-2';
+            } else if (message.dataset.tags === 'error') {
+                header.className = 'bi bi-exclamation-circle text-danger me-2';
+            }
+            const toast = new bootstrap.Toast(toastEl, { delay: 3000 });
+            toast.show();
+        }
+    });
+
+    // Debounce function - validates after user stops typing
+    function debounce(func, wait) {
+        let timeout;
+        return function executedFunction(...args) {
+            const later = () => {
+                clearTimeout(timeout);
+                func(...args);
+            };
+            clearTimeout(timeout);
+            timeout = setTimeout(later, wait);
+        };
+    }
+
+    // Validate nombre field (letters, spaces, accented chars only, 2-60 chars)
+    function validateNombre(input) {
+        const value = input.value.trim();
+        const isValid = /^[a-zA-ZáéíóúñüÁÉÍÓÚÑÜ\s'-]+$/.test(value) && value.length >= 2 && value.length <= 60;
+        const isEmpty = value === '';
+
+        if (isEmpty) {
+            input.classList.remove('is-invalid', 'is-valid');
+        } else if (isValid) {
+            input.classList.remove('is-invalid');
+            input.classList.add('is-valid');
+        } else {
+            input.classList.remove('is-valid');
+            input.classList.add('is-invalid');
+        }
+    }
+
+    // Validate phone field (10 numeric digits)
+    function validatePhone(input) {
+        const value = input.value.trim();
+        const isValid = /^[0-9]{10}$/.test(value);
+        const isEmpty = value === '';
+
+        if (isEmpty) {
+            input.classList.remove('is-invalid', 'is-valid');
+        } else if (isValid) {
+            input.classList.remove('is-invalid');
+            input.classList.add('is-valid');
+        } else {
+            input.classList.remove('is-valid');
+            input.classList.add('is-invalid');
+        }
+    }
+
+    // Validate referral goal (>= 0)
+    function validateGoal(input) {
+        const value = parseInt(input.value, 10);
+        const isEmpty = input.value.trim() === '';
+        const isValid = !isNaN(value) && value >= 0;
+
+        if (isEmpty) {
+            input.classList.remove('is-invalid', 'is-valid');
+        } else if (isValid) {
+            input.classList.remove('is-invalid');
+            input.classList.add('is-valid');
+        } else {
+            input.classList.remove('is-valid');
+            input.classList.add('is-invalid');
+        }
+    }
+
+    // Filter numeric input helper
+    function filterNumericInput(input, maxLength) {
+        const numericOnly = input.value.replace(/[^0-9]/g, '');
+        input.value = numericOnly.slice(0, maxLength);
+    }
+
+    // Get form fields
+    const nombreField = document.getElementById('id_nombre_completo');
+    const phoneField = document.getElementById('id_phone');
+    const goalField = document.getElementById('id_referral_goal');
+
+    // Setup nombre field (letters, spaces, Spanish accents only, max 60)
+    if (nombreField) {
+        const debouncedValidation = debounce(() => validateNombre(nombreField), 1500);
+
+        // Filter invalid characters on input
+        nombreField.addEventListener('input', function() {
+            // Remove numbers and special characters, keep letters, accents, spaces, hyphens, apostrophes
+            const filtered = this.value.replace(/[^a-zA-ZáéíóúñüÁÉÍÓÚÑÜ\s'-]/g, '');
+            // Limit to 60 characters
+            this.value = filtered.slice(0, 60);
+            debouncedValidation();
+        });
+
+        nombreField.addEventListener('blur', function() {
+            if (this.value.trim() !== '') validateNombre(this);
+        });
+
+        // Block invalid characters on keypress
+        nombreField.addEventListener('keypress', function(e) {
+            const char = e.key;
+            // Allow letters (including accented), space, hyphen, apostrophe
+            const validChar = /^[a-zA-ZáéíóúñüÁÉÍÓÚÑÜ\s'-]$/.test(char);
+            if (!validChar && char.length === 1) {
+                e.preventDefault();
+            }
+        });
+
+        // Handle paste - filter invalid characters
+        nombreField.addEventListener('paste', function(e) {
+            e.preventDefault();
+            const pastedText = (e.clipboardData || window.clipboardData).getData('text');
+            const filtered = pastedText.replace(/[^a-zA-ZáéíóúñüÁÉÍÓÚÑÜ\s'-]/g, '').slice(0, 60);
+            const currentValue = this.value;
+            const newValue = (currentValue + filtered).slice(0, 60);
+            this.value = newValue;
+            debouncedValidation();
+        });
+    }
+
+    // Setup phone field (10 numeric digits)
+    if (phoneField) {
+        const debouncedValidation = debounce(() => validatePhone(phoneField), 1500);
+
+        phoneField.addEventListener('input', function() {
+            filterNumericInput(this, 10);
+            debouncedValidation();
+        });
+
+        phoneField.addEventListener('blur', function() {
+            if (this.value.trim() !== '') validatePhone(this);
+        });
+
+        phoneField.addEventListener('keypress', function(e) {
+            if (e.key < '0' || e.key > '9') e.preventDefault();
+        });
+
+        phoneField.addEventListener('paste', function(e) {
+            e.preventDefault();
+            const pastedText = (e.clipboardData || window.clipboardData).getData('text');
+            const numericOnly = pastedText.replace(/[^0-9]/g, '').slice(0, 10);
+            this.value = (this.value + numericOnly).slice(0, 10);
+            debouncedValidation();
+        });
+    }
+
+    // Setup goal field
+    if (goalField) {
+        const debouncedValidation = debounce(() => validateGoal(goalField), 1500);
+
+        goalField.addEventListener('input', function() {
+            debouncedValidation();
+        });
+
+        goalField.addEventListener('blur', function() {
+            if (this.value.trim() !== '') validateGoal(this);
+        });
+    }
+
+    // Validate on form submit
+    const form = document.querySelector('form');
+    if (form) {
+        form.addEventListener('submit', function(event) {
+            let isValid = true;
+
+            if (nombreField) {
+                validateNombre(nombreField);
+                if (nombreField.classList.contains('is-invalid') || nombreField.value.trim() === '') {
+                    if (nombreField.value.trim() === '') nombreField.classList.add('is-invalid');
+                    isValid = false;
+                }
+            }
+
+            if (phoneField) {
+                validatePhone(phoneField);
+                if (phoneField.classList.contains('is-invalid') || phoneField.value.trim() === '') {
+                    if (phoneField.value.trim() === '') phoneField.classList.add('is-invalid');
+                    isValid = false;
+                }
+            }
+
+            if (goalField) {
+                validateGoal(goalField);
+                if (goalField.classList.contains('is-invalid')) {
+                    isValid = false;
+                }
+            }
+
+            if (!isValid) {
+                event.preventDefault();
+                event.stopPropagation();
+            }
+        });
+    }
+
+    // Handle HTMX showToast events from HX-Trigger header
+    document.body.addEventListener('showToast', function(evt) {
+        const toastEl = document.getElementById('profileToast');
+        const toastBody = document.getElementById('toastMessage');
+        if (toastEl && toastBody) {
+            toastBody.textContent = evt.detail.message;
+            const header = toastEl.querySelector('.toast-header i');
+            if (evt.detail.type === 'warning') {
+                header.className = 'bi bi-exclamation-triangle text-warning me-2';
+            } else if (evt.detail.type === 'info') {
+                header.className = 'bi bi-info-circle text-info me-2';
+            } else {
+                header.className = 'bi bi-check-circle text-success me-2';
+            }
+            const toast = new bootstrap.Toast(toastEl, { delay: 3000 });
+            toast.show();
+        }
+    });
+})();
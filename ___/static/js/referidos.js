@@ -0,0 +1,182 @@
+(function() {
+    'use strict';
+
+    const pendingUrl = document.currentScript.dataset.pendingUrl;
+
+    // Get IDs of rows currently showing as pending (for polling)
+    window.getPendingRowIds = function() {
+        const pendingRows = document.querySelectorAll('.referral-row[data-status="PENDING"], .referral-row[data-status="PROCESSING"]');
+        const ids = Array.from(pendingRows).map(row => row.dataset.id);
+        return ids.join(',');
+    };
+
+    // Toggle detail row expansion
+    window.toggleDetail = function(id) {
+        const detailRow = document.getElementById('detail-' + id);
+        const mainRow = document.getElementById('row-' + id);
+
+        if (detailRow && mainRow) {
+            const isExpanded = detailRow.style.display === 'table-row';
+            detailRow.style.display = isExpanded ? 'none' : 'table-row';
+            mainRow.setAttribute('aria-expanded', !isExpanded);
+        }
+    };
+
+    // Reload rows from the server with the current filter/sort/search
+    function reloadRows() {
+        const form = document.getElementById('referral-filters');
+        if (form) {
+            htmx.trigger(form, 'submit');
+        }
+    }
+
+    // Filter table by status (server-side)
+    // Download the export with the current filter, search and sort
+    window.exportReferrals = function(link) {
+        const form = document.getElementById('referral-filters');
+        const params = new URLSearchParams(new FormData(form));
+        params.set('formato', link.dataset.format);
+        window.location.href = link.pathname + '?' + params.toString();
+        return false;
+    };
+
+    window.filterTable = function(statusFilter) {
+        document.getElementById('filter-input').value = statusFilter;
+
+        // Update active tab
+        document.querySelectorAll('.nav-pills .nav-link').forEach(btn => {
+            if (btn.dataset.filter === statusFilter) {
+                btn.classList.add('active');
+            } else {
+                btn.classList.remove('active');
+            }
+        });
+
+        reloadRows();
+    };
+
+    // Sort table by column (server-side, toggles direction on same column)
+    window.sortTable = function(column) {
+        const sortInput = document.getElementById('sort-input');
+        const dirInput = document.getElementById('dir-input');
+
+        if (sortInput.value === column) {
+            dirInput.value = dirInput.value === 'asc' ? 'desc' : 'asc';
+        } else {
+            sortInput.value = column;
+            dirInput.value = 'asc';
+        }
+
+        reloadRows();
+    };
+
+    // Restart pending polling when newly loaded rows are pending
+    window.ensurePolling = function() {
+        const trigger = document.getElementById('pending-poll-trigger');
+        if (!trigger || trigger.hasAttribute('hx-get') || !getPendingRowIds()) return;
+
+        trigger.setAttribute('hx-get', pendingUrl);
+        trigger.setAttribute('hx-vals', 'js:{ids: getPendingRowIds()}');
+        trigger.setAttribute('hx-trigger', 'load[!window.censusPushActive] delay:5s');
+        trigger.setAttribute('hx-swap', 'outerHTML');
+        htmx.process(trigger);
+    };
+
+    // Called when the SSE push connection drops: restart polling
+    window.resumePolling = function() {
+        const trigger = document.getElementById('pending-poll-trigger');
+        if (trigger) {
+            trigger.removeAttribute('hx-get');
+        }
+        ensurePolling();
+    };
+
+    // Update bulk refresh button state
+    window.updateBulkButton = function() {
+        const checkboxes = document.querySelectorAll('.referral-checkbox');
+        const button = document.getElementById('bulk-refresh-btn');
+
+        if (!button) return;
+
+        const checkedCount = Array.from(checkboxes).filter(cb => cb.checked).length;
+
+        if (checkedCount > 0) {
+            button.disabled = false;
+            button.querySelector('.htmx-indicator-hide').innerHTML = '<i class="bi bi-arrow-clockwise"></i> Actualizar seleccionados (' + checkedCount + ')';
+        } else {
+            button.disabled = true;
+            button.querySelector('.htmx-indicator-hide').innerHTML = '<i class="bi bi-arrow-clockwise"></i> Actualizar seleccionados';
+        }
+    };
+
+    // Copy referral URL
+    window.copyReferralUrl = function() {
+        const input = document.getElementById('referralUrlInput');
+        const button = document.getElementById('copyUrlBtn');
+
+        if (input && button) {
+            input.select();
+            navigator.clipboard.writeText(input.value).then(() => {
+                const originalHtml = button.innerHTML;
+                button.innerHTML = '<i class="bi bi-check"></i> Copiado!';
+                button.classList.add('btn-success');
+                button.classList.remove('btn-primary');
+
+                setTimeout(() => {
+                    button.innerHTML = originalHtml;
+                    button.classList.remove('btn-success');
+                    button.classList.add('btn-primary');
+                }, 2000);
+            }).catch(err => {
+                console.error('Error copying: ', err);
+            });
+        }
+    };
+
+    // HTMX showToast event handler
+    document.body.addEventListener('showToast', function(evt) {
+        const toastEl = document.getElementById('referidosToast');
+        const toastBody = document.getElementById('toastMessage');
+
+        if (toastEl && toastBody) {
+            toastBody.textContent = evt.detail.message;
+            const header = toastEl.querySelector('.toast-header i');
+
+            if (evt.detail.type === 'warning') {
+                header.className = 'bi bi-exclamation-triangle text-warning me-2';
+            } else if (evt.detail.type === 'info') {
+                header.className = 'bi bi-info-circle text-info me-2';
+            } else if (evt.detail.type === 'error') {
+                header.className = 'bi bi-exclamation-circle text-danger me-2';
+            } else {
+                header.className = 'bi bi-check-circle text-success me-2';
+            }
+
+            const toast = new bootstrap.Toast(toastEl, { delay: 3000 });
+            toast.show();
+        }
+    });
+
+    // After HTMX row updates (new page, filter change or polling)
+    document.body.addEventListener('htmx:afterSwap', function(evt) {
+        // Update bulk button state after row swap
+        updateBulkButton();
+        ensurePolling();
+    });
+
+    // Convert UTC timestamps to local time on page load
+    document.addEventListener('DOMContentLoaded', function() {
+        document.querySelectorAll('.local-time').forEach(elem => {
+            const utcTime = elem.dataset.utc;
+            if (utcTime) {
+                try {
+                    const date = new Date(utcTime);
+                    elem.textContent = date.toLocaleString();
+                } catch (e) {
+                    console.error('Error parsing date:', e);
+                }
+            }
+        });
+    });
+
+})();